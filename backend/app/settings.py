@@ -16,7 +16,7 @@ import sys
 from pathlib import Path
 
 import structlog
-from decouple import config
+from decouple import Csv, config
 
 from app.logging import sql_trace_formatter
 
@@ -69,6 +69,7 @@ if not TESTING:
 MIDDLEWARE = [
     "django_structlog.middlewares.RequestMiddleware",
     "npdfhir.middleware.HealthCheckMiddleware",
+    "npdfhir.middleware.FHIRCompressionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -249,15 +250,100 @@ LOGOUT_REDIRECT_URL = LOGIN_URL
 
 DEBUG_TOOLBAR_CONFIG = {"SHOW_TOOLBAR_CALLBACK": lambda request: DEBUG and not TESTING}
 
+# FHIR search pages are shared by the workers (see npdfhir.search_cache) in Redis
+# when FHIR_SEARCH_CACHE_URL is set, e.g. redis://cache:6379/0, and otherwise
+# only cached in each worker.
+FHIR_SEARCH_CACHE_URL = config("FHIR_SEARCH_CACHE_URL", default="")
+
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
         "LOCATION": "/var/tmp/django_cache",
-    }
+    },
+    "search": (
+        {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": FHIR_SEARCH_CACHE_URL,
+        }
+        if FHIR_SEARCH_CACHE_URL
+        else {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+    ),
 }
 
 SWAGGER_SETTINGS = {"USE_SESSION_AUTH": False}
 
+# FHIR serialization
+# npdfhir serializers build FHIR resources as plain dicts. A sample of responses
+# is also validated against the fhir.resources models and mismatches are logged.
+# The test suite validates every response and fails on any mismatch.
+FHIR_VALIDATION_SAMPLE_RATE = (
+    1.0 if TESTING else config("FHIR_VALIDATION_SAMPLE_RATE", default=0.01, cast=float)
+)
+FHIR_VALIDATION_STRICT = TESTING
+
+# Serve FHIR resources from the pre-rendered fhir_resource table, for deployments
+# whose loads rebuild it with `python manage.py buildfhirstore`. A resource type's
+# documents are not served once a load has bumped its dataset version and until
+# they are rebuilt, and resources missing from the table fall back to the
+# serializers.
+FHIR_RESOURCE_STORE = config("FHIR_RESOURCE_STORE", default=False, cast=bool)
+
+# Resource types (currently Practitioner and/or Organization) whose JSON is built
+# in Postgres rather than by the serializers, e.g. "Practitioner,Organization".
+FHIR_DATABASE_ENGINE_RESOURCES = config("FHIR_DATABASE_ENGINE_RESOURCES", default="", cast=Csv())
+
+# Stream search Bundles whose page size is at least FHIR_STREAMING_PAGE_SIZE (0
+# disables streaming), reading FHIR_STREAMING_CHUNK_SIZE rows at a time. Tests opt
+# in explicitly since streamed responses have no response.data.
+FHIR_STREAMING_PAGE_SIZE = (
+    0 if TESTING else config("FHIR_STREAMING_PAGE_SIZE", default=200, cast=int)
+)
+FHIR_STREAMING_CHUNK_SIZE = config("FHIR_STREAMING_CHUNK_SIZE", default=100, cast=int)
+
+# FHIR responses are compressed with zstd, brotli or gzip as the client accepts.
+# Compressed bodies of responses with an ETag are cached for this many seconds
+# (0 compresses every response).
+FHIR_COMPRESSION_CACHE_TIMEOUT = config("FHIR_COMPRESSION_CACHE_TIMEOUT", default=600, cast=int)
+
+# Search totals counted for _total=accurate are cached for this many seconds and
+# reused by _total=estimate.
+FHIR_COUNT_CACHE_TIMEOUT = config("FHIR_COUNT_CACHE_TIMEOUT", default=3600, cast=int)
+
+# Search pages of FHIR_SEARCH_CACHE_RESOURCES are cached for
+# FHIR_SEARCH_CACHE_TIMEOUT seconds (0 disables the cache; tests opt in), up to
+# FHIR_SEARCH_CACHE_SIZE pages in each worker.
+FHIR_SEARCH_CACHE_RESOURCES = config(
+    "FHIR_SEARCH_CACHE_RESOURCES", default="Practitioner,Organization,Location", cast=Csv()
+)
+FHIR_SEARCH_CACHE_SIZE = config("FHIR_SEARCH_CACHE_SIZE", default=1024, cast=int)
+FHIR_SEARCH_CACHE_TIMEOUT = (
+    0 if TESTING else config("FHIR_SEARCH_CACHE_TIMEOUT", default=3600, cast=int)
+)
+
+# Dataset versions (see npdfhir.dataset) are read at most every this many seconds
+# in each worker.
+DATASET_VERSION_CHECK_INTERVAL = (
+    0 if TESTING else config("DATASET_VERSION_CHECK_INTERVAL", default=5, cast=int)
+)
+
+# Maximum number of entries in a batch Bundle POSTed to the FHIR base URL.
+FHIR_BATCH_MAX_ENTRIES = config("FHIR_BATCH_MAX_ENTRIES", default=500, cast=int)
+
+# Bulk Data $export files are written here by `python manage.py runexportworker`,
+# which must share the directory with the web workers. Finished exports are
+# deleted after FHIR_EXPORT_RETENTION_HOURS.
+FHIR_EXPORT_DIR = config("FHIR_EXPORT_DIR", default="/var/tmp/npd_exports")
+FHIR_EXPORT_RETENTION_HOURS = config("FHIR_EXPORT_RETENTION_HOURS", default=24, cast=int)
+# A worker renews its lease on the job it runs every fifth of this many seconds;
+# a job whose lease has gone unrenewed this long is restarted by another worker.
+FHIR_EXPORT_LEASE_SECONDS = config("FHIR_EXPORT_LEASE_SECONDS", default=300, cast=int)
+
+# Name typeahead suggestions (see provider_directory.typeahead) are cached in
+# each worker, for up to TYPEAHEAD_CACHE_SIZE prefixes and TYPEAHEAD_CACHE_TIMEOUT
+# seconds.
+TYPEAHEAD_CACHE_SIZE = config("TYPEAHEAD_CACHE_SIZE", default=4096, cast=int)
+TYPEAHEAD_CACHE_TIMEOUT = config("TYPEAHEAD_CACHE_TIMEOUT", default=300, cast=int)
+
 # feature flags
 FLAGS = {
     "SEARCH_APP": [],  # can see the search app at all
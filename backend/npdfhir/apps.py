@@ -6,5 +6,5 @@ class NPDFHIRConfig(AppConfig):
     name = "npdfhir"
 
     def ready(self):
-        # Import signals module to connect the handlers
-        pass
+        # register the custom lookups
+        from . import lookups  # noqa: F401
@@ -0,0 +1,223 @@
+"""
+FHIR batch Bundles. A batch POSTed to the base URL lists GET requests (reads
+and searches) as entries, and each is answered by the entry in the same
+position of a batch-response Bundle. An entry that fails gets its own status
+and OperationOutcome without affecting the others.
+
+Plain reads are grouped by resource type and looked up with one query per
+type. Searches, and reads with parameters, are dispatched to the resource's
+viewset as GET requests carrying the batch request's credentials; they all
+run inside the batch request, on its database connection.
+"""
+
+import copy
+from collections import namedtuple
+from datetime import UTC, datetime
+from http import HTTPStatus
+from urllib.parse import urlsplit
+from uuid import UUID
+
+from django.http import QueryDict
+from django.urls import reverse
+from django.utils.http import parse_http_date
+
+BATCH = "batch"
+BATCH_RESPONSE = "batch-response"
+
+# headers of the batch request that do not carry over to its entries
+EXCLUDED_HEADERS = [
+    "CONTENT_LENGTH",
+    "CONTENT_TYPE",
+    "HTTP_IF_MATCH",
+    "HTTP_IF_MODIFIED_SINCE",
+    "HTTP_IF_NONE_MATCH",
+]
+
+ISSUE_CODES = {400: "invalid", 404: "not-found", 405: "not-supported"}
+
+
+class EntryRequest(namedtuple("EntryRequest", ["resource_type", "id", "query"])):
+    @property
+    def is_plain_read(self):
+        return self.id is not None and not self.query
+
+
+class EntryError(Exception):
+    """
+    An entry that cannot be run; it is answered with the status and an
+    OperationOutcome.
+    """
+
+    def __init__(self, status, diagnostics):
+        super().__init__(diagnostics)
+        self.status = status
+        self.diagnostics = diagnostics
+
+
+def parse_entry(entry, viewsets) -> EntryRequest:
+    """
+    Parse an entry's request url, which is relative to the FHIR base (or
+    absolute, under it).
+    """
+    request = entry.get("request") if isinstance(entry, dict) else None
+    if not isinstance(request, dict) or not isinstance(request.get("url"), str):
+        raise EntryError(400, "Entries must have a request url")
+    if request.get("method") != "GET":
+        raise EntryError(405, "Only GET entries are supported")
+
+    url = urlsplit(request["url"])
+    path = url.path
+    base_path = reverse("api-root")
+    if path.startswith(f"{base_path}/"):
+        path = path[len(base_path) :]
+    parts = path.strip("/").split("/")
+
+    resource_type = parts[0]
+    if resource_type not in viewsets or len(parts) > 2:
+        raise EntryError(404, f"Unknown resource url {request['url']}")
+    if len(parts) == 1:
+        return EntryRequest(resource_type, None, url.query)
+
+    try:
+        id = str(UUID(parts[1]))
+    except ValueError:
+        raise EntryError(404, f"{resource_type} {parts[1]} not found") from None
+    return EntryRequest(resource_type, id, url.query)
+
+
+def status_line(status) -> str:
+    return f"{status} {HTTPStatus(status).phrase}"
+
+
+def response_entry(status, resource=None, etag=None, last_modified=None) -> dict:
+    response = {"status": status_line(status)}
+    if etag is not None:
+        response["etag"] = etag
+    if last_modified is not None:
+        response["lastModified"] = last_modified
+    entry = {"response": response}
+    if resource is not None:
+        entry = {"resource": resource, **entry}
+    return entry
+
+
+def error_entry(status, diagnostics) -> dict:
+    outcome = {
+        "resourceType": "OperationOutcome",
+        "issue": [
+            {
+                "severity": "error",
+                "code": ISSUE_CODES.get(status, "processing"),
+                "diagnostics": diagnostics,
+            }
+        ],
+    }
+    return response_entry(status, outcome)
+
+
+def read_resources(request, viewset, ids) -> dict:
+    """
+    Look up the resources with the given ids with one query on the viewset's
+    queryset (and one store lookup), returning (resource, etag, last updated)
+    by id.
+    """
+    view = viewset(request=request, format_kwarg=None, action="list", kwargs={})
+    view.requested_elements = None
+    instances = view.get_queryset().filter(pk__in=ids)
+    # annotations joining one-to-many tables can repeat rows
+    instances = list({instance.pk: instance for instance in instances}.values())
+
+    etag = last_updated = None
+    version = view.get_read_version()
+    if version is not None:
+        version_id, last_updated = version
+        etag = view.get_etag(version_id)
+    return {
+        str(resource["id"]): (resource, etag, last_updated)
+        for resource in view.get_resources(instances)
+    }
+
+
+def make_entry_request(request, path, query):
+    """
+    A GET request for one entry, authenticated as the batch request was.
+    """
+    entry_request = copy.copy(request._request)
+    entry_request.method = "GET"
+    entry_request.path = entry_request.path_info = path
+    entry_request.GET = QueryDict(query)
+    entry_request.META = {
+        key: value for key, value in request.META.items() if key not in EXCLUDED_HEADERS
+    }
+    entry_request.META.update(REQUEST_METHOD="GET", PATH_INFO=path, QUERY_STRING=query)
+    # skip authenticating every entry again
+    entry_request._force_auth_user = request.user
+    entry_request._force_auth_token = request.auth
+    return entry_request
+
+
+def dispatch_entry(request, viewset, entry) -> dict:
+    """
+    Run a search (or a read with parameters) through the resource's viewset.
+    """
+    basename = f"fhir-{entry.resource_type.lower()}"
+    if entry.id is None:
+        view = viewset.as_view({"get": "list"}, stream_bundles=False, cache_searches=False)
+        path = reverse(f"{basename}-list")
+        kwargs = {}
+    else:
+        view = viewset.as_view({"get": "retrieve"})
+        path = reverse(f"{basename}-detail", args=[entry.id])
+        kwargs = {viewset.lookup_url_kwarg: entry.id}
+    response = view(make_entry_request(request, path, entry.query), **kwargs)
+
+    data = getattr(response, "data", None)
+    if response.status_code != 200:
+        diagnostics = str(data) if data is not None else response.content.decode()
+        return error_entry(response.status_code, diagnostics)
+    if entry.id is None:
+        # the search Bundle, without the pagination envelope
+        data = data["results"]
+    last_modified = response.get("Last-Modified")
+    if last_modified is not None:
+        last_modified = datetime.fromtimestamp(parse_http_date(last_modified), tz=UTC)
+    return response_entry(200, data, response.get("ETag"), last_modified)
+
+
+def run_batch(request, entries, viewsets) -> dict:
+    """
+    Run a batch's entries, returning the batch-response Bundle.
+    """
+    parsed = []
+    reads = {}
+    for entry in entries:
+        try:
+            entry = parse_entry(entry, viewsets)
+        except EntryError as error:
+            entry = error
+        else:
+            if entry.is_plain_read:
+                reads.setdefault(entry.resource_type, set()).add(entry.id)
+        parsed.append(entry)
+
+    found = {
+        resource_type: read_resources(request, viewsets[resource_type], ids)
+        for resource_type, ids in reads.items()
+    }
+
+    response_entries = []
+    for entry in parsed:
+        if isinstance(entry, EntryError):
+            response_entries.append(error_entry(entry.status, entry.diagnostics))
+        elif entry.is_plain_read:
+            resource = found[entry.resource_type].get(entry.id)
+            if resource is None:
+                response_entries.append(
+                    error_entry(404, f"{entry.resource_type} {entry.id} not found")
+                )
+            else:
+                response_entries.append(response_entry(200, *resource))
+        else:
+            response_entries.append(dispatch_entry(request, viewsets[entry.resource_type], entry))
+
+    return {"resourceType": "Bundle", "type": BATCH_RESPONSE, "entry": response_entries}
@@ -0,0 +1,269 @@
+"""
+FHIR Bulk Data export ($export). A kick-off request records an ExportJob; the
+runexportworker command picks jobs up and writes one gzipped NDJSON file per
+resource type to FHIR_EXPORT_DIR, reading each table in primary-key order
+through a server-side cursor. Clients poll the job's status URL until the
+manifest lists the files, then download them (see the export views).
+
+A worker holds a lease on the job it runs: it renews the job's updated_at at
+least every FHIR_EXPORT_LEASE_SECONDS / 5 seconds while it writes, and a job
+left in progress for longer than FHIR_EXPORT_LEASE_SECONDS (its worker having
+crashed or been stopped) is claimed again and restarted. A worker that finds
+its job deleted stops and removes the job's files; one that finds its job
+claimed by another worker stops and leaves them.
+"""
+
+import gzip
+import shutil
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import structlog
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.http import QueryDict
+from django.utils import timezone
+
+from .models import ExportJob
+from .renderers import RenderedResource, dumps
+
+logger = structlog.get_logger(__name__)
+
+ACCEPTED = "accepted"
+IN_PROGRESS = "in-progress"
+COMPLETED = "completed"
+FAILED = "failed"
+# run_job's result for a job that was deleted, or claimed by another worker,
+# while it ran
+CANCELLED = "cancelled"
+LOST = "lost"
+
+NDJSON_MEDIA_TYPE = "application/fhir+ndjson"
+# _outputFormat values accepted for NDJSON, per the Bulk Data spec
+OUTPUT_FORMATS = {NDJSON_MEDIA_TYPE, "application/ndjson", "ndjson"}
+
+# seconds clients are asked to wait between status polls
+RETRY_AFTER = 5
+
+
+class ExportRequest:
+    """
+    Stand-in for the request passed to viewsets and serializers when rendering
+    resources for an export. URLs are built against the kick-off request's
+    base URL.
+    """
+
+    query_params = QueryDict()
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+
+    def build_absolute_uri(self, location=None):
+        return f"{self.base_url}{location or '/'}"
+
+
+def get_export_dir(job_id) -> Path:
+    return Path(settings.FHIR_EXPORT_DIR) / str(job_id)
+
+
+def get_file_name(resource_type: str) -> str:
+    return f"{resource_type}.ndjson.gz"
+
+
+def get_expiry(job):
+    return job.updated_at + timedelta(hours=settings.FHIR_EXPORT_RETENTION_HOURS)
+
+
+def get_lease_cutoff():
+    """
+    In-progress jobs last renewed before this have lost their worker.
+    """
+    return timezone.now() - timedelta(seconds=settings.FHIR_EXPORT_LEASE_SECONDS)
+
+
+def claim_job():
+    """
+    Mark the oldest accepted job, or in-progress job whose lease has expired,
+    as in progress and return it, or None if no job is waiting. Locked rows
+    are skipped, so several workers can run.
+    """
+    with transaction.atomic():
+        job = (
+            ExportJob.objects.select_for_update(skip_locked=True)
+            .filter(Q(status=ACCEPTED) | Q(status=IN_PROGRESS, updated_at__lt=get_lease_cutoff()))
+            .order_by("created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        if job.status == IN_PROGRESS:
+            logger.warning("Restarting an abandoned bulk export", job_id=str(job.id))
+        job.status = IN_PROGRESS
+        # also identifies this claim of the job, see Lease
+        job.transaction_time = timezone.now()
+        job.save(update_fields=["status", "transaction_time", "updated_at"])
+    return job
+
+
+class LeaseLost(Exception):
+    """
+    The job was deleted, or claimed by another worker, while this one ran it.
+    """
+
+
+class Lease:
+    """
+    A worker's hold on the job it claimed. Every update of the job renews the
+    lease, and fails with LeaseLost once the job is gone or has been claimed
+    again (which gives it a new transaction_time).
+    """
+
+    def __init__(self, job):
+        self.jobs = ExportJob.objects.filter(
+            pk=job.pk, status=IN_PROGRESS, transaction_time=job.transaction_time
+        )
+        self.renewed_at = time.monotonic()
+
+    def update(self, **fields):
+        if not self.jobs.update(updated_at=timezone.now(), **fields):
+            raise LeaseLost
+        self.renewed_at = time.monotonic()
+
+    def renew(self):
+        """
+        Renew the lease if it is due.
+        """
+        if time.monotonic() - self.renewed_at >= settings.FHIR_EXPORT_LEASE_SECONDS / 5:
+            self.update()
+
+
+def iter_resources(viewset, request, chunk_size):
+    """
+    Yield every resource of a viewset's type in primary-key order. Instances
+    are read through a server-side cursor and rendered a chunk at a time the
+    same way search results are.
+    """
+    view = viewset(request=request, format_kwarg=None, action="list", kwargs={})
+    chunk = []
+    last_pk = None
+    for instance in view.get_queryset().order_by("pk").iterator(chunk_size=chunk_size):
+        # annotations joining one-to-many tables can repeat rows
+        if instance.pk == last_pk:
+            continue
+        last_pk = instance.pk
+        chunk.append(instance)
+        if len(chunk) == chunk_size:
+            yield from view.get_resources(chunk)
+            chunk = []
+    if chunk:
+        yield from view.get_resources(chunk)
+
+
+def to_ndjson_line(resource) -> bytes:
+    if isinstance(resource, RenderedResource):
+        content = resource.content
+        return (content.encode() if isinstance(content, str) else content) + b"\n"
+    return dumps(resource) + b"\n"
+
+
+def write_export_file(job, viewset, chunk_size, lease) -> int:
+    """
+    Write a resource type's NDJSON file for a job, returning the number of
+    resources in it. The file only appears under its final name once complete,
+    and only while the worker still holds the job's lease.
+    """
+    path = get_export_dir(job.id) / get_file_name(viewset.resource_type)
+    # named for this claim of the job, so a worker that has lost the job never
+    # writes into the file of the one that claimed it again
+    partial = path.with_name(f"{path.name}.{job.transaction_time.timestamp()}.partial")
+    request = ExportRequest(job.base_url)
+
+    count = 0
+    try:
+        with gzip.open(partial, "wb") as file:
+            for resource in iter_resources(viewset, request, chunk_size):
+                file.write(to_ndjson_line(resource))
+                count += 1
+                lease.renew()
+        lease.update()
+        partial.replace(path)
+    finally:
+        partial.unlink(missing_ok=True)
+    return count
+
+
+def run_job(job, viewsets, chunk_size) -> str:
+    """
+    Export each of a job's resource types and record the manifest output.
+    Returns the job's final status. A job deleted (cancelled) while running
+    stops within the lease renewal interval and has its files removed; one
+    claimed again by another worker stops and is left to it.
+    """
+    lease = Lease(job)
+    try:
+        return export_resources(job, viewsets, chunk_size, lease)
+    except LeaseLost:
+        if ExportJob.objects.filter(pk=job.pk).exists():
+            return LOST
+        delete_export_files(job.id)
+        return CANCELLED
+
+
+def export_resources(job, viewsets, chunk_size, lease) -> str:
+    export_dir = get_export_dir(job.id)
+    export_dir.mkdir(parents=True, exist_ok=True)
+
+    output = []
+    for resource_type in job.resource_types:
+        lease.update(progress=resource_type)
+        try:
+            count = write_export_file(job, viewsets[resource_type], chunk_size, lease)
+        except LeaseLost:
+            raise
+        except Exception:
+            # files removed by a cancellation fail the export too; the update
+            # then raises LeaseLost instead
+            lease.update(status=FAILED, error=f"Export of {resource_type} resources failed")
+            logger.exception("Bulk export failed", job_id=str(job.id), resource_type=resource_type)
+            delete_export_files(job.id)
+            return FAILED
+
+        file_name = get_file_name(resource_type)
+        if count:
+            output.append({"type": resource_type, "file": file_name, "count": count})
+        else:
+            (export_dir / file_name).unlink()
+
+    lease.update(status=COMPLETED, progress=None, output=output)
+    return COMPLETED
+
+
+def delete_job(job):
+    """
+    Delete a job and its files. The files of a job a worker is running are
+    left for the worker, which removes them once it sees the job is gone, so
+    that they are not removed from under it.
+    """
+    running = job.status == IN_PROGRESS and job.updated_at >= get_lease_cutoff()
+    ExportJob.objects.filter(pk=job.pk).delete()
+    if not running:
+        delete_export_files(job.id)
+
+
+def delete_export_files(job_id):
+    shutil.rmtree(get_export_dir(job_id), ignore_errors=True)
+
+
+def prune_expired_jobs() -> int:
+    """
+    Delete finished jobs (and their files) older than FHIR_EXPORT_RETENTION_HOURS.
+    """
+    cutoff = timezone.now() - timedelta(hours=settings.FHIR_EXPORT_RETENTION_HOURS)
+    expired = ExportJob.objects.filter(status__in=[COMPLETED, FAILED], updated_at__lt=cutoff)
+    job_ids = list(expired.values_list("id", flat=True))
+    for job_id in job_ids:
+        delete_export_files(job_id)
+    ExportJob.objects.filter(id__in=job_ids).delete()
+    return len(job_ids)
@@ -1,30 +1,108 @@
-import json
-import sys
+"""
+Reference data: the small code tables (name and phone uses, other identifier
+types, NUCC taxonomy codes) that serializers look up a display value in for
+every resource they render.
+
+A table is loaded the first time it is looked up, not at import, into a dict
+in the worker's memory, where lookups are plain dict lookups. Loaded tables
+are also kept in the shared Django cache as pickled dicts, so that the
+workers on a host query the database for them once between them.
+
+Loaded tables are keyed by the dataset version (see npdfhir.dataset) of a
+resource type they are rendered in, which every load bumps, so a worker swaps
+in the tables of a new version whole once it sees a load. While a table is
+reloaded, the worker's other threads keep reading the old one, and other
+workers wait for the one that holds the table's load lock rather than all
+querying the database at once.
+"""
+
+import threading
+import time
+from collections.abc import Mapping
+from typing import NamedTuple
 
 from django.core.cache import cache
 
+from .dataset import get_dataset_version
 from .models import FhirNameUse, FhirPhoneUse, Nucc, OtherIdType
 
+# how long a loaded table is kept in the shared cache
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+# how long a worker may hold a table's load lock, and how often the others
+# check for the table it is loading
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 0.05
+
+
+class Snapshot(NamedTuple):
+    version: int | None
+    data: dict
+
+
+class ReferenceData(Mapping):
+    """
+    A code table as a read-only mapping of its key_field to its value_field,
+    reloaded with each dataset version of resource_type.
+    """
+
+    def __init__(self, model, key_field, value_field, resource_type):
+        self.model = model
+        self.key_field = key_field
+        self.value_field = value_field
+        self.resource_type = resource_type
+        self.snapshot = None
+        self.lock = threading.Lock()
 
-def cacheData(model):
-    name = model.__name__
-    data = cache.get(name)
-    if not data:
-        data = {}
-        for obj in model.objects.all():
-            if hasattr(obj, "display_name"):
-                data[str(obj.code)] = obj.display_name
+    def __getitem__(self, key):
+        return self.get_data()[key]
+
+    def __iter__(self):
+        return iter(self.get_data())
+
+    def __len__(self):
+        return len(self.get_data())
+
+    def get_version(self) -> int | None:
+        version = get_dataset_version(self.resource_type)
+        return version.generation if version is not None else None
+
+    def get_data(self) -> dict:
+        version = self.get_version()
+        snapshot = self.snapshot
+        if snapshot is not None and snapshot.version == version:
+            return snapshot.data
+        # one thread loads the new version; the others read the current
+        # snapshot meanwhile, or wait for the first one
+        if not self.lock.acquire(blocking=snapshot is None):
+            return snapshot.data
+        try:
+            if self.snapshot is snapshot:
+                self.snapshot = Snapshot(version, self.load(version))
+            return self.snapshot.data
+        finally:
+            self.lock.release()
+
+    def load(self, version) -> dict:
+        """
+        The table as of version, from the shared cache, or from the database
+        by the one worker that takes the load lock.
+        """
+        key = f"reference-data:{self.model.__name__}:{version}"
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while (data := cache.get(key)) is None:
+            if cache.add(lock_key, True, timeout=LOCK_TIMEOUT) or time.monotonic() > deadline:
+                data = dict(self.model.objects.values_list(self.key_field, self.value_field))
+                cache.set(key, data, timeout=SNAPSHOT_TIMEOUT)
+                cache.delete(lock_key)
             else:
-                data[str(obj.id)] = obj.value
-        json_data = json.dumps(data)
-        cache.set(name, json_data, timeout=60 * 5)
-    else:
-        data = json.loads(data)
-    return data
-
-
-if "runserver" or "test" in sys.argv:
-    other_identifier_type = cacheData(OtherIdType)
-    fhir_name_use = cacheData(FhirNameUse)
-    nucc_taxonomy_codes = cacheData(Nucc)
-    fhir_phone_use = cacheData(FhirPhoneUse)
+                time.sleep(LOCK_WAIT)
+        return data
+
+
+# every table is rendered in Practitioners, so a load that changes one bumps
+# their version
+other_identifier_type = ReferenceData(OtherIdType, "id", "value", "Practitioner")
+fhir_name_use = ReferenceData(FhirNameUse, "id", "value", "Practitioner")
+nucc_taxonomy_codes = ReferenceData(Nucc, "code", "display_name", "Practitioner")
+fhir_phone_use = ReferenceData(FhirPhoneUse, "id", "value", "Practitioner")
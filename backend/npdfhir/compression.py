@@ -0,0 +1,103 @@
+"""
+Content encodings for FHIR responses and Accept-Encoding negotiation. Levels
+are tuned for latency rather than ratio: FHIR JSON is repetitive enough that
+the fast levels already get most of the size reduction.
+
+Streamed responses are flushed after every chunk, so each entry reaches the
+client as soon as it is rendered rather than when the compressor's buffer
+fills. The flushes keep the compression window, so later entries still
+compress against earlier ones.
+"""
+
+import gzip
+import zlib
+
+import brotli
+import zstandard
+
+# bodies smaller than this are sent as-is
+MIN_SIZE = 512
+
+
+class GzipEncoding:
+    name = "gzip"
+    level = 5
+
+    def compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def compress_stream(self, chunks):
+        # wbits=31 writes a gzip header and trailer
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+
+class BrotliEncoding:
+    name = "br"
+    quality = 4
+
+    def compress(self, data: bytes) -> bytes:
+        return brotli.compress(data, mode=brotli.MODE_TEXT, quality=self.quality)
+
+    def compress_stream(self, chunks):
+        compressor = brotli.Compressor(mode=brotli.MODE_TEXT, quality=self.quality)
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+        yield compressor.finish()
+
+
+class ZstdEncoding:
+    name = "zstd"
+    level = 3
+
+    def compress(self, data: bytes) -> bytes:
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+    def compress_stream(self, chunks):
+        compressor = zstandard.ZstdCompressor(level=self.level).compressobj()
+        for chunk in chunks:
+            yield compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        yield compressor.flush()
+
+
+# in order of preference when the client accepts several equally
+ENCODINGS = {
+    encoding.name: encoding for encoding in [ZstdEncoding(), BrotliEncoding(), GzipEncoding()]
+}
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """
+    Parse an Accept-Encoding header into {coding: qvalue}.
+    """
+    codings = {}
+    for item in header.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        codings[coding.lower()] = qvalue
+    return codings
+
+
+def choose_encoding(header: str):
+    """
+    Return the preferred encoding the client accepts, or None to send the body
+    unencoded.
+    """
+    codings = parse_accept_encoding(header)
+    best, best_qvalue = None, 0.0
+    for name, encoding in ENCODINGS.items():
+        qvalue = codings.get(name, codings.get("*", 0.0))
+        if qvalue > best_qvalue:
+            best, best_qvalue = encoding, qvalue
+    return best
@@ -0,0 +1,101 @@
+"""
+The dataset version: a generation counter per FHIR resource type in the
+dataset_version table, which every load bumps in its transaction (the ETLs and
+refreshsearch). Read and search ETags, the keys of the search and count
+caches, and the per-worker caches made with cache_by_version are derived from
+it, so they change with each load, and cached entries can be kept for long
+without ever being served after one. The resource store records the
+generation it was built at, and is not served at any other (see
+npdfhir.store).
+
+The versions are read in one query and kept in each worker for up to
+DATASET_VERSION_CHECK_INTERVAL seconds, so a load is seen that long after it
+commits at most.
+"""
+
+import time
+from datetime import datetime
+from functools import wraps
+from typing import NamedTuple
+
+from django.conf import settings
+from django.db import connection
+
+from .models import DatasetVersion
+
+
+class Version(NamedTuple):
+    generation: int
+    updated_at: datetime
+    store_generation: int | None
+
+
+class DatasetVersions:
+    def __init__(self):
+        # (time.monotonic() when read, resource type -> Version)
+        self.snapshot = None
+
+    def get(self, resource_type) -> Version | None:
+        snapshot = self.snapshot
+        if (
+            snapshot is None
+            or time.monotonic() - snapshot[0] >= settings.DATASET_VERSION_CHECK_INTERVAL
+        ):
+            versions = {
+                resource_type: Version(*version)
+                for resource_type, *version in DatasetVersion.objects.values_list(
+                    "resource_type", "generation", "updated_at", "store_generation"
+                )
+            }
+            snapshot = self.snapshot = (time.monotonic(), versions)
+        return snapshot[1].get(resource_type)
+
+    def clear(self):
+        self.snapshot = None
+
+
+dataset_versions = DatasetVersions()
+
+
+def get_dataset_version(resource_type: str) -> Version | None:
+    """
+    The current version of a resource type's data, or None for a type that
+    has none.
+    """
+    return dataset_versions.get(resource_type)
+
+
+def bump_dataset_version(resource_types=None):
+    """
+    Start a new version of the data of the given resource types, or of all of
+    them, when the current transaction commits.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "select bump_dataset_version(%s::text[])",
+            [list(resource_types) if resource_types is not None else None],
+        )
+    dataset_versions.clear()
+
+
+def cache_by_version(resource_type):
+    """
+    Cache a function's result in each worker until the resource type's dataset
+    version changes.
+    """
+
+    def decorator(load):
+        cached = None
+
+        @wraps(load)
+        def get():
+            nonlocal cached
+            version = get_dataset_version(resource_type)
+            generation = version.generation if version is not None else None
+            if cached is None or cached[0] != generation:
+                cached = (generation, load())
+            return cached[1]
+
+        return get
+
+    return decorator
@@ -0,0 +1,96 @@
+"""
+The _elements and _summary search parameters, which ask for a subset of each
+resource's top-level elements. Serializers and viewsets use the requested set
+to skip the serializer fields and prefetches of elements that were not asked
+for.
+"""
+
+from functools import cache
+
+from fhir.resources.R4B import get_fhir_model_class
+from rest_framework.exceptions import ValidationError
+
+ELEMENTS_CONTEXT_KEY = "fhir_elements"
+
+SUBSETTED_TAG = {
+    "system": "http://terminology.hl7.org/CodeSystem/v3-ObservationValue",
+    "code": "SUBSETTED",
+    "display": "subsetted",
+}
+
+
+@cache
+def _element_properties(resource_type: str) -> dict:
+    model_class = get_fhir_model_class(resource_type)
+    return {
+        field.alias: field.json_schema_extra
+        for field in model_class.model_fields.values()
+        if (field.json_schema_extra or {}).get("element_property")
+    }
+
+
+@cache
+def summary_elements(resource_type: str) -> frozenset:
+    return frozenset(
+        element
+        for element, properties in _element_properties(resource_type).items()
+        if properties.get("summary_element_property")
+    )
+
+
+@cache
+def mandatory_elements(resource_type: str) -> frozenset:
+    model_class = get_fhir_model_class(resource_type)
+    required = {field.alias for field in model_class.model_fields.values() if field.is_required()}
+    return frozenset(
+        element
+        for element, properties in _element_properties(resource_type).items()
+        if element in required or properties.get("element_required")
+    )
+
+
+def get_requested_elements(resource_type: str, query_params):
+    """
+    Returns the top-level elements requested with _elements or _summary
+    (mandatory elements are always included), or None for the whole resource.
+    _elements takes precedence over _summary.
+    """
+    elements = {
+        element.strip()
+        for value in query_params.getlist("_elements")
+        for element in value.split(",")
+        if element.strip()
+    }
+    if elements:
+        return frozenset(elements) | mandatory_elements(resource_type)
+
+    summary = query_params.get("_summary")
+    # resources carry no narrative text, so _summary=data is the whole resource;
+    # _summary=count returns no resources at all
+    if summary in (None, "false", "data", "count"):
+        return None
+    if summary == "true":
+        return summary_elements(resource_type) | mandatory_elements(resource_type)
+    if summary == "text":
+        return frozenset(["text"]) | mandatory_elements(resource_type)
+    raise ValidationError(
+        {"_summary": [f"Select a valid choice. {summary} is not one of the available choices."]}
+    )
+
+
+def subset_resource(resource: dict, elements) -> dict:
+    """
+    Trim a resource to the given top-level elements, tagging it as SUBSETTED.
+    resourceType, id and meta are always kept.
+    """
+    if elements is None:
+        return resource
+
+    subset = {key: resource[key] for key in ("resourceType", "id") if key in resource}
+    meta = dict(resource.get("meta", {}))
+    meta["tag"] = [*meta.get("tag", []), SUBSETTED_TAG]
+    subset["meta"] = meta
+    for element, value in resource.items():
+        if element in elements and element not in subset:
+            subset[element] = value
+    return subset
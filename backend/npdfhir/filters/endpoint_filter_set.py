@@ -1,23 +1,26 @@
 from django_filters import rest_framework as filters
 
 from ..models import EndpointInstance
+from .in_filters import CharAnyFilter, id_filter
 
 
 class EndpointFilterSet(filters.FilterSet):
+    _id = id_filter()
+
     name = filters.CharFilter(
-        field_name="name", lookup_expr="icontains", help_text="Filter by name"
+        field_name="name", lookup_expr="trigram_icontains", help_text="Filter by name"
     )
 
-    connection_type = filters.CharFilter(
+    connection_type = CharAnyFilter(
         field_name="endpoint_connection_type__id",
         lookup_expr="icontains",
-        help_text="Filter by connection type",
+        help_text="Filter by connection type; separate types with commas to match any of them",
     )
 
-    payload_type = filters.CharFilter(
+    payload_type = CharAnyFilter(
         field_name="endpointinstancetopayload__payload_type__id",
         lookup_expr="icontains",
-        help_text="Filter by payload type",
+        help_text="Filter by payload type; separate types with commas to match any of them",
     )
 
     status = filters.CharFilter(method="filter_status", help_text="Filter by status")
@@ -28,7 +31,7 @@ class EndpointFilterSet(filters.FilterSet):
 
     class Meta:
         model = EndpointInstance
-        fields = ["name", "connection_type", "payload_type", "status", "organization"]
+        fields = ["_id", "name", "connection_type", "payload_type", "status", "organization"]
 
     def filter_status(self, queryset, name, value):
         # needs to be implemented
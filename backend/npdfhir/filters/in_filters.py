@@ -0,0 +1,49 @@
+"""
+Filters for FHIR search parameters that accept comma-separated values, which
+match resources with any of the values (FHIR's OR). Each value is validated
+on its own, and the values are compiled into one IN predicate, so a search for
+a list of values is one query rather than one request per value.
+"""
+
+import operator
+from functools import reduce
+
+from django.db.models import Q
+from django_filters import rest_framework as filters
+
+
+class CharInFilter(filters.BaseInFilter, filters.CharFilter):
+    pass
+
+
+class ChoiceInFilter(filters.BaseInFilter, filters.ChoiceFilter):
+    pass
+
+
+class UUIDInFilter(filters.BaseInFilter, filters.UUIDFilter):
+    pass
+
+
+class CharAnyFilter(filters.BaseCSVFilter, filters.CharFilter):
+    """
+    Matches any of the comma-separated values with a lookup that has no IN
+    form (iexact, icontains), as one OR condition.
+    """
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        qs = qs.filter(any_of(f"{self.field_name}__{self.lookup_expr}", value))
+        return qs.distinct() if self.distinct else qs
+
+
+def any_of(lookup, values) -> Q:
+    return reduce(operator.or_, (Q(**{lookup: value}) for value in values))
+
+
+def id_filter():
+    return UUIDInFilter(
+        field_name="pk",
+        lookup_expr="in",
+        help_text="Filter by resource id; separate ids with commas to match any of them",
+    )
@@ -1,21 +1,26 @@
-import re
-from django.contrib.postgres.search import SearchVector
 from django_filters import rest_framework as filters
-from django.contrib.gis.geos import Point
-from django.contrib.gis.measure import D
 from django.db.models import F
 
 from ..mappings import addressUseMapping
 from ..models import Location
+from .in_filters import CharInFilter, ChoiceInFilter, id_filter
+from .near import filter_near
+from .search import CITY, POSTAL_CODE, STATE, search_query
+from .taxonomy import TaxonomyModifiersMixin
 
 
-class LocationFilterSet(filters.FilterSet):
+class LocationFilterSet(TaxonomyModifiersMixin, filters.FilterSet):
+    _id = id_filter()
+
     name = filters.CharFilter(
         field_name="name", lookup_expr="contains", help_text="Filter by location name"
     )
 
-    organization_type = filters.CharFilter(
-        method="filter_organization_type", help_text="Filter by organization type"
+    organization_type = CharInFilter(
+        field_name="organization__clinicalorganization__organizationtotaxonomy__nucc_code__code",
+        lookup_expr="in",
+        distinct=True,
+        help_text="Filter by organization type; separate types with commas to match any of them",
     )
 
     address = filters.CharFilter(method="filter_address", help_text="Filter by any part of address")
@@ -30,20 +35,29 @@ class LocationFilterSet(filters.FilterSet):
         method="filter_address_postalcode", help_text="Filter by postal code/zip code"
     )
 
-    address_use = filters.ChoiceFilter(
+    address_use = ChoiceInFilter(
         method="filter_address_use",
         choices=addressUseMapping.to_choices(),
-        help_text="Filter by address use type",
+        help_text="Filter by address use type; separate types with commas to match any of them",
     )
 
     near = filters.CharFilter(
         method="filter_distance",
-        help_text="Filter by distance from a point expressed as [latitude]|[longitude]|[distance]|[units]. If no units are provided, km is assumed.",
+        help_text="Filter by distance from a point expressed as [latitude]|[longitude]|[distance]|[units], or from the center of a ZIP code or city as [zip]|[distance]|[units] or [city], [state]|[distance]|[units]. If no units are provided, km is assumed.",
     )
 
+    taxonomy_params = {
+        "organization_type": {
+            "field_name": "organization__clinicalorganization__organizationtotaxonomy__nucc_code",
+            "lookup_expr": "in",
+            "distinct": True,
+        },
+    }
+
     class Meta:
         model = Location
         fields = [
+            "_id",
             "name",
             "address",
             "address_city",
@@ -53,63 +67,23 @@ class LocationFilterSet(filters.FilterSet):
             "near",
         ]
 
-    def filter_organization_type(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "organization__clinicalorganization__organizationtotaxonomy__nucc_code__code"
-            )
-        ).filter(search=value)
-
     def filter_address(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "address__address_us__delivery_line_1",
-                "address__address_us__delivery_line_2",
-                "address__address_us__city_name",
-                "address__address_us__state_code__abbreviation",
-                "address__address_us__zipcode",
-            )
-        ).filter(search=value)
+        return queryset.filter(address__address_us__search_vector=search_query(value))
 
     def filter_address_city(self, queryset, name, value):
-        return queryset.annotate(search=SearchVector("address__address_us__city_name")).filter(
-            search=value
-        )
+        return queryset.filter(address__address_us__search_vector=search_query(value, CITY))
 
     def filter_address_state(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("address__address_us__state_code__abbreviation")
-        ).filter(search=value)
+        return queryset.filter(address__address_us__search_vector=search_query(value, STATE))
 
     def filter_address_postalcode(self, queryset, name, value):
-        return queryset.annotate(search=SearchVector("address__address_us__zipcode")).filter(
-            search=value
-        )
+        return queryset.filter(address__address_us__search_vector=search_query(value, POSTAL_CODE))
 
     def filter_address_use(self, queryset, name, value):
         return queryset.filter(
             organization__organizationtoaddress__address=F("address"),
-            organization__organizationtoaddress__address_use__value=value,
+            organization__organizationtoaddress__address_use__value__in=value,
         ).distinct()
 
     def filter_distance(self, queryset, name, value):
-        pattern = r"(-?\d+\.?\d*)\|(-?\d+\.?\d*)\|(\d+\.?\d*)\|?(km|mi|ft)?"
-        match = re.fullmatch(pattern, value)
-        if match:
-            lat, lon, distance, units = match.groups()
-            lon = float(lon)
-            lat = float(lat)
-            distance = float(distance)
-            user_location = Point(lon, lat, srid=4326)
-            match units:
-                case "mi":
-                    distance_function = D(mi=distance)
-                case "ft":
-                    distance_function = D(ft=distance)
-                case _:
-                    distance_function = D(km=distance)
-            return queryset.filter(
-                address__address_us__geolocation__distance_lte=(user_location, distance_function)
-            )
-        else:
-            return Location.objects.none()
+        return filter_near(queryset, "address__address_us__geography", value)
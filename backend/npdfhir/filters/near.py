@@ -0,0 +1,89 @@
+"""
+Proximity search against the GiST-indexed geography columns of addresses
+(address_us.geography, and its copy in the PractitionerRole search table),
+from a point or from the centroid of a ZIP code or city.
+Matches are found with ST_DWithin and annotated with their distance in meters
+as `near`, which `_sort=near` orders by. The distance is computed with the
+KNN operator `<->`, so a nearest-first sort of rows with one geography is read
+from the index rather than by computing the distance to every match and
+sorting. For rows with many addresses, the closest one is found per row with
+ORDER BY `<->` LIMIT 1 over its addresses, which the index also serves, and the
+matches are then sorted by it.
+"""
+
+import re
+
+from django.contrib.gis.db.models import PointField
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.db.models import Exists, FloatField, Func, Subquery, Value
+
+from ..places import get_place_index
+
+NEAR_PATTERN = re.compile(r"(-?\d+\.?\d*)\|(-?\d+\.?\d*)\|(\d+\.?\d*)\|?(km|mi|ft)?")
+# a ZIP code or "City, ST" in place of the coordinates
+PLACE_NEAR_PATTERN = re.compile(r"([^|]+)\|(\d+\.?\d*)\|?(km|mi|ft)?")
+
+# the annotation holding each match's distance from the near point, in meters
+NEAR = "near"
+
+
+class KNNDistance(Func):
+    """
+    The distance in meters between two geographies, with the `<->` operator
+    that a GiST index on the first can serve in ORDER BY.
+    """
+
+    arg_joiner = " <-> "
+    template = "(%(expressions)s)"
+    output_field = FloatField()
+
+
+def parse_near(value):
+    """
+    The point and distance of a near value, expressed as
+    [latitude]|[longitude]|[distance]|[units] or [place]|[distance]|[units]
+    with km as the default units, or None when the value is malformed or
+    names an unknown place. A place is a ZIP code or a city as "City, ST",
+    centered on its centroid (see npdfhir.places).
+    """
+    if match := NEAR_PATTERN.fullmatch(value):
+        lat, lon, distance, units = match.groups()
+        lat, lon = float(lat), float(lon)
+    elif match := PLACE_NEAR_PATTERN.fullmatch(value):
+        name, distance, units = match.groups()
+        place = get_place_index().resolve(name)
+        if place is None:
+            return None
+        lat, lon = place.latitude, place.longitude
+    else:
+        return None
+    return Point(lon, lat, srid=4326), D(**{units or "km": float(distance)})
+
+
+def filter_near(queryset, field_name, value, addresses=None):
+    """
+    Filter to the rows with a geography at field_name within the distance of a
+    near value, annotated with their distance from its point.
+
+    For rows with many addresses, addresses is a queryset of a row's addresses
+    (correlated to it with OuterRef) and field_name the path to the geography
+    from them. A row then matches when any of its addresses is in range, and
+    its distance is that of the closest one.
+    """
+    near = parse_near(value)
+    if near is None:
+        return queryset.none()
+    point, distance = near
+    knn_distance = KNNDistance(
+        field_name, Value(point, output_field=PointField(geography=True, srid=4326))
+    )
+    if addresses is None:
+        return queryset.filter(**{f"{field_name}__dwithin": (point, distance)}).annotate(
+            **{NEAR: knn_distance}
+        )
+    in_range = addresses.filter(**{f"{field_name}__dwithin": (point, distance)})
+    closest = in_range.annotate(distance=knn_distance).order_by("distance").values("distance")[:1]
+    return queryset.filter(Exists(in_range)).annotate(
+        **{NEAR: Subquery(closest, output_field=FloatField())}
+    )
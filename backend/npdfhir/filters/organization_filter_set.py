@@ -1,18 +1,23 @@
-from django.contrib.postgres.search import SearchVector
-from django.db.models import Q
+from django.db.models import OuterRef, Q
 from django_filters import rest_framework as filters
 
 from ..mappings import addressUseMapping
-from ..models import Organization
+from ..models import Organization, OrganizationToAddress
 from ..utils import parse_identifier_query
+from .in_filters import CharInFilter, ChoiceInFilter, id_filter
+from .near import filter_near
+from .search import CITY, POSTAL_CODE, STATE, search_query
+from .taxonomy import TaxonomyModifiersMixin
 
 
-class OrganizationFilterSet(filters.FilterSet):
+class OrganizationFilterSet(TaxonomyModifiersMixin, filters.FilterSet):
+    _id = id_filter()
+
     name = filters.CharFilter(method="filter_name", help_text="Filter by organization name")
 
-    identifier = filters.CharFilter(
+    identifier = CharInFilter(
         method="filter_identifier",
-        help_text="Filter by identifier (NPI, EIN, or other). Format: value or system|value",
+        help_text="Filter by identifier (NPI, EIN, or other). Format: value or system|value; separate identifiers with commas to match any of them",
     )
 
     organization_type = filters.CharFilter(
@@ -31,15 +36,29 @@ class OrganizationFilterSet(filters.FilterSet):
         method="filter_address_postalcode", help_text="Filter by postal code/zip code"
     )
 
-    address_use = filters.ChoiceFilter(
+    address_use = ChoiceInFilter(
         method="filter_address_use",
         choices=addressUseMapping.to_choices(),
-        help_text="Filter by address use type",
+        help_text="Filter by address use type; separate types with commas to match any of them",
+    )
+
+    near = filters.CharFilter(
+        method="filter_distance",
+        help_text="Filter by distance of any address from a point expressed as [latitude]|[longitude]|[distance]|[units], or from the center of a ZIP code or city as [zip]|[distance]|[units] or [city], [state]|[distance]|[units]. If no units are provided, km is assumed.",
     )
 
+    taxonomy_params = {
+        "organization_type": {
+            "field_name": "clinicalorganization__organizationtotaxonomy__nucc_code",
+            "lookup_expr": "in",
+            "distinct": True,
+        },
+    }
+
     class Meta:
         model = Organization
         fields = [
+            "_id",
             "name",
             "identifier",
             "organization_type",
@@ -48,81 +67,79 @@ class OrganizationFilterSet(filters.FilterSet):
             "address_state",
             "address_postalcode",
             "address_use",
+            "near",
         ]
 
     def filter_name(self, queryset, name, value):
-        return (
-            queryset.annotate(search=SearchVector("organizationtoname__name"))
-            .filter(search=value)
-            .distinct()
-        )
+        return queryset.filter(organizationtoname__search_vector=search_query(value)).distinct()
 
     def filter_identifier(self, queryset, name, value):
         from uuid import UUID
 
-        system, identifier_id = parse_identifier_query(value)
-        queries = Q(pk__isnull=True)
-
-        if system:  # specific identifier search requested
-            if system.upper() == "NPI":
-                try:
-                    queries = Q(clinicalorganization__npi__npi=int(identifier_id))
-                except (ValueError, TypeError):
-                    pass  # TODO: implement validationerror to show users that NPI must be an int
-        else:  # general identifier search requested
+        npis = []
+        eins = []
+        other_ids = []
+        for identifier in value:
+            system, identifier_id = parse_identifier_query(identifier)
+            if system and system.upper() != "NPI":
+                continue
             try:
-                queries |= Q(clinicalorganization__npi__npi=int(identifier_id))
+                npis.append(int(identifier_id))
             except (ValueError, TypeError):
-                pass
+                pass  # TODO: implement validationerror to show users that NPI must be an int
+            if system:  # specific identifier search requested
+                continue
 
+            # general identifier search requested
             try:
                 UUID(identifier_id)
-                queries |= Q(ein__ein_id=identifier_id)
+                eins.append(identifier_id)
             except (ValueError, TypeError):
                 pass
+            other_ids.append(identifier_id)
 
-            queries |= Q(clinicalorganization__organizationtootherid__other_id=identifier_id)
-
-        return queryset.filter(queries).distinct()
+        return queryset.filter(
+            Q(clinicalorganization__npi__npi__in=npis)
+            | Q(ein__ein_id__in=eins)
+            | Q(clinicalorganization__organizationtootherid__other_id__in=other_ids)
+        ).distinct()
 
     def filter_organization_type(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "clinicalorganization__organizationtotaxonomy__nucc_code__display_name"
-            )
-        ).filter(search=value)
+        query = search_query(value)
+        return queryset.filter(
+            clinicalorganization__organizationtotaxonomy__nucc_code__search_vector=query
+        )
 
     def filter_address(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "organizationtoaddress__address__address_us__delivery_line_1",
-                "organizationtoaddress__address__address_us__delivery_line_2",
-                "organizationtoaddress__address__address_us__city_name",
-                "organizationtoaddress__address__address_us__state_code__abbreviation",
-                "organizationtoaddress__address__address_us__zipcode",
-            )
-        ).filter(search=value)
+        return queryset.filter(
+            organizationtoaddress__address__address_us__search_vector=search_query(value)
+        )
 
     def filter_address_city(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("organizationtoaddress__address__address_us__city_name")
-        ).filter(search=value)
+        return queryset.filter(
+            organizationtoaddress__address__address_us__search_vector=search_query(value, CITY)
+        )
 
     def filter_address_state(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "organizationtoaddress__address__address_us__state_code__abbreviation"
-            )
-        ).filter(search=value)
+        return queryset.filter(
+            organizationtoaddress__address__address_us__search_vector=search_query(value, STATE)
+        )
 
     def filter_address_postalcode(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("organizationtoaddress__address__address_us__zipcode")
-        ).filter(search=value)
+        return queryset.filter(
+            organizationtoaddress__address__address_us__search_vector=search_query(
+                value, POSTAL_CODE
+            )
+        )
 
     def filter_address_use(self, queryset, name, value):
-        if value in addressUseMapping.keys():
-            value = addressUseMapping.toNPD(value)
-        else:
-            value = -1
-        return queryset.filter(organizationtoaddress__address_use_id=value)
+        uses = [addressUseMapping.toNPD(use) for use in value]
+        return queryset.filter(organizationtoaddress__address_use_id__in=uses)
+
+    def filter_distance(self, queryset, name, value):
+        return filter_near(
+            queryset,
+            "address__address_us__geography",
+            value,
+            addresses=OrganizationToAddress.objects.filter(organization=OuterRef("pk")),
+        )
@@ -1,24 +1,31 @@
-from django.contrib.postgres.search import SearchVector
-from django.db.models import Q
+from django.db.models import OuterRef, Q
 from django_filters import rest_framework as filters
 
 from ..mappings import addressUseMapping, genderMapping
-from ..models import Provider
+from ..models import IndividualToAddress, Provider
 from ..utils import parse_identifier_query
+from .in_filters import CharInFilter, ChoiceInFilter, id_filter
+from .near import filter_near
+from .search import CITY, POSTAL_CODE, STATE, search_query
+from .taxonomy import TaxonomyModifiersMixin
 
 
-class PractitionerFilterSet(filters.FilterSet):
-    identifier = filters.CharFilter(
+class PractitionerFilterSet(TaxonomyModifiersMixin, filters.FilterSet):
+    _id = id_filter()
+
+    identifier = CharInFilter(
         method="filter_identifier",
-        help_text="Filter by identifier (NPI or other). Format: value or system|value",
+        help_text="Filter by identifier (NPI or other). Format: value or system|value; separate identifiers with commas to match any of them",
     )
 
     name = filters.CharFilter(
         method="filter_name", help_text="Filter by practitioner name (first, last, or full name)"
     )
 
-    gender = filters.ChoiceFilter(
-        method="filter_gender", choices=genderMapping.to_choices(), help_text="Filter by gender"
+    gender = ChoiceInFilter(
+        method="filter_gender",
+        choices=genderMapping.to_choices(),
+        help_text="Filter by gender; separate genders with commas to match any of them",
     )
 
     practitioner_type = filters.CharFilter(
@@ -37,15 +44,29 @@ class PractitionerFilterSet(filters.FilterSet):
         method="filter_address_postalcode", help_text="Filter by postal code/zip code"
     )
 
-    address_use = filters.ChoiceFilter(
+    address_use = ChoiceInFilter(
         method="filter_address_use",
         choices=addressUseMapping.to_choices(),
-        help_text="Filter by address use type",
+        help_text="Filter by address use type; separate types with commas to match any of them",
+    )
+
+    near = filters.CharFilter(
+        method="filter_distance",
+        help_text="Filter by distance of any address from a point expressed as [latitude]|[longitude]|[distance]|[units], or from the center of a ZIP code or city as [zip]|[distance]|[units] or [city], [state]|[distance]|[units]. If no units are provided, km is assumed.",
     )
 
+    taxonomy_params = {
+        "practitioner_type": {
+            "field_name": "providertotaxonomy__nucc_code",
+            "lookup_expr": "in",
+            "distinct": True,
+        },
+    }
+
     class Meta:
         model = Provider
         fields = [
+            "_id",
             "identifier",
             "name",
             "gender",
@@ -55,79 +76,71 @@ class PractitionerFilterSet(filters.FilterSet):
             "address_state",
             "address_postalcode",
             "address_use",
+            "near",
         ]
 
     def filter_gender(self, queryset, name, value):
-        if value in genderMapping.keys():
-            value = genderMapping.toNPD(value)
-
-        return queryset.filter(individual__gender=value)
+        genders = [genderMapping.toNPD(gender) for gender in value]
+        return queryset.filter(individual__gender__in=genders)
 
     def filter_identifier(self, queryset, name, value):
-        system, identifier_id = parse_identifier_query(value)
-        queries = Q(pk__isnull=True)
-
-        if system:  # specific identifier search requested
-            if system.upper() == "NPI":
-                try:
-                    queries = Q(npi__npi=int(identifier_id))
-                except (ValueError, TypeError):
-                    pass
-        else:  # general identifier search requested
+        npis = []
+        other_ids = []
+        for identifier in value:
+            system, identifier_id = parse_identifier_query(identifier)
+            if system and system.upper() != "NPI":
+                continue
             try:
-                queries |= Q(npi__npi=int(identifier_id))
+                npis.append(int(identifier_id))
             except (ValueError, TypeError):
                 pass
+            if not system:  # general identifier search requested
+                other_ids.append(identifier_id)
 
-            queries |= Q(providertootherid__other_id=identifier_id)
-
-        return queryset.filter(queries).distinct()
+        return queryset.filter(
+            Q(npi__npi__in=npis) | Q(providertootherid__other_id__in=other_ids)
+        ).distinct()
 
     def filter_name(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "individual__individualtoname__first_name",
-                "individual__individualtoname__last_name",
-                "individual__individualtoname__middle_name",
-            )
-        ).filter(search=value)
+        return queryset.filter(individual__individualtoname__search_vector=search_query(value))
 
     def filter_practitioner_type(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("providertotaxonomy__nucc_code__display_name")
-        ).filter(search=value)
+        return queryset.filter(providertotaxonomy__nucc_code__search_vector=search_query(value))
 
     def filter_address(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "individual__individualtoaddress__address__address_us__delivery_line_1",
-                "individual__individualtoaddress__address__address_us__delivery_line_2",
-                "individual__individualtoaddress__address__address_us__city_name",
-                "individual__individualtoaddress__address__address_us__state_code__abbreviation",
-                "individual__individualtoaddress__address__address_us__zipcode",
-            )
-        ).filter(search=value)
+        return queryset.filter(
+            individual__individualtoaddress__address__address_us__search_vector=search_query(value)
+        )
 
     def filter_address_city(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("individual__individualtoaddress__address__address_us__city_name")
-        ).filter(search=value)
+        return queryset.filter(
+            individual__individualtoaddress__address__address_us__search_vector=search_query(
+                value, CITY
+            )
+        )
 
     def filter_address_state(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "individual__individualtoaddress__address__address_us__state_code__abbreviation"
+        return queryset.filter(
+            individual__individualtoaddress__address__address_us__search_vector=search_query(
+                value, STATE
             )
-        ).filter(search=value)
+        )
 
     def filter_address_postalcode(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("individual__individualtoaddress__address__address_us__zipcode")
-        ).filter(search=value)
+        return queryset.filter(
+            individual__individualtoaddress__address__address_us__search_vector=search_query(
+                value, POSTAL_CODE
+            )
+        )
 
     def filter_address_use(self, queryset, name, value):
-        if value in addressUseMapping.keys():
-            value = addressUseMapping.toNPD(value)
-        else:
-            value = -1
-        return queryset.filter(individual__individualtoaddress__address_use_id=value)
+        uses = [addressUseMapping.toNPD(use) for use in value]
+        return queryset.filter(individual__individualtoaddress__address_use_id__in=uses)
+
+    def filter_distance(self, queryset, name, value):
+        return filter_near(
+            queryset,
+            "address__address_us__geography",
+            value,
+            addresses=IndividualToAddress.objects.filter(individual=OuterRef("individual")),
+        )
@@ -1,29 +1,49 @@
-import re
-from django.contrib.gis.geos import Point
-from django.contrib.gis.measure import D
-from django.contrib.postgres.search import SearchVector
-from django.db.models import Q
+from django.db.models import Exists, OuterRef, Q
 from django_filters import rest_framework as filters
 
 from ..mappings import genderMapping
-from ..models import ProviderToLocation
+from ..models import IndividualToName, OrganizationToName, ProviderToLocation, ProviderToOtherId
 from ..utils import parse_identifier_query
+from .in_filters import (
+    CharAnyFilter,
+    CharInFilter,
+    ChoiceInFilter,
+    UUIDInFilter,
+    any_of,
+    id_filter,
+)
+from .near import filter_near
+from .search import CITY, POSTAL_CODE, STATE, search_query
+from .taxonomy import TaxonomyModifiersMixin
+
+
+class PractitionerRoleFilterSet(TaxonomyModifiersMixin, filters.FilterSet):
+    """
+    Every filter reads the flattened practitioner_role_search table (the
+    PractitionerRoleSearch model, one row per ProviderToLocation) through the
+    one-to-one `search` relation, so filters never fan out rows and need no
+    distinct(). The name filters match each of the practitioner's or
+    organization's names on its own, in an EXISTS subquery against the name
+    table.
+    """
+
+    _id = id_filter()
 
-
-class PractitionerRoleFilterSet(filters.FilterSet):
     practitioner_name = filters.CharFilter(
         method="filter_practitioner_name",
         help_text="Filter by practitioner name (first, last, or full name)",
     )
 
-    practitioner_gender = filters.ChoiceFilter(
+    practitioner_gender = ChoiceInFilter(
         method="filter_practitioner_gender",
         choices=genderMapping.to_choices(),
-        help_text="Filter by practitioner gender",
+        help_text="Filter by practitioner gender; separate genders with commas to match any of them",
     )
 
-    practitioner_type = filters.CharFilter(
-        method="filter_practitioner_type", help_text="Filter by practitioner type/taxonomy"
+    practitioner_type = CharInFilter(
+        field_name="search__practitioner_types",
+        lookup_expr="overlap",
+        help_text="Filter by practitioner type/taxonomy; separate types with commas to match any of them",
     )
 
     organization_name = filters.CharFilter(
@@ -32,44 +52,54 @@ class PractitionerRoleFilterSet(filters.FilterSet):
 
     location_near = filters.CharFilter(
         method="filter_distance",
-        help_text="Filter location by distance from a point expressed as [latitude]|[longitude]|[distance]|[units]. If no units are provided, km is assumed.",
+        help_text="Filter location by distance from a point expressed as [latitude]|[longitude]|[distance]|[units], or from the center of a ZIP code or city as [zip]|[distance]|[units] or [city], [state]|[distance]|[units]. If no units are provided, km is assumed.",
     )
 
-    organization_type = filters.CharFilter(
-        method="filter_organization_type", help_text="Filter by organization type"
+    organization_type = CharInFilter(
+        field_name="search__organization_types",
+        lookup_expr="overlap",
+        help_text="Filter by organization type; separate types with commas to match any of them",
     )
 
-    active = filters.BooleanFilter(field_name="active", help_text="Filter by active status")
+    active = filters.BooleanFilter(field_name="search__active", help_text="Filter by active status")
 
-    practitioner_identifier = filters.CharFilter(
-        method="filter_practitioner_identifier", help_text="Filter by practitioner identifier"
+    practitioner_identifier = CharInFilter(
+        method="filter_practitioner_identifier",
+        help_text="Filter by practitioner identifier; separate identifiers with commas to match any of them",
     )
 
-    role = filters.CharFilter(
-        field_name="provider_role_code",
+    role = CharAnyFilter(
+        field_name="search__provider_role_code",
         lookup_expr="iexact",
-        help_text="Filter by provider role code",
+        help_text="Filter by provider role code; separate codes with commas to match any of them",
     )
 
-    specialty = filters.CharFilter(
-        method="filter_specialty", help_text="Filter by Nucc/Snomed specialty code"
+    specialty = CharAnyFilter(
+        field_name="search__specialty_id",
+        lookup_expr="iexact",
+        help_text="Filter by Nucc/Snomed specialty code; separate codes with commas to match any of them",
     )
 
-    endpoint_connection_type = filters.CharFilter(
-        method="filter_connection_type", help_text="Filter providers by endpoint connection type"
+    endpoint_connection_type = CharInFilter(
+        method="filter_connection_type",
+        help_text="Filter providers by endpoint connection type; separate types with commas to match any of them",
     )
 
-    endpoint_payload_type = filters.CharFilter(
-        method="filter_payload_type", help_text="Filter providers by endpoint payload type"
+    endpoint_payload_type = CharInFilter(
+        field_name="search__endpoint_payload_types",
+        lookup_expr="overlap",
+        help_text="Filter providers by endpoint payload type; separate types with commas to match any of them",
     )
 
     endpoint_status = filters.CharFilter(
         method="filter_endpoint_status", help_text="Filter providers by endpoint status"
     )
 
-    endpoint_organization_id = filters.UUIDFilter(
-        method="filter_endpoint_organization_id",
-        help_text="Filter by the UUID of the organization associated with endpoints",
+    # The parent of the organization that owns the location the endpoint is attached to
+    endpoint_organization_id = UUIDInFilter(
+        field_name="search__endpoint_organization_id",
+        lookup_expr="in",
+        help_text="Filter by the UUID of the organization associated with endpoints; separate UUIDs with commas to match any of them",
     )
 
     endpoint_organization_name = filters.CharFilter(
@@ -93,9 +123,15 @@ class PractitionerRoleFilterSet(filters.FilterSet):
         method="filter_address_postalcode", help_text="Filter by the location postal code"
     )
 
+    taxonomy_params = {
+        "practitioner_type": {"field_name": "search__practitioner_types", "lookup_expr": "overlap"},
+        "organization_type": {"field_name": "search__organization_types", "lookup_expr": "overlap"},
+    }
+
     class Meta:
         model = ProviderToLocation
         fields = [
+            "_id",
             "practitioner_name",
             "practitioner_gender",
             "practitioner_type",
@@ -116,133 +152,73 @@ class PractitionerRoleFilterSet(filters.FilterSet):
             "location_zip_code",
         ]
 
+    def filter_queryset(self, queryset):
+        # roles are searchable once the search table has been refreshed
+        return super().filter_queryset(queryset.filter(search__isnull=False))
+
     def filter_practitioner_name(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "provider_to_organization__individual__individual__individualtoname__first_name",
-                "provider_to_organization__individual__individual__individualtoname__last_name",
-                "provider_to_organization__individual__individual__individualtoname__middle_name",
-            )
-        ).filter(search=value)
+        names = IndividualToName.objects.filter(
+            individual_id=OuterRef("search__practitioner_id"), search_vector=search_query(value)
+        )
+        return queryset.filter(Exists(names))
 
     def filter_practitioner_gender(self, queryset, name, value):
-        if value in genderMapping.keys():
-            gender = genderMapping.toNPD(value)
-            return queryset.filter(provider_to_organization__individual__individual__gender=gender)
-        return queryset
-
-    def filter_practitioner_type(self, queryset, name, value):
-        return queryset.filter(
-            provider_to_organization__individual__providertotaxonomy__nucc_code__code=value
-        ).distinct()
+        genders = [genderMapping.toNPD(gender) for gender in value]
+        return queryset.filter(search__practitioner_gender__in=genders)
 
     def filter_organization_name(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("provider_to_organization__organization__organizationtoname__name")
-        ).filter(search=value)
+        names = OrganizationToName.objects.filter(
+            organization_id=OuterRef("search__organization_id"), search_vector=search_query(value)
+        )
+        return queryset.filter(Exists(names))
 
     def filter_distance(self, queryset, name, value):
-        pattern = r"(-?\d+\.?\d*)\|(-?\d+\.?\d*)\|(\d+\.?\d*)\|?(km|mi|ft)?"
-        match = re.fullmatch(pattern, value)
-        if match:
-            lat, lon, distance, units = match.groups()
-            lon = float(lon)
-            lat = float(lat)
-            distance = float(distance)
-            user_location = Point(lon, lat, srid=4326)
-            match units:
-                case "mi":
-                    distance_function = D(mi=distance)
-                case "ft":
-                    distance_function = D(ft=distance)
-                case _:
-                    distance_function = D(km=distance)
-            return queryset.filter(
-                location__address__address_us__geolocation__distance_lte=(
-                    user_location,
-                    distance_function,
-                )
-            )
-        else:
-            return ProviderToLocation.objects.none()
-
-    def filter_organization_type(self, queryset, name, value):
-        return queryset.filter(
-            Q(
-                provider_to_organization__organization__clinicalorganization__organizationtotaxonomy__nucc_code__code=value
-            )
-        ).distinct()
+        return filter_near(queryset, "search__geography", value)
 
     def filter_practitioner_identifier(self, queryset, name, value):
-        system, identifier_id = parse_identifier_query(value)
-        queries = Q(pk__isnull=True)
-
-        if system:  # specific identifier search requested
-            if system.upper() == "NPI":
-                try:
-                    queries = Q(provider_to_organization__individual__npi__npi=int(identifier_id))
-                except (ValueError, TypeError):
-                    pass
-        else:  # general identifier search requested
+        npis = []
+        other_ids = []
+        for identifier in value:
+            system, identifier_id = parse_identifier_query(identifier)
+            if system and system.upper() != "NPI":
+                continue
             try:
-                queries |= Q(provider_to_organization__individual__npi__npi=int(identifier_id))
+                npis.append(int(identifier_id))
             except (ValueError, TypeError):
                 pass
-
-            queries |= Q(
-                provider_to_organization__individual__providertootherid__other_id__icontains=identifier_id
+            if not system:  # general identifier search requested
+                other_ids.append(identifier_id)
+
+        queries = Q(search__practitioner_npi__in=npis)
+        if other_ids:
+            # by substring, against the trigram index on other_id
+            matching_other_ids = ProviderToOtherId.objects.filter(
+                any_of("other_id__trigram_icontains", other_ids),
+                npi=OuterRef("search__practitioner_npi"),
             )
+            queries |= Exists(matching_other_ids)
+        return queryset.filter(queries)
 
-        return queryset.filter(queries).distinct()
-
-    def filter_specialty(self, queryset, name, value):
-        return queryset.filter(Q(specialty_id__iexact=value)).distinct()
-
+    # the search table's connection types and statuses are lowercased
     def filter_connection_type(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("other_endpoint__endpoint_instance__endpoint_connection_type__id")
-        ).filter(search=value)
+        types = [connection_type.lower() for connection_type in value]
+        return queryset.filter(search__endpoint_connection_types__overlap=types)
 
     def filter_endpoint_status(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("location__locationtoendpointinstance__endpoint_instance__status")
-        ).filter(search=value)
-
-    def filter_payload_type(self, queryset, name, value):
-        return queryset.filter(
-            location__locationtoendpointinstance__endpoint_instance__endpointinstancetopayload__payload_type__id=value
-        ).distinct()
-
-    def filter_endpoint_organization_id(self, queryset, name, value):
-        # The parent of the organization that owns the location the endpoint is attached to
-        return queryset.filter(location__organization__id=value)
+        return queryset.filter(search__endpoint_statuses__contains=[value.lower()])
 
     def filter_endpoint_organization_name(self, queryset, name, value):
         # The parent of the organization that owns the location the endpoint is attached to
-        return queryset.filter(location__organization__organizationtoname__name=value)
+        return queryset.filter(search__endpoint_organization_names__contains=[value])
 
     def filter_address(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector(
-                "location__address__address_us__delivery_line_1",
-                "location__address__address_us__delivery_line_2",
-                "location__address__address_us__city_name",
-                "location__address__address_us__state_code__abbreviation",
-                "location__address__address_us__zipcode",
-            )
-        ).filter(search=value)
+        return queryset.filter(search__address_vector=search_query(value))
 
     def filter_address_city(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("location__address__address_us__city_name")
-        ).filter(search=value)
+        return queryset.filter(search__address_vector=search_query(value, CITY))
 
     def filter_address_state(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("location__address__address_us__state_code__abbreviation")
-        ).filter(search=value)
+        return queryset.filter(search__address_vector=search_query(value, STATE))
 
     def filter_address_postalcode(self, queryset, name, value):
-        return queryset.annotate(
-            search=SearchVector("location__address__address_us__zipcode")
-        ).filter(search=value)
+        return queryset.filter(search__address_vector=search_query(value, POSTAL_CODE))
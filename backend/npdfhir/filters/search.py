@@ -0,0 +1,35 @@
+"""
+Full text search against the stored, GIN-indexed search_vector columns of
+names, addresses and taxonomies. Values are unaccented and parsed with the
+simple configuration, as the columns are (see the search_query() SQL
+function), so the match never depends on the server's default text search
+configuration.
+"""
+
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import Value
+
+# weights of the parts of an address search vector
+CITY = "A"
+STATE = "B"
+POSTAL_CODE = "C"
+
+
+class StoredSearchQuery(SearchQuery):
+    """
+    A SearchQuery built by the search_query() SQL function, in place of
+    plainto_tsquery() with the server's default configuration.
+    """
+
+    def __init__(self, value, weights=""):
+        super().__init__(value)
+        self.function = "search_query"
+        self.set_source_expressions([*self.get_source_expressions(), Value(weights)])
+
+
+def search_query(value, weights=""):
+    """
+    The tsquery for a search value, matching only lexemes of the given
+    weights when any are given.
+    """
+    return StoredSearchQuery(value, weights)
@@ -0,0 +1,56 @@
+"""
+The :below and :above modifiers of the NUCC taxonomy search parameters. A
+modified value is expanded to its set of codes in the taxonomy tree (see
+npdfhir.taxonomy) and the codes are matched as one predicate, like a list of
+comma-separated codes.
+"""
+
+from ..taxonomy import get_taxonomy_tree
+from .in_filters import CharInFilter
+
+MODIFIERS = {
+    "below": (
+        "Filter by NUCC taxonomy code, grouping or classification, matching it and every "
+        "code under it; separate values with commas to match any of them (names that "
+        "contain commas are matched whole)"
+    ),
+    "above": (
+        "Filter by NUCC taxonomy code, matching it and the classification it belongs to; "
+        "separate codes with commas to match any of them"
+    ),
+}
+
+
+class TaxonomyFilter(CharInFilter):
+    def __init__(self, *args, modifier, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.modifier = modifier
+
+    def filter(self, qs, value):
+        if value:
+            tree = get_taxonomy_tree()
+            if self.modifier == "below":
+                value = tree.join_names(value)
+            expand = getattr(tree, self.modifier)
+            value = sorted(set().union(*(expand(item) for item in value)))
+        return super().filter(qs, value)
+
+
+class TaxonomyModifiersMixin:
+    """
+    Adds `<param>:below` and `<param>:above` filters for each of the FilterSet's
+    taxonomy_params, which map a search parameter to the TaxonomyFilter
+    arguments (field_name, lookup_expr, distinct) that match its codes.
+    """
+
+    taxonomy_params = {}
+
+    @classmethod
+    def get_filters(cls):
+        filters = super().get_filters()
+        for param, kwargs in cls.taxonomy_params.items():
+            for modifier, help_text in MODIFIERS.items():
+                filters[f"{param}:{modifier}"] = TaxonomyFilter(
+                    modifier=modifier, help_text=help_text, **kwargs
+                )
+        return filters
@@ -0,0 +1,24 @@
+"""
+Custom lookups, registered when the app is ready.
+"""
+
+from django.db.models import CharField, TextField
+from django.db.models.lookups import IContains
+
+
+@CharField.register_lookup
+@TextField.register_lookup
+class TrigramIContains(IContains):
+    """
+    Case-insensitive substring match as the column's pg_trgm GIN index can
+    serve it: icontains compiles to UPPER(column) LIKE UPPER(pattern), which
+    no index on the column matches, while this compiles to column ILIKE
+    pattern.
+    """
+
+    lookup_name = "trigram_icontains"
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        rhs_sql, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs_sql} ILIKE {rhs_sql}", (*lhs_params, *rhs_params)
@@ -0,0 +1,58 @@
+import timeit
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from npdfhir.renderers import FHIRRenderer
+from npdfhir.serializers import BundleSerializer
+from npdfhir.views import FHIROrganizationViewSet, FHIRPractitionerViewSet
+
+VIEWSETS = {
+    viewset.resource_type: viewset for viewset in [FHIRPractitionerViewSet, FHIROrganizationViewSet]
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare FHIRRenderer against DRF's JSONRenderer on Practitioner and Organization "
+        "bundles built from the database"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resource-type", action="append", choices=list(VIEWSETS), help="(may be repeated)"
+        )
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        request = APIRequestFactory().get("/fhir/")
+
+        for resource_type in options["resource_type"] or VIEWSETS:
+            viewset = VIEWSETS[resource_type]
+            instances = viewset.queryset.order_by("pk")[: options["page_size"]]
+            resources = viewset.resource_serializer_class(
+                instances, many=True, context={"request": request}
+            ).data
+            bundle = BundleSerializer(resources, context={"request": request}).data
+
+            baseline = JSONRenderer().render(bundle)
+            rendered = FHIRRenderer().render(bundle)
+            if rendered != baseline:
+                raise CommandError(
+                    f"{resource_type}: FHIRRenderer output differs from JSONRenderer"
+                )
+
+            results = {}
+            for renderer in [JSONRenderer(), FHIRRenderer()]:
+                render = partial(renderer.render, bundle)
+                seconds = timeit.timeit(render, number=options["iterations"])
+                results[type(renderer).__name__] = seconds / options["iterations"] * 1000
+
+            self.stdout.write(
+                f"{resource_type} bundle ({len(resources)} entries, {len(rendered)} bytes): "
+                + ", ".join(f"{name} {ms:.2f} ms" for name, ms in results.items())
+                + f", {results['JSONRenderer'] / results['FHIRRenderer']:.1f}x faster"
+            )
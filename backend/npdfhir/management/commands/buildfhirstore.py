@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+
+from npdfhir.dataset import dataset_versions
+from npdfhir.store import (
+    StoreRequest,
+    finish_build,
+    is_store_current,
+    prune_documents,
+    render_document,
+    start_build,
+    sync_documents,
+)
+from npdfhir.views import RESOURCE_VIEWSETS
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the FHIR resources of each resource type whose data a load has changed "
+        "since the fhir_resource store was built, writing only documents whose content "
+        "changed, and remove those of deleted rows. Stored documents are not served "
+        "until they are rebuilt after a load. Run after each load, after refreshsearch "
+        "(`make refresh-data` runs both); seedsystem runs it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--resource-type",
+            action="append",
+            choices=list(RESOURCE_VIEWSETS),
+            help="Only rebuild this resource type (may be repeated)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Also rebuild resource types whose store is current",
+        )
+
+    def handle(self, *args, **options):
+        dataset_versions.clear()
+        for resource_type in options["resource_type"] or RESOURCE_VIEWSETS:
+            if not options["force"] and is_store_current(resource_type):
+                self.stdout.write(f"{resource_type}: up to date")
+                continue
+
+            viewset = RESOURCE_VIEWSETS[resource_type]
+            generation = start_build(resource_type)
+            rendered, written = self.build(resource_type, viewset, options["batch_size"])
+            pruned = prune_documents(resource_type, viewset.queryset.model)
+            self.stdout.write(
+                f"{resource_type}: rendered {rendered}, wrote {written}, removed {pruned}"
+            )
+            if not finish_build(resource_type, generation):
+                self.stderr.write(
+                    f"{resource_type}: the data changed during the build; run buildfhirstore again"
+                )
+
+    def build(self, resource_type, viewset, batch_size):
+        queryset = viewset.queryset.order_by("pk")
+        request = StoreRequest()
+        rendered = written = 0
+        last_pk = None
+
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            # annotations joining one-to-many tables can repeat rows
+            instances = list({instance.pk: instance for instance in batch[:batch_size]}.values())
+            if not instances:
+                return rendered, written
+
+            resources = viewset.resource_serializer_class(
+                instances, many=True, context={"request": request}
+            ).data
+            documents = {resource["id"]: render_document(resource) for resource in resources}
+
+            rendered += len(documents)
+            written += sync_documents(resource_type, documents)
+            last_pk = instances[-1].pk
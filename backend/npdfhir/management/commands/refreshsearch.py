@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from ...dataset import dataset_versions
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresh the materialized search tables the FHIR search filters, the name "
+        "typeahead and the place autocomplete read, and bump the dataset version, which "
+        "reloads the cached reference data. "
+        "Run after each load (`make refresh-data` runs it before buildfhirstore); seedsystem "
+        "runs it, and the ETLs refresh the tables themselves."
+    )
+
+    def handle(self, *args, **options):
+        with connection.cursor() as cursor:
+            # refreshes the views concurrently, so searches keep reading the old
+            # rows meanwhile, and bumps every resource type's dataset version, so
+            # search ETags, cached pages and the reference data change
+            cursor.execute("select refresh_search_views()")
+        dataset_versions.clear()
+        self.stdout.write("search tables refreshed")
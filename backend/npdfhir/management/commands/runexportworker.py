@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from npdfhir.bulk_export import claim_job, prune_expired_jobs, run_job
+from npdfhir.views import RESOURCE_VIEWSETS
+
+
+class Command(BaseCommand):
+    help = (
+        "Run FHIR Bulk Data $export jobs, writing gzipped NDJSON files to FHIR_EXPORT_DIR. "
+        "Polls for new jobs until stopped, unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run the waiting jobs, then exit")
+        parser.add_argument("--poll-interval", type=float, default=5.0)
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        while True:
+            pruned = prune_expired_jobs()
+            if pruned:
+                self.stdout.write(f"removed {pruned} expired exports")
+
+            job = claim_job()
+            if job is None:
+                if options["once"]:
+                    return
+                # the worker is long-lived, so drop connections Django would
+                # otherwise close at the end of a request
+                close_old_connections()
+                time.sleep(options["poll_interval"])
+                continue
+
+            status = run_job(job, RESOURCE_VIEWSETS, options["chunk_size"])
+            self.stdout.write(f"{job.id}: {status}")
@@ -1,6 +1,7 @@
 import json
 import random
 
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
 from django.core.serializers.json import DjangoJSONEncoder
 from django.db import IntegrityError
@@ -127,3 +128,7 @@ class Command(BaseCommand):
 
         self.generate_sample_organizations(25)
         self.generate_sample_practitioners(25)
+
+        # make the new records searchable and render them into the resource store
+        call_command("refreshsearch", stdout=self.stdout)
+        call_command("buildfhirstore", stdout=self.stdout)
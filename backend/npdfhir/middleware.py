@@ -1,8 +1,14 @@
+import hashlib
 from datetime import datetime, timezone
 
 import structlog
+from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
 from django.http import JsonResponse
+from django.utils.cache import patch_vary_headers
+
+from .compression import MIN_SIZE, choose_encoding
 
 logger = structlog.get_logger(__name__)
 
@@ -36,3 +42,65 @@ class HealthCheckMiddleware:
                 return JsonResponse(health_status, status=502)
 
         return self.get_response(request)
+
+
+class FHIRCompressionMiddleware:
+    """
+    Compress /fhir responses with the client's preferred encoding (see
+    npdfhir.compression). Compressed bodies of responses with an ETag are cached
+    under that ETag, so repeated responses are not compressed again.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            not request.path.startswith("/fhir")
+            or response.status_code != 200
+            or response.has_header("Content-Encoding")
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = encoding.compress_stream(response.streaming_content)
+            del response.headers["Content-Length"]
+        else:
+            if len(response.content) < MIN_SIZE:
+                return response
+            response.content = self.get_compressed_content(request, response, encoding)
+            response.headers["Content-Length"] = str(len(response.content))
+
+        # the encoded body is no longer byte-identical to the strong validator
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding.name
+        return response
+
+    def get_compressed_content(self, request, response, encoding) -> bytes:
+        etag = response.get("ETag")
+        if not etag or not settings.FHIR_COMPRESSION_CACHE_TIMEOUT:
+            return encoding.compress(response.content)
+
+        # the ETag versions the data; the rest of the key pins down the rendering
+        key_parts = [
+            encoding.name,
+            request.get_host(),
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+            response.get("Content-Type", ""),
+            etag,
+        ]
+        key = "fhir-compressed:" + hashlib.sha256("\n".join(key_parts).encode()).hexdigest()
+        content = cache.get(key)
+        if content is None:
+            content = encoding.compress(response.content)
+            cache.set(key, content, settings.FHIR_COMPRESSION_CACHE_TIMEOUT)
+        return content
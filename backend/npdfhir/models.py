@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.gis.db import models as geomodels
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.search import SearchVectorField
 
 
 class Address(models.Model):
@@ -126,6 +128,9 @@ class AddressUs(models.Model):
     suitelink_match = models.CharField(max_length=5, blank=True, null=True)
     enhanced_match = models.CharField(max_length=64, blank=True, null=True)
     geolocation = geomodels.PointField(srid=4326)
+    # set from geolocation by a trigger; what the near filters read
+    geography = geomodels.PointField(geography=True, srid=4326, blank=True, null=True)
+    search_vector = SearchVectorField(null=True)
 
     class Meta:
         managed = False
@@ -149,6 +154,19 @@ class CredentialType(models.Model):
         db_table = "credential_type"
 
 
+class DatasetVersion(models.Model):
+    resource_type = models.CharField(primary_key=True, max_length=32)
+    # bumped by each load that changes the resource type's data
+    generation = models.BigIntegerField()
+    updated_at = models.DateTimeField()
+    # the generation the resource store was built at (see npdfhir.store)
+    store_generation = models.BigIntegerField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = "dataset_version"
+
+
 class DegreeType(models.Model):
     value = models.CharField(unique=True, max_length=50, blank=True, null=True)
 
@@ -281,6 +299,24 @@ class EnvironmentType(models.Model):
         db_table = "environment_type"
 
 
+class ExportJob(models.Model):
+    id = models.UUIDField(primary_key=True)
+    status = models.CharField(max_length=16)
+    request_url = models.TextField()
+    base_url = models.TextField()
+    resource_types = models.JSONField()
+    progress = models.CharField(max_length=32, blank=True, null=True)
+    output = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, null=True)
+    transaction_time = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        managed = False
+        db_table = "export_job"
+
+
 class FhirAddressUse(models.Model):
     value = models.CharField(unique=True, max_length=20, blank=True, null=True)
 
@@ -321,6 +357,19 @@ class FhirPhoneUse(models.Model):
         db_table = "fhir_phone_use"
 
 
+class FhirResource(models.Model):
+    pk = models.CompositePrimaryKey("resource_type", "resource_id")
+    resource_type = models.CharField(max_length=32)
+    resource_id = models.UUIDField()
+    content = models.TextField()
+    content_hash = models.CharField(max_length=64)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = "fhir_resource"
+
+
 class FipsCounty(models.Model):
     id = models.CharField(primary_key=True, max_length=5)
     name = models.CharField(max_length=200)
@@ -363,6 +412,8 @@ class IndividualToAddress(models.Model):
     class Meta:
         managed = False
         db_table = "individual_to_address"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["address_use_id", "address_id"]
 
 
 class IndividualToEmail(models.Model):
@@ -374,6 +425,8 @@ class IndividualToEmail(models.Model):
     class Meta:
         managed = False
         db_table = "individual_to_email"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["email_use_id", "email_address"]
 
 
 class IndividualToLanguageSpoken(models.Model):
@@ -397,10 +450,13 @@ class IndividualToName(models.Model):
     end_date = models.DateField(blank=True, null=True)
     name_use = models.ForeignKey(FhirNameUse, models.DO_NOTHING)
     suffix = models.CharField(max_length=10, blank=True, null=True)
+    search_vector = SearchVectorField(null=True)
 
     class Meta:
         managed = False
         db_table = "individual_to_name"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["name_use_id", "last_name", "first_name"]
 
 
 class IndividualToPhone(models.Model):
@@ -413,6 +469,8 @@ class IndividualToPhone(models.Model):
     class Meta:
         managed = False
         db_table = "individual_to_phone"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["id"]
         unique_together = (("individual", "phone_number", "phone_use"),)
 
 
@@ -505,6 +563,7 @@ class Nucc(models.Model):
     notes = models.TextField(blank=True, null=True)
     certifying_board_name = models.TextField(blank=True, null=True)
     certifying_board_url = models.TextField(blank=True, null=True)
+    search_vector = SearchVectorField(null=True)
 
     class Meta:
         managed = False
@@ -575,6 +634,8 @@ class OrganizationToAddress(models.Model):
     class Meta:
         managed = False
         db_table = "organization_to_address"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["address_use_id", "address_id"]
 
 
 class OrganizationToName(models.Model):
@@ -582,10 +643,13 @@ class OrganizationToName(models.Model):
     organization = models.ForeignKey(Organization, models.DO_NOTHING)
     name = models.CharField(max_length=1000)
     is_primary = models.BooleanField(blank=True, null=True)
+    search_vector = SearchVectorField(null=True)
 
     class Meta:
         managed = False
         db_table = "organization_to_name"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["name"]
 
 
 class OrganizationToOtherId(models.Model):
@@ -599,6 +663,8 @@ class OrganizationToOtherId(models.Model):
     class Meta:
         managed = False
         db_table = "organization_to_other_id"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["other_id_type_id", "other_id"]
 
 
 class OrganizationToPhone(models.Model):
@@ -643,6 +709,42 @@ class PayloadType(models.Model):
         db_table = "payload_type"
 
 
+class PractitionerRoleSearch(models.Model):
+    provider_to_location = models.OneToOneField(
+        "ProviderToLocation",
+        models.DO_NOTHING,
+        primary_key=True,
+        db_column="id",
+        related_name="search",
+    )
+    location_id = models.UUIDField()
+    active = models.BooleanField(blank=True, null=True)
+    provider_role_code = models.CharField(max_length=10, blank=True, null=True)
+    specialty_id = models.IntegerField(blank=True, null=True)
+    practitioner_id = models.UUIDField(blank=True, null=True)
+    organization_id = models.UUIDField(blank=True, null=True)
+    endpoint_organization_id = models.UUIDField(blank=True, null=True)
+    location_name = models.CharField(max_length=200, blank=True, null=True)
+    practitioner_first_name = models.CharField(max_length=50, blank=True, null=True)
+    practitioner_last_name = models.CharField(max_length=200, blank=True, null=True)
+    practitioner_gender = models.CharField(max_length=1, blank=True, null=True)
+    practitioner_npi = models.BigIntegerField(blank=True, null=True)
+    practitioner_types = ArrayField(models.TextField())
+    organization_types = ArrayField(models.TextField())
+    address_vector = SearchVectorField(null=True)
+    geography = geomodels.PointField(geography=True, srid=4326, blank=True, null=True)
+    # the connection types and statuses are lowercased, to match in any case
+    endpoint_connection_types = ArrayField(models.TextField())
+    endpoint_payload_types = ArrayField(models.TextField())
+    endpoint_statuses = ArrayField(models.TextField())
+    endpoint_organization_names = ArrayField(models.TextField())
+
+    class Meta:
+        # a materialized view, refreshed with `python manage.py refreshsearch`
+        managed = False
+        db_table = "practitioner_role_search"
+
+
 class Provider(models.Model):
     npi = models.OneToOneField(Npi, models.DO_NOTHING, db_column="npi")
     individual = models.OneToOneField(Individual, models.DO_NOTHING, primary_key=True)
@@ -733,6 +835,8 @@ class ProviderToOtherId(models.Model):
     class Meta:
         managed = False
         db_table = "provider_to_other_id"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["other_id_type_id", "other_id"]
 
 
 class ProviderToTaxonomy(models.Model):
@@ -744,6 +848,8 @@ class ProviderToTaxonomy(models.Model):
     class Meta:
         managed = False
         db_table = "provider_to_taxonomy"
+        # the order resources list them in (see npdfhir.database_engine)
+        ordering = ["nucc_code_id", "id"]
         unique_together = (("npi", "nucc_code"),)
 
 
@@ -753,3 +859,36 @@ class RelationshipType(models.Model):
     class Meta:
         managed = False
         db_table = "relationship_type"
+
+
+class Typeahead(models.Model):
+    pk = models.CompositePrimaryKey("resource_type", "id", "key")
+    resource_type = models.TextField()
+    id = models.UUIDField()
+    # the name unaccented and lowercased, in the C collation
+    key = models.TextField()
+    display_name = models.TextField()
+    npi = models.BigIntegerField(blank=True, null=True)
+    city = models.CharField(max_length=64, blank=True, null=True)
+    state = models.CharField(max_length=2, blank=True, null=True)
+
+    class Meta:
+        # a materialized view, refreshed with `python manage.py refreshsearch`
+        managed = False
+        db_table = "typeahead"
+
+
+class PlaceCentroid(models.Model):
+    pk = models.CompositePrimaryKey("kind", "name")
+    # zip or city
+    kind = models.TextField()
+    # the ZIP code, or the city as "City, ST"
+    name = models.TextField()
+    county = models.CharField(max_length=200, blank=True, null=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6)
+
+    class Meta:
+        # a materialized view, refreshed with `python manage.py refreshsearch`
+        managed = False
+        db_table = "place_centroid"
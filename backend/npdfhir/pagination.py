@@ -1,7 +1,271 @@
+import base64
+import operator
+from collections import namedtuple
+from functools import reduce
+
+import orjson
+from django.core.paginator import InvalidPage
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .renderers import dumps
+
+Cursor = namedtuple("Cursor", ["values", "reverse"])
+
+
+def count_matches(queryset) -> int:
+    """
+    Count the resources matching a search. Only primary keys are selected and
+    the ordering is dropped, so annotations that feed the select list or the
+    sort (search vectors, sort keys) are left out of the count query.
+    """
+    return queryset.order_by().values("pk").distinct().count()
+
+
+def estimate_matches(queryset) -> int:
+    """
+    The planner's estimate of the resources matching a search, read from
+    EXPLAIN without running the query.
+    """
+    queryset = queryset.order_by().values("pk").distinct()
+    sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"explain (format json) {sql}", params)
+        (plan,) = cursor.fetchone()
+    if isinstance(plan, str):
+        plan = orjson.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
 
 
 class CustomPaginator(PageNumberPagination):
     page_size_query_param = "page_size"
     max_page_size = 1000
     page_size = 10
+
+    def paginate_queryset_lazily(self, queryset, request, view=None):
+        """
+        Like paginate_queryset, but returns the page's queryset without loading
+        its objects, for responses that stream the page.
+        """
+        self.request = request
+        paginator = self.django_paginator_class(queryset, self.get_page_size(request))
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        return self.page.object_list
+
+    def get_paginated_response(self, data):
+        return super().get_paginated_response(self.add_bundle_links(data))
+
+    def add_bundle_links(self, bundle):
+        """
+        Add the Bundle's self, next and previous links, which go before its
+        entries.
+        """
+        links = [{"relation": "self", "url": self.request.build_absolute_uri()}]
+        for relation, url in [
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+        ]:
+            if url is not None:
+                links.append({"relation": relation, "url": url})
+        bundle = dict(bundle)
+        entry = bundle.pop("entry")
+        return {**bundle, "link": links, "entry": entry}
+
+
+class CursorPaginator(CustomPaginator):
+    """
+    Keyset pagination. Each page seeks past the sort key of the previous page's
+    last row, with the primary key as a tie-breaker, rather than counting the
+    results and scanning past an OFFSET, so deep pages cost the same as the
+    first. The position is passed as an opaque `cursor` taken from the next
+    and previous links.
+
+    Requests with a `page` number are paginated by page number as before.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_query_description = "Position of the page, as given in the next and previous links."
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_numbers = self.page_query_param in request.query_params
+        if self.page_numbers:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        rows = list(self.seek(queryset)[: page_size + 1])
+        self.set_cursors([self.get_key(row) for row in rows], page_size)
+        rows = rows[:page_size]
+        if self.cursor.reverse:
+            rows.reverse()
+        return rows
+
+    def paginate_queryset_lazily(self, queryset, request, view=None):
+        self.request = request
+        self.page_numbers = self.page_query_param in request.query_params
+        if self.page_numbers:
+            return super().paginate_queryset_lazily(queryset, request, view)
+
+        # read just the sort keys of the page, then return the page in forward
+        # order from its first key
+        page_size = self.get_page_size(request)
+        seek = self.seek(queryset)
+        keys = self.set_cursors(list(seek.values_list(*self.key_names)[: page_size + 1]), page_size)
+        if not keys:
+            return seek.none()
+        forward = self.order(self.annotate(queryset), reverse=False)
+        page = forward.filter(self.after(keys[0], reverse=False, inclusive=True))
+        return page[: len(keys)]
+
+    def get_paginated_response(self, data):
+        if self.page_numbers:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": self.add_bundle_links(data),
+            }
+        )
+
+    def get_next_link(self):
+        if self.page_numbers:
+            return super().get_next_link()
+        return self.get_cursor_link(self.next_cursor)
+
+    def get_previous_link(self):
+        if self.page_numbers:
+            return super().get_previous_link()
+        return self.get_cursor_link(self.previous_cursor)
+
+    def get_cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
+
+    def seek(self, queryset):
+        """
+        Order the queryset by its sort keys and skip to the requested cursor.
+        """
+        ordering = list(queryset.query.order_by)
+        self.keys = [(field.lstrip("-"), field.startswith("-")) for field in ordering]
+        if "pk" not in [field for field, _ in self.keys]:
+            self.keys.append(("pk", False))
+        self.key_names = [f"keyset_{i}" for i in range(len(self.keys))]
+        # cursors are only valid for the ordering they were made for
+        self.ordering = [f"-{field}" if descending else field for field, descending in self.keys]
+        self.cursor = self.decode_cursor()
+
+        queryset = self.order(self.annotate(queryset), self.cursor.reverse)
+        if self.cursor.values is not None:
+            queryset = queryset.filter(self.after(self.cursor.values, self.cursor.reverse))
+        return queryset
+
+    def annotate(self, queryset):
+        return queryset.annotate(
+            **{name: F(field) for name, (field, _) in zip(self.key_names, self.keys)}
+        )
+
+    def order(self, queryset, reverse):
+        # NULLs sort after every value, as Postgres sorts them by default
+        ordering = []
+        for name, (_, descending) in zip(self.key_names, self.keys):
+            if descending != reverse:
+                ordering.append(F(name).desc(nulls_first=True))
+            else:
+                ordering.append(F(name).asc(nulls_last=True))
+        return queryset.order_by(*ordering)
+
+    def after(self, values, reverse, inclusive=False):
+        """
+        The condition for rows that sort after the given key (or, reversed,
+        before it).
+        """
+        terms = []
+        equal = Q()
+        for name, (_, descending), value in zip(self.key_names, self.keys, values):
+            descending = descending != reverse
+            if value is None:
+                later = Q(**{f"{name}__isnull": False}) if descending else None
+                same = Q(**{f"{name}__isnull": True})
+            elif descending:
+                later = Q(**{f"{name}__lt": value})
+                same = Q(**{name: value})
+            else:
+                later = Q(**{f"{name}__gt": value}) | Q(**{f"{name}__isnull": True})
+                same = Q(**{name: value})
+            if later is not None:
+                terms.append(equal & later)
+            equal &= same
+        if inclusive:
+            terms.append(equal)
+        if not terms:
+            return Q(pk__in=[])
+        return reduce(operator.or_, terms)
+
+    def get_key(self, row):
+        return tuple(getattr(row, name) for name in self.key_names)
+
+    def set_cursors(self, keys, page_size):
+        """
+        Set the next and previous cursors from the keys read for a page (one
+        more than the page size, to tell whether there are more). Returns the
+        page's keys in forward order.
+        """
+        more = len(keys) > page_size
+        keys = keys[:page_size]
+        if self.cursor.reverse:
+            keys.reverse()
+
+        self.next_cursor = self.previous_cursor = None
+        if keys:
+            # a reversed page was reached from the page after it, and a forward
+            # page with a cursor from the page before it
+            if more or self.cursor.reverse:
+                self.next_cursor = self.encode_cursor(keys[-1], reverse=False)
+            if (more and self.cursor.reverse) or (
+                not self.cursor.reverse and self.cursor.values is not None
+            ):
+                self.previous_cursor = self.encode_cursor(keys[0], reverse=True)
+        return keys
+
+    def encode_cursor(self, key, reverse):
+        payload = {"o": self.ordering, "v": list(key), "r": reverse}
+        return base64.urlsafe_b64encode(dumps(payload)).decode()
+
+    def decode_cursor(self):
+        encoded = self.request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return Cursor(None, False)
+        try:
+            payload = orjson.loads(base64.urlsafe_b64decode(encoded.encode()))
+            values, reverse = payload["v"], bool(payload["r"])
+            valid = payload["o"] == self.ordering and len(values) == len(self.keys)
+        except (KeyError, TypeError, ValueError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(values, reverse)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.cursor_query_description,
+                "schema": {"type": "string"},
+            }
+        ]
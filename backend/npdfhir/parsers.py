@@ -0,0 +1,9 @@
+from rest_framework.parsers import JSONParser
+
+
+class FHIRParser(JSONParser):
+    """
+    Parses FHIR JSON request bodies
+    """
+
+    media_type = "application/fhir+json"
@@ -0,0 +1,86 @@
+"""
+ZIP codes and cities as points: the centroid of the geocoded addresses in
+each (see npdfhir.models.PlaceCentroid), so a proximity search can be centered
+on a place a user typed rather than on coordinates, and so place names can be
+autocompleted.
+
+The centroids are read into a sorted list of normalized names in each worker,
+the first time they are needed and again after each load (which refreshes
+them, see npdfhir.dataset). Resolving a name is then a dict lookup and
+completing a prefix a binary search, without a query or an external geocoder.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import NamedTuple
+
+from .dataset import cache_by_version
+from .models import PlaceCentroid
+
+
+class Place(NamedTuple):
+    kind: str
+    name: str
+    county: str | None
+    latitude: float
+    longitude: float
+
+
+def normalize(name) -> str:
+    """
+    The key a place name is looked up by: unaccented, lowercased, and with
+    whitespace collapsed and a single space after a comma, so that
+    "springfield,il" finds "Springfield, IL".
+    """
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(char for char in name if not unicodedata.combining(char))
+    name = re.sub(r"\s*,\s*", ", ", " ".join(name.lower().split()))
+    return name.strip(", ")
+
+
+class PlaceIndex:
+    def __init__(self, places):
+        places = sorted(places, key=lambda place: normalize(place.name))
+        self.keys = [normalize(place.name) for place in places]
+        self.places = places
+        self.by_key = dict(zip(self.keys, places, strict=True))
+
+    @classmethod
+    def load(cls):
+        return cls(
+            Place(kind, name, county, float(latitude), float(longitude))
+            for kind, name, county, latitude, longitude in PlaceCentroid.objects.values_list(
+                "kind", "name", "county", "latitude", "longitude"
+            )
+        )
+
+    def resolve(self, name) -> Place | None:
+        """
+        The place with exactly this ZIP code or "City, ST" name, if any.
+        """
+        return self.by_key.get(normalize(name))
+
+    def complete(self, prefix, limit) -> list[Place]:
+        """
+        The first `limit` places, in alphabetical order, whose name starts
+        with prefix.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        start = bisect_left(self.keys, prefix)
+        end = start + limit
+        places = []
+        for key, place in zip(self.keys[start:end], self.places[start:end], strict=True):
+            if not key.startswith(prefix):
+                break
+            places.append(place)
+        return places
+
+
+# the place_centroid view is refreshed by refreshsearch, which bumps every
+# resource type's version
+@cache_by_version("Location")
+def get_place_index() -> PlaceIndex:
+    return PlaceIndex.load()
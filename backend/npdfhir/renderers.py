@@ -1,4 +1,74 @@
+import orjson
 from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson serializes str, int, float, dict, list, UUID and date/time types
+# natively. Datetimes are written the way DRF's encoder writes them (isoformat,
+# UTC as "Z"), so responses are unchanged.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+_encoder = JSONEncoder()
+
+
+class RenderedJSON:
+    """
+    JSON that has already been rendered. FHIRRenderer writes it into responses
+    as-is instead of re-encoding it.
+    """
+
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content
+
+
+class RenderedResource(RenderedJSON):
+    """
+    A pre-rendered FHIR resource. It is written into responses without being
+    parsed; resourceType and id are available for building Bundle entries, and
+    version_id and last_updated (when known) for conditional requests.
+    """
+
+    __slots__ = ("id", "last_updated", "resource_type", "version_id")
+
+    def __init__(self, resource_type, id, content, version_id=None, last_updated=None):
+        super().__init__(content)
+        self.resource_type = resource_type
+        self.id = id
+        self.version_id = version_id
+        self.last_updated = last_updated
+
+    def __getitem__(self, key):
+        if key == "resourceType":
+            return self.resource_type
+        if key == "id":
+            return self.id
+        raise KeyError(key)
+
+    def to_dict(self) -> dict:
+        return orjson.loads(self.content)
+
+
+def _default(obj):
+    if isinstance(obj, RenderedJSON):
+        return orjson.Fragment(obj.content)
+    # Decimals, lazy strings, querysets, ...
+    return _encoder.default(obj)
+
+
+def dumps(data, indent=None) -> bytes:
+    options = ORJSON_OPTIONS
+    if indent:
+        # orjson only supports two-space indentation
+        options |= orjson.OPT_INDENT_2
+    rendered = orjson.dumps(data, default=_default, option=options)
+
+    # Like DRF, escape \u2028 and \u2029 so the output is a strict javascript subset
+    if b"\xe2\x80\xa8" in rendered or b"\xe2\x80\xa9" in rendered:
+        rendered = rendered.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+    return rendered
 
 
 class FHIRRenderer(JSONRenderer):
@@ -8,3 +78,20 @@ class FHIRRenderer(JSONRenderer):
 
     media_type = "application/fhir+json"
     format = "fhir+json"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        return dumps(data, indent=indent)
+
+
+class FHIRJSONRenderer(FHIRRenderer):
+    """
+    FHIRRenderer for clients that ask for plain application/json, so that
+    pre-rendered resources can be written into those responses as well.
+    """
+
+    media_type = "application/json"
+    format = "json"
@@ -18,6 +18,9 @@ from . import views
 # - /Endpoint/12345
 #
 class OptionalSlashRouter(DefaultRouter):
+    # the FHIR base URL also accepts batch Bundles
+    APIRootView = views.FHIRRootView
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.trailing_slash = "/?"
@@ -0,0 +1,99 @@
+"""
+A two-tier cache of rendered FHIR search pages, for the resource types in
+FHIR_SEARCH_CACHE_RESOURCES. Search traffic is dominated by a few state,
+taxonomy and name searches, which are then served without querying Postgres.
+
+Pages are kept for FHIR_SEARCH_CACHE_TIMEOUT seconds in two tiers: up to
+FHIR_SEARCH_CACHE_SIZE pages in each worker's memory, and in the "search"
+cache shared by the workers (Redis, when FHIR_SEARCH_CACHE_URL is set). A page
+found in the shared cache is copied to the worker's. Pages are keyed by the
+canonical query, which includes the dataset version (see npdfhir.dataset), so
+no page cached before a load is served after it.
+
+Each lookup is counted in `stats` by its result (local, shared or miss), and
+bound to the request's log context as `search_cache`.
+"""
+
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from structlog.contextvars import bind_contextvars
+
+# pages larger than this are rendered every time rather than cached
+MAX_PAGE_BYTES = 1024 * 1024
+
+
+class ResultCache:
+    """
+    A least recently used cache of at most `size` entries, each kept for
+    `timeout` seconds.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        with self.lock:
+            expires = time.monotonic() + (self.timeout if timeout is None else timeout)
+            self.entries[key] = (expires, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_pages = ResultCache(settings.FHIR_SEARCH_CACHE_SIZE, settings.FHIR_SEARCH_CACHE_TIMEOUT)
+
+# lookups in this worker by result: local, shared or miss
+stats = Counter()
+
+
+def record(result):
+    stats[result] += 1
+    bind_contextvars(search_cache=result)
+
+
+def get_page(key):
+    """
+    The cached page for key, as (content, content type), or None.
+    """
+    page = local_pages.get(key)
+    if page is not None:
+        record("local")
+        return page
+    page = caches["search"].get(key)
+    if page is not None:
+        local_pages.set(key, page, settings.FHIR_SEARCH_CACHE_TIMEOUT)
+        record("shared")
+        return page
+    record("miss")
+    return None
+
+
+def set_page(key, content, content_type):
+    if len(content) > MAX_PAGE_BYTES:
+        return
+    page = (content, content_type)
+    local_pages.set(key, page, settings.FHIR_SEARCH_CACHE_TIMEOUT)
+    caches["search"].set(key, page, settings.FHIR_SEARCH_CACHE_TIMEOUT)
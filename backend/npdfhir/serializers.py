@@ -1,8 +1,6 @@
-import sys
-from datetime import datetime, timezone
+from datetime import date, datetime, time, timezone
 
 from django.urls import reverse
-from fhir.resources.R4B.address import Address
 from fhir.resources.R4B.bundle import Bundle
 from fhir.resources.R4B.capabilitystatement import (
     CapabilityStatement,
@@ -11,22 +9,17 @@ from fhir.resources.R4B.capabilitystatement import (
     CapabilityStatementRestResource,
     CapabilityStatementRestResourceSearchParam,
 )
-from fhir.resources.R4B.codeableconcept import CodeableConcept
-from fhir.resources.R4B.coding import Coding
 from fhir.resources.R4B.contactdetail import ContactDetail
 from fhir.resources.R4B.contactpoint import ContactPoint
 from fhir.resources.R4B.endpoint import Endpoint
-from fhir.resources.R4B.humanname import HumanName
-from fhir.resources.R4B.identifier import Identifier
-from fhir.resources.R4B.location import Location as FHIRLocation, LocationPosition
-from fhir.resources.R4B.meta import Meta
+from fhir.resources.R4B.location import Location as FHIRLocation
 from fhir.resources.R4B.organization import Organization as FHIROrganization
-from fhir.resources.R4B.period import Period
-from fhir.resources.R4B.practitioner import Practitioner, PractitionerQualification
+from fhir.resources.R4B.practitioner import Practitioner
 from fhir.resources.R4B.practitionerrole import PractitionerRole
-from fhir.resources.R4B.reference import Reference
 from rest_framework import serializers
 
+from .cache import fhir_name_use, fhir_phone_use, nucc_taxonomy_codes
+from .elements import ELEMENTS_CONTEXT_KEY, subset_resource
 from .models import (
     IndividualToPhone,
     Location,
@@ -35,14 +28,105 @@ from .models import (
     OrganizationToName,
     ProviderToOrganization,
 )
-from .utils import genReference, get_schema_data
+from .renderers import RenderedJSON
+from .utils import genReference, get_resource_urls, get_schema_data
+from .validation import validate_resource
 
-if "runserver" or "test" in sys.argv:
-    from .cache import (
-        fhir_name_use,
-        fhir_phone_use,
-        nucc_taxonomy_codes,
+# Serializers build FHIR resources as plain dicts, in the same shape and key
+# order that fhir.resources' model_dump() produces: elements in FHIR order,
+# None values dropped, dates widened to datetimes. Top-level resources are
+# checked against their fhir.resources model on a sample of responses, see
+# npdfhir.validation.
+
+
+def _compact(**elements):
+    return {key: value for key, value in elements.items() if value is not None}
+
+
+def _fhir_datetime(value):
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime.combine(value, time())
+    return value
+
+
+def _period(start=None, end=None):
+    return _compact(start=_fhir_datetime(start), end=_fhir_datetime(end))
+
+
+def _coding(system=None, code=None, display=None):
+    return _compact(system=system, code=code, display=display)
+
+
+def _codeable_concept(system=None, code=None, display=None):
+    return {"coding": [_coding(system, code, display)]}
+
+
+def _npi_identifier(npi):
+    return {
+        "use": "official",
+        "type": _codeable_concept(
+            "http://terminology.hl7.org/CodeSystem/v2-0203", "PRN", "Provider number"
+        ),
+        "system": "http://terminology.hl7.org/NamingSystem/npi",
+        "value": str(npi.npi),
+        "period": _period(npi.enumeration_date, npi.deactivation_date),
+    }
+
+
+def _taxonomy_qualification(nucc_code_id):
+    code = _codeable_concept(
+        "http://nucc.org/provider-taxonomy",
+        nucc_code_id,
+        # codes missing from the NUCC table are listed without a display
+        nucc_taxonomy_codes.get(nucc_code_id),
     )
+    return {
+        "identifier": [
+            {
+                "type": code,  # TODO: Replace
+                "value": "test",
+                "period": {},
+            }
+        ],
+        "code": code,
+    }
+
+
+class ElementsMixin:
+    """
+    Trims a resource serializer to the elements requested with _elements or
+    _summary (see npdfhir.elements). Serializer fields that only feed
+    elements that were not requested are dropped, so their relations are
+    never read.
+    """
+
+    # FHIR element -> the serializer fields it is built from
+    element_fields = {}
+
+    @property
+    def elements(self):
+        return self.context.get(ELEMENTS_CONTEXT_KEY)
+
+    def wants(self, element):
+        return self.elements is None or element in self.elements
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.elements is not None:
+            needed = {
+                field
+                for element, element_fields in self.element_fields.items()
+                if element in self.elements
+                for field in element_fields
+            }
+            for element_fields in self.element_fields.values():
+                for field in element_fields:
+                    if field not in needed:
+                        fields.pop(field, None)
+        return fields
+
+    def subset(self, resource):
+        return subset_resource(resource, self.elements)
 
 
 class AddressSerializer(serializers.Serializer):
@@ -73,7 +157,10 @@ class AddressSerializer(serializers.Serializer):
         address_list = [address.delivery_line_1]
         if address.delivery_line_2 is not None:
             address_list.append(address.delivery_line_2)
-        address = Address(
+
+        use = instance.address_use.value if hasattr(instance, "address_use") else None
+        return _compact(
+            use=use,
             line=address_list,
             city=address.city_name,
             state=address.state_code.abbreviation,
@@ -81,10 +168,6 @@ class AddressSerializer(serializers.Serializer):
             country="US",
         )
 
-        if hasattr(instance, "address_use"):
-            address.use = instance.address_use.value
-        return address.model_dump()
-
 
 class EmailSerializer(serializers.Serializer):
     email_address = serializers.CharField(read_only=True)
@@ -93,12 +176,11 @@ class EmailSerializer(serializers.Serializer):
         fields = ["email_address"]
 
     def to_representation(self, instance):
-        email_contact = ContactPoint(
+        return _compact(
             system="email",
             value=instance.email_address,
             # use="work" TODO: add email use
         )
-        return email_contact.model_dump()
 
 
 class PhoneSerializer(serializers.Serializer):
@@ -107,14 +189,14 @@ class PhoneSerializer(serializers.Serializer):
         fields = ["phone_number", "phone_use_id", "extension"]
 
     def to_representation(self, instance):
-        phone_contact = ContactPoint(
+        value = f"{instance.phone_number}"
+        if instance.extension is not None:
+            value += f"ext. {instance.extension}"
+        return _compact(
             system="phone",
-            use=fhir_phone_use[str(instance.phone_use_id)],
-            value=f"{instance.phone_number}",
+            value=value,
+            use=fhir_phone_use[instance.phone_use_id],
         )
-        if instance.extension is not None:
-            phone_contact.value += f"ext. {instance.extension}"
-        return phone_contact.model_dump()
 
 
 class TaxonomySerializer(serializers.Serializer):
@@ -125,26 +207,7 @@ class TaxonomySerializer(serializers.Serializer):
         fields = ["id", "display_name"]
 
     def to_representation(self, instance):
-        code = CodeableConcept(
-            coding=[
-                Coding(
-                    system="http://nucc.org/provider-taxonomy",
-                    code=instance.nucc_code_id,
-                    display=nucc_taxonomy_codes[str(instance.nucc_code_id)],
-                )
-            ]
-        )
-        qualification = PractitionerQualification(
-            identifier=[
-                Identifier(
-                    value="test",
-                    type=code,  # TODO: Replace
-                    period=Period(),
-                )
-            ],
-            code=code,
-        )
-        return qualification.model_dump()
+        return _taxonomy_qualification(instance.nucc_code_id)
 
 
 class OtherIdentifierSerializer(serializers.Serializer):
@@ -163,22 +226,17 @@ class OtherIdentifierSerializer(serializers.Serializer):
         ]
 
     def to_representation(self, instance):
-        license_identifier = Identifier(
+        return _compact(
+            # use="" TODO: Add use for other identifier
+            type=_codeable_concept(
+                "http://terminology.hl7.org/CodeSystem/v2-0203",
+                str(instance.other_id_type.value),
+                instance.other_id,
+            ),
             # system="", TODO: Figure out how to associate a system with each identifier
             value=instance.other_id,
-            type=CodeableConcept(
-                coding=[
-                    Coding(
-                        system="http://terminology.hl7.org/CodeSystem/v2-0203",
-                        code=str(instance.other_id_type.value),
-                        display=instance.other_id,
-                    )
-                ]
-            ),
-            # use="" TODO: Add use for other identifier
-            # period=Period(start=instance.issue_date, end=instance.expiry_date),
+            # period=_period(instance.issue_date, instance.expiry_date),
         )
-        return license_identifier.model_dump()
 
 
 class NameSerializer(serializers.Serializer):
@@ -213,16 +271,15 @@ class NameSerializer(serializers.Serializer):
             ]
             if part != "" and part is not None
         ]
-        human_name = HumanName(
-            use=fhir_name_use[str(name.name_use_id)],
+        return _compact(
+            use=fhir_name_use[name.name_use_id],
             text=" ".join(name_parts),
             family=name.last_name,
             given=[name.first_name, name.middle_name],
             prefix=[name.prefix],
             suffix=[name.suffix],
-            period=Period(start=name.start_date, end=name.end_date),
+            period=_period(name.start_date, name.end_date),
         )
-        return human_name.model_dump()
 
 
 class NPISerializer(serializers.ModelSerializer):
@@ -268,40 +325,38 @@ class EndpointPayloadSeriazlier(serializers.Serializer):
         fields = ["type", "mime_type"]
 
     def to_representation(self, instance):
-        payload_type = CodeableConcept(
-            coding=[
-                Coding(
-                    system="http://terminology.hl7.org/CodeSystem/endpoint-payload-type",
-                    code=instance.payload_type.id,
-                    display=instance.payload_type.value,
-                )
-            ]
+        return _codeable_concept(
+            "http://terminology.hl7.org/CodeSystem/endpoint-payload-type",
+            instance.payload_type.id,
+            instance.payload_type.value,
         )
 
-        return payload_type
-
 
 class EndpointIdentifierSerialzier(serializers.Serializer):
     class Meta:
         fields = ["identifier", "system", "value", "assigner"]
 
     def to_representation(self, instance):
-        endpoint_identifier = Identifier(
+        return _compact(
             use="official",
             system=instance.system,
             value=instance.other_id,
             # TODO: Replace with Organization reference
-            assigner=Reference(display=str(instance.issuer_id)),
+            assigner={"display": str(instance.issuer_id)},
         )
 
-        return endpoint_identifier.model_dump()
-
 
-class OrganizationSerializer(serializers.Serializer):
+class OrganizationSerializer(ElementsMixin, serializers.Serializer):
     name = OrganizationNameSerializer(source="organizationtoname_set", many=True, read_only=True)
     authorized_official = IndividualSerializer(read_only=True)
     address = AddressSerializer(source="organizationtoaddress_set", many=True, read_only=True)
 
+    element_fields = {
+        "name": ["name"],
+        "alias": ["name"],
+        "contact": ["authorized_official", "address"],
+    }
+
     class Meta:
         model = Organization
         fields = "__all__"
@@ -309,92 +364,49 @@ class OrganizationSerializer(serializers.Serializer):
     def to_representation(self, instance):
         request = self.context.get("request")
         representation = super().to_representation(instance)
-        organization = FHIROrganization()
-        organization.id = str(instance.id)
-        organization.meta = Meta(
-            profile=["http://hl7.org/fhir/us/core/StructureDefinition/us-core-organization"]
-        )
+        organization = {
+            "resourceType": "Organization",
+            "id": str(instance.id),
+            "meta": {
+                "profile": ["http://hl7.org/fhir/us/core/StructureDefinition/us-core-organization"]
+            },
+        }
         identifiers = []
         taxonomies = []
         # if instance.ein:
-        #    ein_identifier = Identifier(
-        #        system="https://terminology.hl7.org/NamingSystem-USEIN.html",
-        #        value=str(instance.ein.ein_id),
-        #        type=CodeableConcept(
-        #            coding=[Coding(
-        #                system="http://terminology.hl7.org/CodeSystem/v2-0203",
-        #                code="TAX",
-        #                display="Tax ID number"
-        #            )]
-        #        )
-        #    )
+        #    ein_identifier = {
+        #        "type": _codeable_concept(
+        #            "http://terminology.hl7.org/CodeSystem/v2-0203", "TAX", "Tax ID number"
+        #        ),
+        #        "system": "https://terminology.hl7.org/NamingSystem-USEIN.html",
+        #        "value": str(instance.ein.ein_id),
+        #    }
         #    identifiers.append(ein_identifier)
 
-        if hasattr(instance, "clinicalorganization"):
+        if self.wants("identifier") and hasattr(instance, "clinicalorganization"):
             clinical_org = instance.clinicalorganization
             if clinical_org and clinical_org.npi:
-                npi_identifier = Identifier(
-                    system="http://terminology.hl7.org/NamingSystem/npi",
-                    value=str(clinical_org.npi.npi),
-                    type=CodeableConcept(
-                        coding=[
-                            Coding(
-                                system="http://terminology.hl7.org/CodeSystem/v2-0203",
-                                code="PRN",
-                                display="Provider number",
-                            )
-                        ]
-                    ),
-                    use="official",
-                    period=Period(
-                        start=clinical_org.npi.enumeration_date,
-                        end=clinical_org.npi.deactivation_date,
-                    ),
-                )
-                identifiers.append(npi_identifier)
+                identifiers.append(_npi_identifier(clinical_org.npi))
 
                 for other_id in clinical_org.organizationtootherid_set.all():
-                    other_identifier = Identifier(
-                        system=str(other_id.other_id_type_id),
-                        value=other_id.other_id,
-                        type=CodeableConcept(
-                            coding=[
-                                Coding(
-                                    system="http://terminology.hl7.org/CodeSystem/v2-0203",
-                                    code="test",  # do we define this based on the type of id it is?
-                                    display="test",  # same as above ^
-                                )
-                            ]
+                    other_identifier = {
+                        "type": _codeable_concept(
+                            "http://terminology.hl7.org/CodeSystem/v2-0203",
+                            "test",  # do we define this based on the type of id it is?
+                            "test",  # same as above ^
                         ),
-                    )
+                        "system": str(other_id.other_id_type_id),
+                        "value": other_id.other_id,
+                    }
                     identifiers.append(other_identifier)
 
                 for taxonomy in clinical_org.organizationtotaxonomy_set.all():
-                    code = CodeableConcept(
-                        coding=[
-                            Coding(
-                                system="http://nucc.org/provider-taxonomy",
-                                code=taxonomy.nucc_code_id,
-                                display=nucc_taxonomy_codes[str(taxonomy.nucc_code_id)],
-                            )
-                        ]
-                    )
-                    qualification = PractitionerQualification(
-                        identifier=[
-                            Identifier(
-                                value="test",
-                                type=code,  # TODO: Replace
-                                period=Period(),
-                            )
-                        ],
-                        code=code,
-                    )
-                    taxonomies.append(qualification.model_dump())
+                    taxonomies.append(_taxonomy_qualification(taxonomy.nucc_code_id))
                 # TODO extend based on US core
                 # if taxonomies:
-                #    organization.qualification = taxonomies
+                #    organization["qualification"] = taxonomies
 
-        organization.identifier = identifiers
+        organization["identifier"] = identifiers
 
         # The NPPES data that we would be ingesting and storing in the core data model has a concept of a primary organization name and other organization names, which maps to the fhir concept of organization.name (1:1) and organization.alias(1:M).
         # The Halloween data do not have these concepts, so the intent of this code is to try to assign an organization name with or without the concept of "is_primary" and then to assign any other names (if present) to organization.alias
@@ -403,90 +415,93 @@ class OrganizationSerializer(serializers.Serializer):
         aliases = []
 
         if primary_names:
-            organization.name = primary_names[0][1]["name"]
+            organization["name"] = primary_names[0][1]["name"]
             primary_name_index = primary_names[0][0]
             del names[primary_name_index]
             aliases = names
         elif names:
-            organization.name = names[0]
+            organization["name"] = names[0]["name"]
             if len(names) > 1:
                 aliases = names[1:]
         if aliases:
-            organization.alias = aliases
+            organization["alias"] = [alias["name"] for alias in aliases]
 
         if instance.parent_id is not None:
-            organization.partOf = genReference(
+            organization["partOf"] = genReference(
                 "fhir-organization-detail", instance.parent_id, request
             )
 
-        if hasattr(instance, "authorized_official") and instance.authorized_official is not None:
+        if "authorized_official" in representation and instance.authorized_official is not None:
             authorized_official = representation["authorized_official"]
             # r4 only allows one name for contact. TODO update to ndh
-            authorized_official["name"] = authorized_official["name"][0]
+            if authorized_official["name"]:
+                authorized_official["name"] = authorized_official["name"][0]
+            else:
+                del authorized_official["name"]
 
             if representation["address"] != []:
                 authorized_official["address"] = representation["address"][0]
             else:
                 if "address" in authorized_official.keys():
                     del authorized_official["address"]
-            organization.contact = [authorized_official]
+            organization["contact"] = [authorized_official]
 
-        return organization.model_dump()
+        return validate_resource(FHIROrganization, self.subset(organization), self.context)
 
 
-class PractitionerSerializer(serializers.Serializer):
-    npi = NPISerializer()
-    individual = IndividualSerializer(read_only=True)
+class PractitionerSerializer(ElementsMixin, serializers.Serializer):
+    name = NameSerializer(source="individual.individualtoname_set", many=True, read_only=True)
+    email = EmailSerializer(source="individual.individualtoemail_set", many=True, read_only=True)
+    phone = PhoneSerializer(source="individual.individualtophone_set", many=True, read_only=True)
+    address = AddressSerializer(
+        source="individual.individualtoaddress_set", many=True, read_only=True
+    )
     identifier = OtherIdentifierSerializer(
         source="providertootherid_set", many=True, read_only=True
     )
     taxonomy = TaxonomySerializer(source="providertotaxonomy_set", many=True, read_only=True)
 
+    element_fields = {
+        "identifier": ["identifier"],
+        "name": ["name"],
+        "telecom": ["phone", "email"],
+        "address": ["address"],
+        "qualification": ["taxonomy"],
+    }
+
     class Meta:
-        fields = ["npi", "name", "email", "phone", "identifier", "taxonomy"]
+        fields = ["name", "email", "phone", "address", "identifier", "taxonomy"]
 
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        practitioner = Practitioner()
-        practitioner.id = str(instance.individual.id)
-        practitioner.meta = Meta(
-            profile=["http://hl7.org/fhir/us/core/StructureDefinition/us-core-practitioner"]
-        )
-        npi_identifier = Identifier(
-            system="http://terminology.hl7.org/NamingSystem/npi",
-            value=str(instance.npi.npi),
-            type=CodeableConcept(
-                coding=[
-                    Coding(
-                        system="http://terminology.hl7.org/CodeSystem/v2-0203",
-                        code="PRN",
-                        display="Provider number",
-                    )
-                ]
-            ),
-            use="official",
-            period=Period(start=instance.npi.enumeration_date, end=instance.npi.deactivation_date),
-        )
-        if representation["individual"]["telecom"] != []:
-            practitioner.telecom = representation["individual"]["telecom"]
-        if (
-            "address" in representation["individual"].keys()
-            and representation["individual"]["address"] != []
-        ):
-            practitioner.address = representation["individual"]["address"]
-        practitioner.identifier = [npi_identifier]
-        if "identifier" in representation.keys():
-            practitioner.identifier += representation["identifier"]
-        practitioner.name = representation["individual"]["name"]
-        if "taxonomy" in representation.keys():
-            practitioner.qualification = representation["taxonomy"]
-        return practitioner.model_dump()
-
-
-class LocationSerializer(serializers.Serializer):
+        practitioner = {
+            "resourceType": "Practitioner",
+            "id": str(instance.individual_id),
+            "meta": {
+                "profile": ["http://hl7.org/fhir/us/core/StructureDefinition/us-core-practitioner"]
+            },
+        }
+        if "identifier" in representation:
+            practitioner["identifier"] = [_npi_identifier(instance.npi)]
+            practitioner["identifier"] += representation["identifier"]
+        if "name" in representation:
+            practitioner["name"] = representation["name"]
+        telecom = representation.get("phone", []) + representation.get("email", [])
+        if telecom:
+            practitioner["telecom"] = telecom
+        if representation.get("address"):
+            practitioner["address"] = representation["address"]
+        if "taxonomy" in representation:
+            practitioner["qualification"] = representation["taxonomy"]
+        return validate_resource(Practitioner, self.subset(practitioner), self.context)
+
+
+class LocationSerializer(ElementsMixin, serializers.Serializer):
     phone = PhoneSerializer(read_only=True)
     address = serializers.SerializerMethodField()
 
+    element_fields = {"address": ["address"]}
+
     class Meta:
         model = Location
 
@@ -499,17 +514,18 @@ class LocationSerializer(serializers.Serializer):
     def to_representation(self, instance):
         request = self.context.get("request")
         representation = super().to_representation(instance)
-        location = FHIRLocation()
-        location.id = str(instance.id)
-        if instance.active:
-            location.status = "active"
-        else:
-            location.status = "inactive"
-        location.name = instance.name
+        location = {
+            "resourceType": "Location",
+            "id": str(instance.id),
+            "status": "active" if instance.active else "inactive",
+        }
+        if instance.name is not None:
+            location["name"] = instance.name
         # if 'phone' in representation.keys():
-        #    location.telecom = representation['phone']
+        #    location["telecom"] = representation['phone']
         if "address" in representation.keys():
-            location.address = representation["address"]
+            if representation["address"] is not None:
+                location["address"] = representation["address"]
             if (
                 hasattr(instance, "address")
                 and hasattr(instance.address, "address_us")
@@ -518,18 +534,18 @@ class LocationSerializer(serializers.Serializer):
                 and instance.address.address_us.longitude is not None
                 and instance.address.address_us.latitude is not None
             ):
-                position = LocationPosition(
-                    latitude=instance.address.address_us.latitude,
-                    longitude=instance.address.address_us.longitude,
-                )
-                location.position = position
-        location.managingOrganization = genReference(
-            "fhir-organization-detail", instance.organization_id, request
-        )
-        return location.model_dump()
+                location["position"] = {
+                    "longitude": float(instance.address.address_us.longitude),
+                    "latitude": float(instance.address.address_us.latitude),
+                }
+        if self.wants("managingOrganization"):
+            location["managingOrganization"] = genReference(
+                "fhir-organization-detail", instance.organization_id, request
+            )
+        return validate_resource(FHIRLocation, self.subset(location), self.context)
 
 
-class PractitionerRoleSerializer(serializers.Serializer):
+class PractitionerRoleSerializer(ElementsMixin, serializers.Serializer):
     other_phone = PhoneSerializer(read_only=True)
 
     class Meta:
@@ -538,26 +554,34 @@ class PractitionerRoleSerializer(serializers.Serializer):
     def to_representation(self, instance):
         request = self.context.get("request")
         # representation = super().to_representation(instance)
-        practitioner_role = PractitionerRole()
-        practitioner_role.id = str(instance.id)
-        practitioner_role.active = instance.active
-        practitioner_role.practitioner = genReference(
-            "fhir-practitioner-detail", instance.provider_to_organization.individual_id, request
-        )
-        practitioner_role.organization = genReference(
-            "fhir-organization-detail", instance.provider_to_organization.organization_id, request
-        )
-        practitioner_role.location = [
-            genReference("fhir-location-detail", instance.location.id, request)
-        ]
+        practitioner_role = {
+            "resourceType": "PractitionerRole",
+            "id": str(instance.id),
+        }
+        if instance.active is not None:
+            practitioner_role["active"] = instance.active
+        if self.wants("practitioner"):
+            practitioner_role["practitioner"] = genReference(
+                "fhir-practitioner-detail", instance.provider_to_organization.individual_id, request
+            )
+        if self.wants("organization"):
+            practitioner_role["organization"] = genReference(
+                "fhir-organization-detail",
+                instance.provider_to_organization.organization_id,
+                request,
+            )
+        if self.wants("location"):
+            practitioner_role["location"] = [
+                genReference("fhir-location-detail", instance.location_id, request)
+            ]
         # These lines rely on the fhir.resources.R4B representation of PractitionerRole to be expanded to match the ndh FHIR definition. This is a TODO with an open ticket.
         # if 'other_phone' in representation.keys():
-        #    practitioner_role.telecom = representation['other_phone']
+        #    practitioner_role["telecom"] = representation['other_phone']
 
-        return practitioner_role.model_dump()
+        return validate_resource(PractitionerRole, self.subset(practitioner_role), self.context)
 
 
-class EndpointSerializer(serializers.Serializer):
+class EndpointSerializer(ElementsMixin, serializers.Serializer):
     payload = EndpointPayloadSeriazlier(
         source="endpointinstancetopayload_set", many=True, read_only=True
     )
@@ -565,6 +589,8 @@ class EndpointSerializer(serializers.Serializer):
         source="endpointinstancetootherid_set", many=True, read_only=True
     )
 
+    element_fields = {"identifier": ["identifier"], "payloadType": ["payload"]}
+
     class Meta:
         fields = [
             "id",
@@ -581,17 +607,17 @@ class EndpointSerializer(serializers.Serializer):
         representation = super().to_representation(instance)
 
         if instance.endpoint_connection_type:
-            connection_type = Coding(
-                system="http://terminology.hl7.org/CodeSystem/endpoint-connection-type",
-                code=instance.endpoint_connection_type.id,
-                display=instance.endpoint_connection_type.display,
+            connection_type = _coding(
+                "http://terminology.hl7.org/CodeSystem/endpoint-connection-type",
+                instance.endpoint_connection_type.id,
+                instance.endpoint_connection_type.display,
             )
         # TODO THIS IS TEMPORARY DUE TO INSUFFICIENT DATA
         else:
-            connection_type = Coding(
-                system="http://terminology.hl7.org/CodeSystem/endpoint-connection-type",
-                code="hl7-fhir-rest",
-                display="HL7 FHIR",
+            connection_type = _coding(
+                "http://terminology.hl7.org/CodeSystem/endpoint-connection-type",
+                "hl7-fhir-rest",
+                "HL7 FHIR",
             )
 
         ## TODO extend base fhir spec to ndh spec
@@ -608,23 +634,23 @@ class EndpointSerializer(serializers.Serializer):
         #        )
         #    ]
 
-        endpoint = Endpoint(
-            id=str(instance.id),
-            identifier=representation["identifier"],
-            status="active",  # TODO hardcoded for now
-            connectionType=connection_type,
-            name=instance.name,
-            # TODO extend base fhir spec to ndh spec description=instance.description,
-            # TODO extend base fhir spec to ndh spec environmentType=environment_type,
-            # managingOrganization=genReference(
-            #    'fhir-organization-detail', instance.location.organization_id, request),
-            # contact=ContactPoint(contact),
-            # period=Period(period),
-            payloadType=representation["payload"],
-            address=instance.address,
-        )
+        endpoint = {
+            "resourceType": "Endpoint",
+            "id": str(instance.id),
+            "identifier": representation.get("identifier"),
+            "status": "active",  # TODO hardcoded for now
+            "connectionType": connection_type,
+        }
+        if instance.name is not None:
+            endpoint["name"] = instance.name
+        # TODO extend base fhir spec to ndh spec endpoint["description"] = instance.description
+        # TODO extend base fhir spec to ndh spec endpoint["environmentType"] = environment_type
+        # endpoint["managingOrganization"] = genReference(
+        #    'fhir-organization-detail', instance.location.organization_id, request)
+        endpoint["payloadType"] = representation["payload"]
+        endpoint["address"] = instance.address
 
-        return endpoint.model_dump()
+        return validate_resource(Endpoint, self.subset(endpoint), self.context)
 
 
 class CapabilityStatementSerializer(serializers.Serializer):
@@ -716,24 +742,65 @@ class BundleSerializer(serializers.Serializer):
         model = Bundle
 
     def to_representation(self, instance):
-        entries = []
-
-        for resource in instance.data:
-            request = self.context.get("request")
-            # Get the resource type (Patient, Practitioner, etc.)
-            resource_type = resource["resourceType"]
-            id = resource["id"]
-            url_name = f"fhir-{resource_type.lower()}-detail"
-            full_url = request.build_absolute_uri(reverse(url_name, kwargs={"id": id}))
-            # Create an entry for this resource
-            entry = {
-                "fullUrl": full_url,
-                "resource": resource,
-            }
-
-            entries.append(entry)
+        # resources added by _include/_revinclude; when there are any, every
+        # entry is marked with its search mode
+        included = self.context.get("included")
+        match_mode = "match" if included else None
+        entries = [self.to_entry(resource, match_mode) for resource in instance]
+        entries += [self.to_entry(resource, "include") for resource in included or []]
+        # the number of matches as requested with _total, if any
+        total = self.context.get("total")
+
+        # pre-rendered resources from the store were validated when the store
+        # was built
+        validate_resource(
+            Bundle,
+            self.to_bundle(
+                [entry for entry in entries if not isinstance(entry["resource"], RenderedJSON)],
+                total=total,
+            ),
+            self.context,
+        )
+        return self.to_bundle(entries, total)
 
-        # Create the bundle
-        bundle = Bundle(type="searchset", entry=entries, total=len(entries))
+    def to_entry(self, resource, mode=None):
+        request = self.context.get("request")
+        # Get the resource type (Patient, Practitioner, etc.)
+        resource_type = resource["resourceType"]
+        id = resource["id"]
+        url_name = f"fhir-{resource_type.lower()}-detail"
+        full_url = get_resource_urls(request).url(url_name, id)
+        # Create an entry for this resource
+        entry = {
+            "fullUrl": full_url,
+            "resource": resource,
+        }
+        search = {}
+        # the distance of a match from the point of a near search, in meters
+        distance = None if mode == "include" else self.context.get("distances", {}).get(id)
+        if distance is not None:
+            search["extension"] = [self.to_distance_extension(distance)]
+        if mode is not None:
+            search["mode"] = mode
+        if search:
+            entry["search"] = search
+        return entry
+
+    def to_distance_extension(self, distance):
+        return {
+            "url": "http://hl7.org/fhir/StructureDefinition/location-distance",
+            "valueDistance": {
+                "value": round(distance / 1000, 3),
+                "unit": "km",
+                "system": "http://unitsofmeasure.org",
+                "code": "km",
+            },
+        }
 
-        return bundle.model_dump()
+    def to_bundle(self, entries, total=None):
+        bundle = {"resourceType": "Bundle", "type": "searchset"}
+        if total is not None:
+            bundle["total"] = total
+        if entries is not None:
+            bundle["entry"] = entries
+        return bundle
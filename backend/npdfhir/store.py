@@ -0,0 +1,164 @@
+import hashlib
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .dataset import dataset_versions, get_dataset_version
+from .models import DatasetVersion, FhirResource
+from .renderers import RenderedResource, dumps
+
+# Stored documents are rendered without a request, so the absolute URLs in them
+# (references, fullUrls) are built against this placeholder and rewritten to the
+# requesting host when served.
+STORE_BASE_URL = "urn:npd:fhir-base"
+
+
+class StoreRequest:
+    """
+    Stand-in for the request passed to serializers when rendering documents for
+    the store.
+    """
+
+    def build_absolute_uri(self, location=None):
+        return f"{STORE_BASE_URL}{location or '/'}"
+
+
+def render_document(resource: dict) -> str:
+    return dumps(resource).decode()
+
+
+def hash_document(content: str) -> str:
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+_META = ',"meta":{'
+
+
+def add_version_meta(content: str, resource_type: str, id: str, version_id, last_updated) -> str:
+    """
+    Splice meta.versionId and meta.lastUpdated into a rendered document. They
+    come first in meta, which comes straight after id (or is added there).
+    """
+    head = f'{{"resourceType":"{resource_type}","id":"{id}"'
+    if not content.startswith(head):
+        return content
+    version = dumps({"versionId": version_id, "lastUpdated": last_updated}).decode()[1:-1]
+    rest = content[len(head) :]
+    if rest.startswith(_META):
+        return f"{head}{_META}{version},{rest[len(_META) :]}"
+    return f"{head}{_META}{version}}}{rest}"
+
+
+def is_store_current(resource_type: str) -> bool:
+    """
+    Whether the resource type's stored documents were built at its current
+    dataset version, that is, no load has changed its data since the store was
+    built. Stale documents are not served.
+    """
+    version = get_dataset_version(resource_type)
+    return version is not None and version.store_generation == version.generation
+
+
+def start_build(resource_type: str) -> int:
+    """
+    Stop serving the resource type's stored documents while they are rebuilt,
+    and return the dataset generation the build reads.
+    """
+    with transaction.atomic():
+        version = DatasetVersion.objects.select_for_update().get(resource_type=resource_type)
+        DatasetVersion.objects.filter(resource_type=resource_type).update(store_generation=None)
+    dataset_versions.clear()
+    return version.generation
+
+
+def finish_build(resource_type: str, generation: int) -> bool:
+    """
+    Serve the rebuilt documents, unless a load changed the resource type's
+    data during the build, which then has to be run again. Returns whether
+    the store is current.
+    """
+    with transaction.atomic():
+        version = DatasetVersion.objects.select_for_update().get(resource_type=resource_type)
+        if version.generation != generation:
+            return False
+        DatasetVersion.objects.filter(resource_type=resource_type).update(
+            store_generation=F("generation")
+        )
+    dataset_versions.clear()
+    return True
+
+
+def stored_resources(resource_type: str, ids, model=None):
+    """
+    The stored documents of the given resource ids. When the resource type's
+    model is given, documents whose source row has been deleted since the
+    store was last built are left out.
+    """
+    stored = FhirResource.objects.filter(resource_type=resource_type, resource_id__in=ids)
+    if model is not None:
+        stored = stored.filter(resource_id__in=model.objects.filter(pk__in=ids).values("pk"))
+    return stored
+
+
+def fetch_documents(resource_type: str, ids, request, model=None) -> dict:
+    """
+    Look up stored documents for the given resource ids, returning a dict of
+    RenderedResources keyed by id. Ids that are not in the store (or, when
+    model is given, no longer in the database) are omitted.
+    """
+    base_url = request.build_absolute_uri("/").rstrip("/")
+    stored = stored_resources(resource_type, ids, model).values_list("resource_id", "content")
+    return {
+        str(resource_id): RenderedResource(
+            resource_type, str(resource_id), content.replace(STORE_BASE_URL, base_url)
+        )
+        for resource_id, content in stored
+    }
+
+
+def sync_documents(resource_type: str, documents: dict) -> int:
+    """
+    Write rendered documents (keyed by id) to the store, skipping any whose
+    content hash is unchanged. Returns the number of documents written.
+    """
+    hashes = {
+        str(resource_id): content_hash
+        for resource_id, content_hash in FhirResource.objects.filter(
+            resource_type=resource_type, resource_id__in=documents.keys()
+        ).values_list("resource_id", "content_hash")
+    }
+
+    rows = []
+    for resource_id, content in documents.items():
+        content_hash = hash_document(content)
+        if hashes.get(resource_id) != content_hash:
+            rows.append((resource_type, resource_id, content, content_hash))
+
+    if rows:
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                insert into {FhirResource._meta.db_table}
+                    (resource_type, resource_id, content, content_hash, updated_at)
+                values (%s, %s, %s, %s, clock_timestamp())
+                on conflict (resource_type, resource_id) do update
+                set content = excluded.content,
+                    content_hash = excluded.content_hash,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+
+    return len(rows)
+
+
+def prune_documents(resource_type: str, model) -> int:
+    """
+    Remove stored documents whose source row no longer exists.
+    """
+    deleted, _ = (
+        FhirResource.objects.filter(resource_type=resource_type)
+        .exclude(resource_id__in=model.objects.values("pk"))
+        .delete()
+    )
+    return deleted
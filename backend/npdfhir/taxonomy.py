@@ -0,0 +1,114 @@
+"""
+The NUCC provider taxonomy as a tree: groupings contain classifications, which
+contain specializations. Groupings, and a few classifications, have no code of
+their own and are named by their display name instead.
+
+The tree is read from the nucc_grouping, nucc_classification and
+nucc_specialization tables once per worker, the first time a hierarchical
+search needs it, since the tables only change with a NUCC release. A
+hierarchical search then expands to a set of codes in memory and matches them
+with one indexed predicate on the taxonomy code columns, rather than joining
+the hierarchy tables or text matching display names.
+"""
+
+from collections import defaultdict
+from functools import cache
+
+from .models import NuccClassification, NuccSpecialization
+
+
+def _key(value):
+    # names can contain commas, which search values are split on (and the parts
+    # stripped), so they are keyed without the spaces around them
+    return ",".join(part.strip() for part in value.lower().split(","))
+
+
+class TaxonomyTree:
+    def __init__(self, classifications, specializations):
+        """
+        classifications are (id, code, display name, grouping display name)
+        rows and specializations are (code, classification id) rows.
+        """
+        # classification id -> its code and its specializations' codes
+        codes = defaultdict(set)
+        classification_codes = {}
+        for id, code, _, _ in classifications:
+            if code:
+                codes[id].add(code)
+                classification_codes[id] = code
+        # lowercased specialization code -> the codes of the classifications it
+        # belongs to
+        self.parents = defaultdict(set)
+        for code, classification_id in specializations:
+            codes[classification_id].add(code)
+            if classification_id in classification_codes:
+                self.parents[code.lower()].add(classification_codes[classification_id])
+        # lowercased code -> the code
+        self.codes = {code.lower(): code for code in classification_codes.values()}
+        self.codes.update((code.lower(), code) for code, _ in specializations)
+
+        # code, or lowercased grouping or classification name -> the codes at and
+        # below it
+        self.descendants = defaultdict(set)
+        for id, code, name, grouping in classifications:
+            for key in [code, name, grouping]:
+                if key:
+                    self.descendants[_key(key)] |= codes[id]
+        for code, _ in specializations:
+            self.descendants[code.lower()].add(code)
+
+    @classmethod
+    def load(cls):
+        return cls(
+            list(
+                NuccClassification.objects.values_list(
+                    "id", "nucc_code", "display_name", "nucc_grouping__display_name"
+                )
+            ),
+            list(
+                NuccSpecialization.objects.filter(nucc_code__isnull=False).values_list(
+                    "nucc_code", "nucc_classification_id"
+                )
+            ),
+        )
+
+    def below(self, value) -> set[str]:
+        """
+        The codes at and below a code or a grouping or classification name. An
+        unknown value is returned as is, to match nothing or itself.
+        """
+        return self.descendants.get(_key(value)) or {value}
+
+    def join_names(self, values) -> list[str]:
+        """
+        Rejoin comma-separated search values that were split within a
+        grouping or classification name, such as "Speech, Language and
+        Hearing Service Providers", taking the longest name at each value.
+        """
+        joined = []
+        start = 0
+        while start < len(values):
+            end = next(
+                (
+                    end
+                    for end in range(len(values), start + 1, -1)
+                    if _key(",".join(values[start:end])) in self.descendants
+                ),
+                start + 1,
+            )
+            joined.append(",".join(values[start:end]))
+            start = end
+        return joined
+
+    def above(self, code) -> set[str]:
+        """
+        A code and the codes of the classifications above it. An unknown code
+        is returned as is, to match nothing or itself.
+        """
+        key = code.lower()
+        return {self.codes.get(key, code), *self.parents.get(key, ())}
+
+
+@cache
+def get_taxonomy_tree() -> TaxonomyTree:
+    return TaxonomyTree.load()
@@ -1,16 +1,13 @@
+from io import StringIO
+
 from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.db import connection
 from rest_framework.test import APIClient
 from rest_framework.test import APITestCase as DrfAPITestCase
 from structlog import contextvars
 
-from ..cache import cacheData as cacheData
-
-# I can't explain why, but we need to import cacheData here. I think we can
-# remove this once we move to the docker db setup. By using "import thing as
-# thing", we silence "imported but unused" and "not accessed" warnings.
-
 
 class SqlTraceLogger:
     def __init__(self, testcase: DrfAPITestCase):
@@ -24,10 +21,20 @@ class SqlTraceLogger:
 
 
 class APITestCase(DrfAPITestCase):
+    # build the resource store from the fixtures, for tests of the documents
+    # served from it (with FHIR_RESOURCE_STORE enabled)
+    build_resource_store = False
+
     @classmethod
     def setUpTestData(cls):
         cls.user = User.objects.create(username="testuser")
         cls.user.set_password("nothing")
+        # subclasses call this after creating their fixtures, which searches
+        # only see once the search tables are refreshed; the store is built
+        # after that, as refreshing them makes it stale
+        call_command("refreshsearch", stdout=StringIO())
+        if cls.build_resource_store:
+            call_command("buildfhirstore", stdout=StringIO())
         return super().setUpTestData()
 
     def setUp(self):
@@ -12,8 +12,8 @@ def create_address(
     state="NY",
     zipcode="12207",
     addr_line_1="123 Main St",
-    x=42.6680771,
-    y=-73.8518804,
+    x=-73.8518804,
+    y=42.6680771,
 ):
     fips_code = FipsState.objects.get(abbreviation=state)
 
@@ -47,8 +47,8 @@ def create_location(
     state="NY",
     zipcode="12207",
     addr_line_1="123 Main St",
-    x=42.6680771,
-    y=-73.8518804,
+    x=-73.8518804,
+    y=42.6680771,
     address_use="work",
 ):
     """
@@ -0,0 +1,157 @@
+import json
+import uuid
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .api_test_case import APITestCase
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+
+
+@override_settings(FHIR_RESOURCE_STORE=True)
+class BatchTestCase(APITestCase):
+    build_resource_store = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = create_organization(name="Batch Test Org", npi_value=1987654320)
+        cls.practitioners = [
+            create_practitioner(first_name="Batch", last_name=f"Practitioner{i}") for i in range(3)
+        ]
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse("api-root")
+
+    def batch(self, *urls, method="GET"):
+        return {
+            "resourceType": "Bundle",
+            "type": "batch",
+            "entry": [{"request": {"method": method, "url": url}} for url in urls],
+        }
+
+    def post(self, bundle, status=200):
+        response = self.client.post(
+            self.url, json.dumps(bundle), content_type="application/fhir+json"
+        )
+        self.assertEqual(response.status_code, status)
+        return response
+
+    def run_batch(self, *urls):
+        response = self.post(self.batch(*urls))
+        self.assertEqual(response["Content-Type"], "application/fhir+json")
+        bundle = json.loads(response.content)
+        self.assertEqual(bundle["resourceType"], "Bundle")
+        self.assertEqual(bundle["type"], "batch-response")
+        self.assertEqual(len(bundle["entry"]), len(urls))
+        return bundle["entry"]
+
+    def practitioner_url(self, practitioner):
+        return f"Practitioner/{practitioner.individual_id}"
+
+    def get(self, url, params=None):
+        response = self.client.get(f"/fhir/{url}", params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_reads_and_searches(self):
+        organization_url = f"Organization/{self.organization.id}"
+        search_url = "Organization?identifier=NPI|1987654320"
+        entries = self.run_batch(
+            self.practitioner_url(self.practitioners[0]), search_url, organization_url
+        )
+        self.assertEqual([entry["response"]["status"] for entry in entries], ["200 OK"] * 3)
+
+        read = self.get(self.practitioner_url(self.practitioners[0]))
+        self.assertEqual(entries[0]["resource"], json.loads(read.content))
+        self.assertEqual(entries[0]["response"]["etag"], read["ETag"])
+        self.assertEqual(entries[2]["resource"], json.loads(self.get(organization_url).content))
+
+        search = entries[1]["resource"]
+        self.assertEqual(search["type"], "searchset")
+        self.assertEqual(
+            [entry["resource"]["id"] for entry in search["entry"]], [str(self.organization.id)]
+        )
+        self.assertIn("etag", entries[1]["response"])
+
+    def test_absolute_urls(self):
+        practitioner = self.practitioners[1]
+        (entry,) = self.run_batch(
+            f"http://testserver/fhir/Practitioner/{practitioner.individual_id}"
+        )
+        self.assertEqual(entry["resource"]["id"], str(practitioner.individual_id))
+
+    def test_reads_are_grouped_by_resource_type(self):
+        with CaptureQueriesContext(connection) as one:
+            self.run_batch(self.practitioner_url(self.practitioners[0]))
+        with CaptureQueriesContext(connection) as three:
+            self.run_batch(
+                *[self.practitioner_url(practitioner) for practitioner in self.practitioners]
+            )
+        self.assertEqual(len(one), len(three))
+
+    @override_settings(FHIR_RESOURCE_STORE=False)
+    def test_reads_without_store(self):
+        entries = self.run_batch(
+            *[self.practitioner_url(practitioner) for practitioner in self.practitioners]
+        )
+        self.assertEqual(
+            [entry["resource"]["id"] for entry in entries],
+            [str(practitioner.individual_id) for practitioner in self.practitioners],
+        )
+
+    def test_json_accept_header(self):
+        url = self.practitioner_url(self.practitioners[0])
+        response = self.client.post(
+            self.url,
+            json.dumps(self.batch(url)),
+            content_type="application/fhir+json",
+            HTTP_ACCEPT="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/json")
+        (entry,) = json.loads(response.content)["entry"]
+        self.assertEqual(entry["resource"], json.loads(self.get(url).content))
+
+    def test_reads_with_parameters(self):
+        url = self.practitioner_url(self.practitioners[0])
+        (entry,) = self.run_batch(f"{url}?_elements=name")
+        self.assertEqual(
+            entry["resource"], json.loads(self.get(url, {"_elements": "name"}).content)
+        )
+
+    def test_failed_entries(self):
+        entries = self.run_batch(
+            f"Practitioner/{uuid.uuid4()}",
+            "Practitioner/not-an-id",
+            "Patient/123",
+            "Practitioner?_total=exact",
+            self.practitioner_url(self.practitioners[0]),
+        )
+        statuses = [entry["response"]["status"] for entry in entries]
+        self.assertEqual(
+            statuses,
+            ["404 Not Found", "404 Not Found", "404 Not Found", "400 Bad Request", "200 OK"],
+        )
+        for entry in entries[:-1]:
+            self.assertEqual(entry["resource"]["resourceType"], "OperationOutcome")
+
+    def test_only_get_entries_are_supported(self):
+        bundle = self.batch("Practitioner", method="POST")
+        (entry,) = json.loads(self.post(bundle).content)["entry"]
+        self.assertEqual(entry["response"]["status"], "405 Method Not Allowed")
+
+    def test_only_batches_are_accepted(self):
+        self.post({"resourceType": "Parameters"}, status=400)
+        self.post({**self.batch("Practitioner"), "type": "transaction"}, status=400)
+        with override_settings(FHIR_BATCH_MAX_ENTRIES=2):
+            self.post(self.batch("Practitioner", "Organization", "Location"), status=400)
+
+    def test_get_still_lists_resources(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Practitioner", json.loads(response.content))
@@ -0,0 +1,225 @@
+import gzip
+import json
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.test import APIClient
+
+from .. import bulk_export
+from ..models import ExportJob, Organization, Provider
+from ..views import RESOURCE_VIEWSETS, FHIRBulkExportFileView
+from .api_test_case import APITestCase
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+
+
+@override_settings(FHIR_RESOURCE_STORE=True)
+class BulkExportTestCase(APITestCase):
+    build_resource_store = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = create_organization(name="Export Test Org")
+        cls.practitioners = [
+            create_practitioner(first_name="Export", last_name=f"Practitioner{i}") for i in range(3)
+        ]
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        export_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(export_dir.cleanup)
+        settings_override = override_settings(FHIR_EXPORT_DIR=export_dir.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def kick_off(self, url=None, params=None):
+        response = self.client.get(
+            url or reverse("fhir-export"), params, HTTP_PREFER="respond-async"
+        )
+        self.assertEqual(response.status_code, 202)
+        return response["Content-Location"]
+
+    def run_worker(self):
+        call_command("runexportworker", "--once", "--chunk-size", "2", stdout=StringIO())
+
+    def get_manifest(self, status_url):
+        response = self.client.get(status_url)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def download(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/fhir+ndjson")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        return b"".join(response.streaming_content)
+
+    def read_resources(self, url):
+        lines = gzip.decompress(self.download(url)).decode().splitlines()
+        return [json.loads(line) for line in lines]
+
+    def test_kick_off_requires_respond_async(self):
+        response = self.client.get(reverse("fhir-export"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_kick_off_rejects_unsupported_parameters(self):
+        for params in [{"_outputFormat": "text/csv"}, {"_type": "Patient"}, {"_since": "2025"}]:
+            response = self.client.get(reverse("fhir-export"), params, HTTP_PREFER="respond-async")
+            self.assertEqual(response.status_code, 400)
+
+    def test_status_is_accepted_until_the_worker_runs(self):
+        status_url = self.kick_off()
+        response = self.client.get(status_url)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response["X-Progress"], "accepted")
+        self.assertIn("Retry-After", response)
+
+    def test_system_export(self):
+        status_url = self.kick_off()
+        self.run_worker()
+        manifest = self.get_manifest(status_url)
+
+        self.assertEqual(manifest["request"], "http://testserver/fhir/$export")
+        self.assertEqual(manifest["error"], [])
+        outputs = {output["type"]: output for output in manifest["output"]}
+        self.assertEqual(outputs["Practitioner"]["count"], Provider.objects.count())
+        self.assertEqual(outputs["Organization"]["count"], Organization.objects.count())
+
+        practitioners = self.read_resources(outputs["Practitioner"]["url"])
+        self.assertEqual(len(practitioners), outputs["Practitioner"]["count"])
+        ids = [practitioner["id"] for practitioner in practitioners]
+        self.assertEqual(ids, sorted(ids))
+
+        practitioner = self.practitioners[0]
+        url = reverse("fhir-practitioner-detail", args=[practitioner.individual_id])
+        served = json.loads(self.client.get(url).content)
+        self.assertIn(served, practitioners)
+
+    def test_type_export(self):
+        status_url = self.kick_off(
+            reverse("fhir-type-export", kwargs={"resource_type": "Organization"})
+        )
+        self.run_worker()
+        manifest = self.get_manifest(status_url)
+        self.assertEqual([output["type"] for output in manifest["output"]], ["Organization"])
+
+    def test_type_parameter(self):
+        status_url = self.kick_off(params={"_type": "Practitioner,Organization"})
+        self.run_worker()
+        manifest = self.get_manifest(status_url)
+        self.assertEqual(
+            [output["type"] for output in manifest["output"]], ["Practitioner", "Organization"]
+        )
+
+    @override_settings(FHIR_RESOURCE_STORE=False)
+    def test_export_without_store(self):
+        status_url = self.kick_off(params={"_type": "Practitioner"})
+        self.run_worker()
+        manifest = self.get_manifest(status_url)
+        practitioners = self.read_resources(manifest["output"][0]["url"])
+        self.assertEqual(len(practitioners), Provider.objects.count())
+
+    def test_range_requests(self):
+        status_url = self.kick_off(params={"_type": "Practitioner"})
+        self.run_worker()
+        url = self.get_manifest(status_url)["output"][0]["url"]
+        content = self.download(url)
+        size = len(content)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], f"bytes 10-19/{size}")
+        self.assertEqual(b"".join(response.streaming_content), content[10:20])
+
+        response = self.client.get(url, HTTP_RANGE="bytes=10-")
+        self.assertEqual(b"".join(response.streaming_content), content[10:])
+
+        response = self.client.get(url, HTTP_RANGE="bytes=-5")
+        self.assertEqual(b"".join(response.streaming_content), content[-5:])
+
+        response = self.client.get(url, HTTP_RANGE=f"bytes={size}-")
+        self.assertEqual(response.status_code, 416)
+
+        response = self.client.get(url, HTTP_RANGE="bytes=10-19", HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_download_accepts_ndjson(self):
+        status_url = self.kick_off(params={"_type": "Organization"})
+        self.run_worker()
+        url = self.get_manifest(status_url)["output"][0]["url"]
+        response = self.client.get(url, HTTP_ACCEPT="application/fhir+ndjson")
+        self.assertEqual(response.status_code, 200)
+
+    def test_download_requires_authentication(self):
+        status_url = self.kick_off(params={"_type": "Organization"})
+        self.run_worker()
+        url = self.get_manifest(status_url)["output"][0]["url"]
+        # as configured when REQUIRE_AUTHENTICATION is set
+        with mock.patch.object(FHIRBulkExportFileView, "permission_classes", [IsAuthenticated]):
+            self.assertEqual(APIClient().get(url).status_code, 401)
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_delete_removes_export(self):
+        status_url = self.kick_off(params={"_type": "Organization"})
+        self.run_worker()
+        file_url = self.get_manifest(status_url)["output"][0]["url"]
+
+        self.assertEqual(self.client.delete(status_url).status_code, 202)
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+        self.assertEqual(self.client.get(file_url).status_code, 404)
+        self.assertFalse(ExportJob.objects.exists())
+
+    def claim(self):
+        job = bulk_export.claim_job()
+        self.assertIsNotNone(job)
+        return job
+
+    def run_job(self, job):
+        return bulk_export.run_job(job, RESOURCE_VIEWSETS, chunk_size=2)
+
+    def expire_lease(self):
+        ExportJob.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def test_abandoned_job_is_restarted(self):
+        status_url = self.kick_off(params={"_type": "Organization"})
+        self.claim()
+        # a running job is left to its worker
+        self.assertIsNone(bulk_export.claim_job())
+
+        self.expire_lease()
+        self.run_worker()
+        self.assertEqual(self.get_manifest(status_url)["output"][0]["count"], 1)
+
+    def test_worker_stops_when_its_job_is_claimed_again(self):
+        self.kick_off(params={"_type": "Organization"})
+        abandoned = self.claim()
+        self.expire_lease()
+        job = self.claim()
+
+        self.assertEqual(self.run_job(abandoned), bulk_export.LOST)
+        self.assertEqual(self.run_job(job), bulk_export.COMPLETED)
+        self.assertEqual(
+            [path.name for path in bulk_export.get_export_dir(job.id).iterdir()],
+            ["Organization.ndjson.gz"],
+        )
+
+    def test_delete_while_running(self):
+        status_url = self.kick_off(params={"_type": "Organization"})
+        job = self.claim()
+        export_dir = bulk_export.get_export_dir(job.id)
+        export_dir.mkdir(parents=True)
+
+        self.assertEqual(self.client.delete(status_url).status_code, 202)
+        self.assertEqual(self.client.get(status_url).status_code, 404)
+        # the worker removes the files once it sees the job is gone
+        self.assertTrue(export_dir.exists())
+        self.assertEqual(self.run_job(job), bulk_export.CANCELLED)
+        self.assertFalse(export_dir.exists())
@@ -0,0 +1,156 @@
+import gzip
+import json
+import zlib
+from unittest import mock
+
+import brotli
+import zstandard
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from ..compression import ENCODINGS, choose_encoding
+from .api_test_case import APITestCase
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+
+DECOMPRESS = {
+    "gzip": gzip.decompress,
+    "br": brotli.decompress,
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+# incremental decompressors, which return what they can of a partial stream
+DECOMPRESSOR = {
+    "gzip": lambda: zlib.decompressobj(wbits=31).decompress,
+    "br": lambda: brotli.Decompressor().process,
+    "zstd": lambda: zstandard.ZstdDecompressor().decompressobj().decompress,
+}
+
+
+class ChooseEncodingTestCase(SimpleTestCase):
+    def test_prefers_zstd_then_br_then_gzip(self):
+        self.assertEqual(choose_encoding("gzip, br, zstd").name, "zstd")
+        self.assertEqual(choose_encoding("gzip, br").name, "br")
+        self.assertEqual(choose_encoding("gzip, deflate").name, "gzip")
+
+    def test_respects_qvalues(self):
+        self.assertEqual(choose_encoding("zstd;q=0.5, gzip;q=1.0").name, "gzip")
+        self.assertEqual(choose_encoding("br;q=0, gzip").name, "gzip")
+        self.assertEqual(choose_encoding("*;q=0.1, gzip;q=0").name, "zstd")
+
+    def test_no_acceptable_encoding(self):
+        self.assertIsNone(choose_encoding(""))
+        self.assertIsNone(choose_encoding("identity"))
+        self.assertIsNone(choose_encoding("deflate, gzip;q=0"))
+
+    def test_encodings_round_trip(self):
+        data = json.dumps([{"resourceType": "Practitioner", "id": i} for i in range(100)]).encode()
+        for name, encoding in ENCODINGS.items():
+            self.assertEqual(DECOMPRESS[name](encoding.compress(data)), data)
+            streamed = b"".join(encoding.compress_stream([data[:1000], data[1000:]]))
+            self.assertEqual(DECOMPRESS[name](streamed), data)
+
+    def test_stream_is_flushed_after_every_chunk(self):
+        chunks = [b'{"resourceType": "Bundle", "entry": [', b'{"id": 1}', b', {"id": 2}', b"]}"]
+        for name, encoding in ENCODINGS.items():
+            with self.subTest(name):
+                decompress = DECOMPRESSOR[name]()
+                stream = encoding.compress_stream(iter(chunks))
+                for chunk in chunks:
+                    self.assertEqual(decompress(next(stream)), chunk)
+
+
+@override_settings(FHIR_RESOURCE_STORE=True)
+class CompressionTestCase(APITestCase):
+    build_resource_store = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = create_organization(name="Compression Test Org")
+        for i in range(5):
+            create_practitioner(first_name="Compression", last_name=f"Practitioner{i}")
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.list_url = reverse("fhir-practitioner-list")
+
+    def get_compressed(self, encoding, params=None, **headers):
+        response = self.client.get(
+            self.list_url,
+            {"name": "Compression"} if params is None else params,
+            HTTP_ACCEPT_ENCODING=encoding,
+            **headers,
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_responses_are_compressed(self):
+        plain = self.client.get(self.list_url, {"name": "Compression"})
+        self.assertNotIn("Content-Encoding", plain)
+
+        for name in ENCODINGS:
+            response = self.get_compressed(name)
+            self.assertEqual(response["Content-Encoding"], name)
+            self.assertEqual(response["Content-Length"], str(len(response.content)))
+            self.assertEqual(DECOMPRESS[name](response.content), plain.content)
+
+    def test_vary_accept_encoding(self):
+        response = self.client.get(self.list_url)
+        self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_compressed_etag_is_weak(self):
+        plain = self.client.get(self.list_url)
+        response = self.get_compressed("gzip", {})
+        self.assertEqual(response["ETag"], f"W/{plain['ETag']}")
+
+        not_modified = self.client.get(
+            self.list_url, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_compressed_bodies_are_cached(self):
+        encoding = ENCODINGS["br"]
+        with mock.patch.object(encoding, "compress", wraps=encoding.compress) as compress:
+            first = self.get_compressed("br")
+            second = self.get_compressed("br")
+            self.assertEqual(compress.call_count, 1)
+            self.assertEqual(first.content, second.content)
+
+            self.get_compressed("br", {"name": "Compression", "page_size": 3})
+            self.assertEqual(compress.call_count, 2)
+
+    @override_settings(FHIR_COMPRESSION_CACHE_TIMEOUT=0)
+    def test_cache_can_be_disabled(self):
+        encoding = ENCODINGS["gzip"]
+        with mock.patch.object(encoding, "compress", wraps=encoding.compress) as compress:
+            self.get_compressed("gzip")
+            self.get_compressed("gzip")
+            self.assertEqual(compress.call_count, 2)
+
+    @override_settings(FHIR_STREAMING_PAGE_SIZE=2, FHIR_STREAMING_CHUNK_SIZE=2)
+    def test_streamed_responses_are_compressed(self):
+        params = {"name": "Compression", "page_size": 5}
+        with override_settings(FHIR_STREAMING_PAGE_SIZE=0):
+            plain = self.client.get(self.list_url, params)
+
+        response = self.get_compressed("zstd", params)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Encoding"], "zstd")
+        content = b"".join(response.streaming_content)
+        self.assertEqual(DECOMPRESS["zstd"](content), plain.content)
+
+    def test_small_responses_are_not_compressed(self):
+        url = reverse("fhir-organization-detail", args=[self.organization.id])
+        response = self.client.get(url, {"_elements": "name"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertLess(len(response.content), 512)
+        self.assertNotIn("Content-Encoding", response)
+
+    def test_only_fhir_responses_are_compressed(self):
+        response = self.client.get(reverse("schema"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        response = self.client.get(reverse("admin:login"), HTTP_ACCEPT_ENCODING="gzip")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Content-Encoding", response)
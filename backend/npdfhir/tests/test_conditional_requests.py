@@ -0,0 +1,116 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from ..dataset import get_dataset_version
+from ..models import FhirResource
+from .api_test_case import APITestCase
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+
+
+@override_settings(FHIR_RESOURCE_STORE=True)
+class ConditionalRequestTestCase(APITestCase):
+    build_resource_store = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = create_organization(name="Conditional Test Org")
+        cls.practitioner = create_practitioner(first_name="Conditional", last_name="Practitioner")
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.detail_url = reverse("fhir-organization-detail", args=[self.organization.id])
+        self.list_url = reverse("fhir-practitioner-list")
+
+    def test_read_has_version_headers(self):
+        response = self.client.get(self.detail_url)
+        generation = get_dataset_version("Organization").generation
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{generation}"')
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(json.loads(response.content)["meta"]["versionId"], str(generation))
+
+    def test_read_if_none_match_returns_304(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_read_if_modified_since_returns_304(self):
+        last_modified = self.client.get(self.detail_url)["Last-Modified"]
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_read_stale_etag_returns_200(self):
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_search_if_none_match_returns_304(self):
+        etag = self.client.get(self.list_url, {"name": "Conditional"})["ETag"]
+        response = self.client.get(self.list_url, {"name": "Conditional"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_search_etag_ignores_parameter_order(self):
+        first = self.client.get(self.list_url, {"name": "Conditional", "page_size": 5})
+        second = self.client.get(f"{self.list_url}?page_size=5&name=Conditional")
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_search_etag_depends_on_query(self):
+        first = self.client.get(self.list_url, {"name": "Conditional"})
+        second = self.client.get(self.list_url, {"name": "Other"})
+        self.assertNotEqual(first["ETag"], second["ETag"])
+
+    def test_search_etag_changes_with_dataset_version(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        create_practitioner(first_name="Newer", last_name="Practitioner")
+        call_command("refreshsearch", stdout=StringIO())
+
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_read_etag_changes_with_dataset_version(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        call_command("refreshsearch", stdout=StringIO())
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_reads_are_versioned_without_store(self):
+        stored = self.client.get(self.detail_url)
+        for overrides in [
+            {"FHIR_RESOURCE_STORE": False},
+            {"FHIR_RESOURCE_STORE": False, "FHIR_DATABASE_ENGINE_RESOURCES": ["Organization"]},
+        ]:
+            with self.subTest(**overrides), override_settings(**overrides):
+                response = self.client.get(self.detail_url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response["ETag"], stored["ETag"])
+                self.assertEqual(
+                    json.loads(response.content)["meta"], json.loads(stored.content)["meta"]
+                )
+
+                response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=stored["ETag"])
+                self.assertEqual(response.status_code, 304)
+                response = self.client.get(
+                    self.detail_url, HTTP_IF_MODIFIED_SINCE=stored["Last-Modified"]
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_read_falling_back_to_serializer_is_versioned(self):
+        FhirResource.objects.filter(resource_type="Organization").delete()
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content)["meta"]["versionId"],
+            str(get_dataset_version("Organization").generation),
+        )
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
@@ -0,0 +1,225 @@
+import json
+import uuid
+
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from ..database_engine import render_organizations, render_practitioners
+from ..models import (
+    FhirEmailUse,
+    FhirPhoneUse,
+    IndividualToEmail,
+    IndividualToName,
+    IndividualToPhone,
+    OrganizationToName,
+    OtherIdType,
+    Provider,
+    ProviderToTaxonomy,
+)
+from ..renderers import dumps
+from ..serializers import OrganizationSerializer, PractitionerSerializer
+from ..views import FHIROrganizationViewSet, FHIRPractitionerViewSet
+from .api_test_case import APITestCase
+from .fixtures.location import create_location
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+from .helpers import assert_fhir_response
+
+DATABASE_ENGINE = ["Practitioner", "Organization"]
+
+
+@override_settings(FHIR_RESOURCE_STORE=False)
+class DatabaseEngineTestCase(APITestCase):
+    """
+    The database engine must build the same documents as the serializers.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        location = create_location(name="Engine Test Location")
+        cls.practitioners = [
+            create_practitioner(
+                first_name="Engine",
+                last_name="Practitioner",
+                practitioner_types=["363L00000X", "364SP0200X"],
+                other_id="MEDICAID123",
+                location=location,
+            ),
+            create_practitioner(first_name="Bare", last_name="Practitioner"),
+        ]
+        individual = cls.practitioners[0].individual
+        IndividualToPhone.objects.create(
+            id=uuid.uuid4(),
+            individual=individual,
+            phone_number="5555550100",
+            extension="12",
+            phone_use=FhirPhoneUse.objects.get(value="work"),
+        )
+        IndividualToEmail.objects.create(
+            individual=individual,
+            email_address="engine@example.com",
+            email_use=FhirEmailUse.objects.get_or_create(value="work")[0],
+        )
+
+        parent = create_organization(name="Engine Parent Org", npi_value=1234567801)
+        create_location(organization=parent, name="Engine Parent Location")
+        organization = create_organization(
+            name="Engine Child Org",
+            parent_id=parent.id,
+            other_id_type=OtherIdType.objects.first(),
+        )
+        OrganizationToName.objects.create(
+            organization=organization, name="Engine Child Alias", is_primary=False
+        )
+        cls.organizations = [parent, organization, create_organization(name="Engine Bare Org")]
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.request = self.client.get(reverse("fhir-organization-list")).wsgi_request
+
+    def assert_documents_match(self, rendered, serialized):
+        self.assertEqual(set(rendered), {resource["id"] for resource in serialized})
+        for resource in serialized:
+            self.assertEqual(rendered[resource["id"]].content.decode(), dumps(resource).decode())
+
+    def test_practitioners_match_serializer(self):
+        ids = [str(provider.pk) for provider in self.practitioners]
+        serialized = PractitionerSerializer(
+            FHIRPractitionerViewSet.queryset.filter(pk__in=ids),
+            many=True,
+            context={"request": self.request},
+        ).data
+        self.assert_documents_match(render_practitioners(ids, self.request), serialized)
+
+    def test_organizations_match_serializer(self):
+        ids = [str(organization.pk) for organization in self.organizations]
+        serialized = OrganizationSerializer(
+            FHIROrganizationViewSet.queryset.filter(pk__in=ids),
+            many=True,
+            context={"request": self.request},
+        ).data
+        self.assert_documents_match(render_organizations(ids, self.request), serialized)
+
+    def assert_practitioner_matches(self, provider):
+        ids = [str(provider.pk)]
+        serialized = PractitionerSerializer(
+            FHIRPractitionerViewSet.queryset.filter(pk__in=ids),
+            many=True,
+            context={"request": self.request},
+        ).data
+        self.assert_documents_match(render_practitioners(ids, self.request), serialized)
+        return serialized[0]
+
+    def assert_organization_matches(self, organization):
+        ids = [str(organization.pk)]
+        serialized = OrganizationSerializer(
+            FHIROrganizationViewSet.queryset.filter(pk__in=ids),
+            many=True,
+            context={"request": self.request},
+        ).data
+        self.assert_documents_match(render_organizations(ids, self.request), serialized)
+        return serialized[0]
+
+    def test_lists_are_ordered_alike(self):
+        # created out of order, so neither side can rely on the insertion order
+        provider = create_practitioner(
+            first_name="Zed", last_name="Zulu", practitioner_types=["364SP0200X", "363L00000X"]
+        )
+        IndividualToName.objects.create(
+            individual=provider.individual,
+            first_name="Amy",
+            last_name="Alpha",
+            name_use=provider.individual.individualtoname_set.get().name_use,
+        )
+        practitioner = self.assert_practitioner_matches(provider)
+        self.assertEqual([name["family"] for name in practitioner["name"]], ["Alpha", "Zulu"])
+        self.assertEqual(
+            [
+                qualification["code"]["coding"][0]["code"]
+                for qualification in practitioner["qualification"]
+            ],
+            ["363L00000X", "364SP0200X"],
+        )
+
+    def test_aliases_are_the_names_other_than_the_primary_one(self):
+        organization = create_organization(name="Engine Mike Org")
+        for name, is_primary in [("Engine Zulu Org", True), ("Engine Alpha Org", False)]:
+            OrganizationToName.objects.create(
+                organization=organization, name=name, is_primary=is_primary
+            )
+        resource = self.assert_organization_matches(organization)
+        self.assertEqual(resource["name"], "Engine Mike Org")
+        self.assertEqual(resource["alias"], ["Engine Alpha Org", "Engine Zulu Org"])
+
+        organization.organizationtoname_set.update(is_primary=False)
+        resource = self.assert_organization_matches(organization)
+        self.assertEqual(resource["name"], "Engine Alpha Org")
+        self.assertEqual(resource["alias"], ["Engine Mike Org", "Engine Zulu Org"])
+
+    def test_taxonomy_without_nucc_code(self):
+        # a taxonomy code missing from the nucc table, as from a newer NUCC
+        # release than the one loaded
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "alter table provider_to_taxonomy drop constraint fk_provider_to_taxonomy_nucc_code"
+            )
+        provider = self.practitioners[1]
+        ProviderToTaxonomy.objects.create(npi=provider, nucc_code_id="999999999X", id=uuid.uuid4())
+        practitioner = self.assert_practitioner_matches(provider)
+        (qualification,) = practitioner["qualification"]
+        self.assertEqual(
+            qualification["code"]["coding"][0],
+            {"system": "http://nucc.org/provider-taxonomy", "code": "999999999X"},
+        )
+
+    def test_authorized_official_without_name(self):
+        organization = self.organizations[2]
+        organization.authorized_official.individualtoname_set.all().delete()
+        resource = self.assert_organization_matches(organization)
+        self.assertNotIn("name", resource["contact"][0])
+
+    def test_unknown_ids_are_omitted(self):
+        self.assertEqual(render_practitioners([str(uuid.uuid4())], self.request), {})
+
+    def assert_matches_serializers(self, url, params=None):
+        response = self.client.get(url, params)
+        assert_fhir_response(self, response)
+        with override_settings(FHIR_DATABASE_ENGINE_RESOURCES=DATABASE_ENGINE):
+            engine_response = self.client.get(url, params)
+        assert_fhir_response(self, engine_response)
+        self.assertEqual(
+            json.dumps(json.loads(engine_response.content)),
+            json.dumps(json.loads(response.content)),
+        )
+
+    def test_practitioner_list_matches_serializer(self):
+        self.assert_matches_serializers(reverse("fhir-practitioner-list"), {"name": "Practitioner"})
+
+    def test_practitioner_detail_matches_serializer(self):
+        practitioner = self.practitioners[0]
+        self.assert_matches_serializers(
+            reverse("fhir-practitioner-detail", args=[practitioner.individual_id])
+        )
+
+    def test_organization_list_matches_serializer(self):
+        self.assert_matches_serializers(reverse("fhir-organization-list"), {"name": "Engine"})
+
+    def test_organization_detail_matches_serializer(self):
+        organization = self.organizations[1]
+        self.assert_matches_serializers(reverse("fhir-organization-detail", args=[organization.id]))
+
+    @override_settings(FHIR_DATABASE_ENGINE_RESOURCES=DATABASE_ENGINE)
+    def test_missing_practitioner_returns_404(self):
+        response = self.client.get(reverse("fhir-practitioner-detail", args=[uuid.uuid4()]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(FHIR_DATABASE_ENGINE_RESOURCES=DATABASE_ENGINE)
+    def test_provider_without_name_is_rendered(self):
+        provider = Provider.objects.get(pk=self.practitioners[1].pk)
+        provider.individual.individualtoname_set.all().delete()
+        url = reverse("fhir-practitioner-detail", args=[provider.individual_id])
+        response = self.client.get(url)
+        assert_fhir_response(self, response)
+        self.assertEqual(response.data.to_dict()["name"], [])
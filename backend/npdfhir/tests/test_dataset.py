@@ -0,0 +1,70 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from ..dataset import bump_dataset_version, cache_by_version, get_dataset_version
+from .api_test_case import APITestCase
+from .fixtures.practitioner import create_practitioner
+
+
+class DatasetVersionTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        create_practitioner(first_name="Versioned", last_name="Practitioner")
+        return super().setUpTestData()
+
+    def generations(self):
+        return {
+            resource_type: get_dataset_version(resource_type).generation
+            for resource_type in ["Location", "Organization", "Practitioner"]
+        }
+
+    def test_bump_resource_types(self):
+        before = self.generations()
+        bump_dataset_version(["Practitioner"])
+        after = self.generations()
+        self.assertGreater(after.pop("Practitioner"), before.pop("Practitioner"))
+        self.assertEqual(after, before)
+
+    def test_bump_all_resource_types(self):
+        before = self.generations()
+        bump_dataset_version()
+        after = self.generations()
+        for resource_type, generation in before.items():
+            self.assertGreater(after[resource_type], generation)
+
+    def test_store_build_records_the_generation(self):
+        call_command("buildfhirstore", "--resource-type", "Practitioner", stdout=StringIO())
+        version = get_dataset_version("Practitioner")
+        self.assertEqual(version.store_generation, version.generation)
+
+        bump_dataset_version(["Practitioner"])
+        version = get_dataset_version("Practitioner")
+        self.assertLess(version.store_generation, version.generation)
+
+    @override_settings(FHIR_RESOURCE_STORE=False)
+    def test_search_etag_changes_with_dataset_version(self):
+        url = reverse("fhir-practitioner-list")
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        bump_dataset_version(["Practitioner"])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_cache_by_version(self):
+        loads = []
+
+        @cache_by_version("Organization")
+        def load():
+            loads.append(1)
+            return len(loads)
+
+        self.assertEqual((load(), load()), (1, 1))
+        bump_dataset_version(["Practitioner"])
+        self.assertEqual(load(), 1)
+        bump_dataset_version(["Organization"])
+        self.assertEqual(load(), 2)
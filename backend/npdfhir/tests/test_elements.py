@@ -0,0 +1,112 @@
+import json
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..elements import SUBSETTED_TAG
+from .api_test_case import APITestCase
+from .fixtures.endpoint import create_endpoint
+from .fixtures.location import create_location
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+from .helpers import assert_fhir_response
+
+
+@override_settings(FHIR_RESOURCE_STORE=True)
+class ElementsTestCase(APITestCase):
+    build_resource_store = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = create_organization(name="Elements Test Org", npi_value=1234567802)
+        cls.location = create_location(organization=cls.organization, name="Elements Location")
+        cls.practitioners = [
+            create_practitioner(
+                first_name="Elements",
+                last_name=f"Practitioner{i}",
+                practitioner_types=["363L00000X"],
+                location=cls.location,
+            )
+            for i in range(3)
+        ]
+        cls.endpoint = create_endpoint(name="Elements Endpoint")
+        return super().setUpTestData()
+
+    def get_resource(self, url, params):
+        response = self.client.get(url, params)
+        assert_fhir_response(self, response)
+        return json.loads(response.content)
+
+    def get_entries(self, url, params):
+        bundle = self.get_resource(url, params)["results"]
+        return [entry["resource"] for entry in bundle["entry"]]
+
+    def practitioner_url(self):
+        return reverse("fhir-practitioner-detail", args=[self.practitioners[0].individual_id])
+
+    def test_elements_returns_requested_elements(self):
+        practitioner = self.get_resource(self.practitioner_url(), {"_elements": "name"})
+        self.assertEqual(list(practitioner), ["resourceType", "id", "meta", "name"])
+        self.assertIn(SUBSETTED_TAG, practitioner["meta"]["tag"])
+
+    def test_elements_accepts_several_elements(self):
+        practitioner = self.get_resource(self.practitioner_url(), {"_elements": "name,address"})
+        self.assertEqual(list(practitioner), ["resourceType", "id", "meta", "name", "address"])
+
+    def test_summary_true_returns_summary_elements(self):
+        practitioner = self.get_resource(self.practitioner_url(), {"_summary": "true"})
+        self.assertIn("identifier", practitioner)
+        self.assertIn("name", practitioner)
+        self.assertNotIn("qualification", practitioner)
+
+    def test_summary_text_returns_mandatory_elements(self):
+        practitioner = self.get_resource(self.practitioner_url(), {"_summary": "text"})
+        self.assertEqual(list(practitioner), ["resourceType", "id", "meta"])
+
+    def test_summary_data_returns_whole_resource(self):
+        full = self.get_resource(self.practitioner_url(), {})
+        self.assertEqual(self.get_resource(self.practitioner_url(), {"_summary": "data"}), full)
+
+    def test_invalid_summary_returns_400(self):
+        response = self.client.get(self.practitioner_url(), {"_summary": "everything"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_mandatory_elements_are_always_returned(self):
+        url = reverse("fhir-endpoint-detail", args=[self.endpoint.endpoint_instance_id])
+        endpoint = self.get_resource(url, {"_elements": "name"})
+        for element in ["status", "connectionType", "payloadType", "address", "name"]:
+            self.assertIn(element, endpoint)
+        self.assertNotIn("identifier", endpoint)
+
+    def test_stored_and_serialized_subsets_match(self):
+        for url, params in [
+            (reverse("fhir-practitioner-list"), {"_elements": "name,telecom"}),
+            (reverse("fhir-organization-list"), {"_summary": "true"}),
+            (reverse("fhir-location-list"), {"_elements": "managingOrganization"}),
+            (reverse("fhir-endpoint-list"), {"_elements": "identifier"}),
+            (reverse("fhir-practitionerrole-list"), {"_elements": "practitioner"}),
+        ]:
+            stored = self.get_entries(url, params)
+            with override_settings(FHIR_RESOURCE_STORE=False):
+                serialized = self.get_entries(url, params)
+            self.assertEqual(stored, serialized)
+
+    def test_read_etag_depends_on_elements(self):
+        full = self.client.get(self.practitioner_url())
+        subset = self.client.get(self.practitioner_url(), {"_elements": "name"})
+        self.assertNotEqual(full["ETag"], subset["ETag"])
+
+    @override_settings(FHIR_RESOURCE_STORE=False)
+    def test_narrow_search_skips_prefetches(self):
+        url = reverse("fhir-practitioner-list")
+        with CaptureQueriesContext(connection) as full:
+            self.client.get(url, {"name": "Elements"})
+        with CaptureQueriesContext(connection) as narrow:
+            entries = self.get_entries(url, {"name": "Elements", "_elements": "name"})
+
+        self.assertEqual(len(entries), 3)
+        self.assertLess(len(narrow), len(full))
+        self.assertFalse(any("provider_to_taxonomy" in query["sql"] for query in narrow))
+        self.assertFalse(any("individual_to_address" in query["sql"] for query in narrow))
@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from fhir.resources.R4B.bundle import Bundle
 from rest_framework import status
@@ -130,6 +132,26 @@ class EndpointViewSetTestCase(APITestCase):
             self.assertIn("name", endpoint)
             self.assertIn("Kansas City Psychiatric Group", endpoint["name"])
 
+    def test_filter_by_partial_name_ignores_case(self):
+        response = self.client.get(self.list_url, {"name": "psychiatric GROUP"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("Kansas City Psychiatric Group", extract_resource_names(response))
+
+    def test_filter_by_name_escapes_wildcards(self):
+        response = self.client.get(self.list_url, {"name": "Kansas%Group"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]["entry"]), 0)
+
+    def test_filter_by_name_uses_ilike(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.list_url, {"name": "Psychiatric"})
+
+        sql = "\n".join(query["sql"] for query in queries)
+        self.assertIn('"endpoint_instance"."name" ILIKE', sql)
+        self.assertNotIn('UPPER("endpoint_instance"."name"', sql)
+
     def test_filter_by_connection_type(self):
         connection_type = "hl7-fhir-rest"
         response = self.client.get(self.list_url, {"endpoint_connection_type": connection_type})
@@ -193,4 +215,3 @@ class EndpointViewSetTestCase(APITestCase):
         response = self.client.get(detail_url)
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
-
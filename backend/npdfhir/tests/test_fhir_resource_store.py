@@ -0,0 +1,143 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from ..dataset import bump_dataset_version, get_dataset_version
+from ..models import FhirResource, Location
+from ..store import finish_build, is_store_current, start_build
+from .api_test_case import APITestCase
+from .fixtures.location import create_location
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_full_practitionerrole, create_practitioner
+from .helpers import assert_fhir_response
+
+
+@override_settings(FHIR_RESOURCE_STORE=True)
+class FHIRResourceStoreTestCase(APITestCase):
+    build_resource_store = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = create_organization(name="Store Test Org", npi_value=1234567893)
+        cls.location = create_location(organization=cls.organization, name="Store Test Location")
+        cls.practitioner = create_practitioner(first_name="Store", last_name="Practitioner")
+        cls.role = create_full_practitionerrole()
+        return super().setUpTestData()
+
+    def get_json(self, url):
+        response = self.client.get(url)
+        assert_fhir_response(self, response)
+        return json.loads(response.content)
+
+    def assert_matches_serializers(self, url):
+        stored = self.get_json(url)
+        with override_settings(FHIR_RESOURCE_STORE=False):
+            serialized = self.get_json(url)
+        self.assertEqual(json.dumps(stored), json.dumps(serialized))
+
+    def test_store_is_populated(self):
+        for resource_type in ["Practitioner", "Organization", "Location", "PractitionerRole"]:
+            self.assertTrue(FhirResource.objects.filter(resource_type=resource_type).exists())
+
+    def test_rebuild_skips_current_resource_types(self):
+        out = StringIO()
+        call_command("buildfhirstore", "--resource-type", "Organization", stdout=out)
+        self.assertEqual(out.getvalue(), "Organization: up to date\n")
+
+    def test_rebuild_skips_unchanged_documents(self):
+        out = StringIO()
+        call_command("buildfhirstore", "--resource-type", "Organization", "--force", stdout=out)
+        self.assertIn("wrote 0", out.getvalue())
+
+    def test_store_is_not_served_after_a_load(self):
+        FhirResource.objects.filter(resource_type="Location", resource_id=self.location.id).update(
+            content=json.dumps(
+                {"resourceType": "Location", "id": str(self.location.id), "name": "Stored"}
+            ),
+            content_hash="stale",
+        )
+        url = reverse("fhir-location-detail", args=[self.location.id])
+        self.assertEqual(self.get_json(url)["name"], "Stored")
+
+        # as each load does
+        bump_dataset_version(["Location"])
+        self.assertFalse(is_store_current("Location"))
+        self.assertTrue(is_store_current("Organization"))
+        self.assertEqual(self.get_json(url)["name"], "Store Test Location")
+
+        call_command("buildfhirstore", "--resource-type", "Location", stdout=StringIO())
+        self.assertTrue(is_store_current("Location"))
+        self.assert_matches_serializers(url)
+
+    def test_store_is_not_current_after_a_load_during_its_build(self):
+        generation = start_build("Location")
+        self.assertFalse(is_store_current("Location"))
+        bump_dataset_version(["Location"])
+        self.assertFalse(finish_build("Location", generation))
+        self.assertFalse(is_store_current("Location"))
+
+    def test_stored_practitioner_matches_serializer(self):
+        url = reverse("fhir-practitioner-detail", args=[self.practitioner.individual.id])
+        self.assert_matches_serializers(url)
+
+    def test_stored_organization_matches_serializer(self):
+        url = reverse("fhir-organization-detail", args=[self.organization.id])
+        self.assert_matches_serializers(url)
+
+    def test_stored_location_matches_serializer(self):
+        url = reverse("fhir-location-detail", args=[self.location.id])
+        self.assert_matches_serializers(url)
+
+    def test_stored_practitionerrole_matches_serializer(self):
+        url = reverse("fhir-practitionerrole-detail", args=[self.role.id])
+        self.assert_matches_serializers(url)
+
+    def test_stored_list_matches_serializer(self):
+        self.assert_matches_serializers(reverse("fhir-organization-list"))
+
+    def test_references_use_request_host(self):
+        url = reverse("fhir-location-detail", args=[self.location.id])
+        location = self.get_json(url)
+        self.assertTrue(
+            location["managingOrganization"]["reference"].startswith("http://testserver/fhir/")
+        )
+
+    def test_stored_document_is_served(self):
+        content = json.dumps(
+            {"resourceType": "Location", "id": str(self.location.id), "name": "Stored"}
+        )
+        FhirResource.objects.filter(resource_type="Location", resource_id=self.location.id).update(
+            content=content
+        )
+
+        url = reverse("fhir-location-detail", args=[self.location.id])
+        self.assertEqual(self.get_json(url)["name"], "Stored")
+
+    def test_stored_documents_have_versions(self):
+        url = reverse("fhir-organization-detail", args=[self.organization.id])
+        meta = self.get_json(url)["meta"]
+        self.assertEqual(meta["versionId"], str(get_dataset_version("Organization").generation))
+        self.assertIn("lastUpdated", meta)
+        self.assertIn("profile", meta)
+
+    def test_missing_documents_fall_back_to_serializer(self):
+        FhirResource.objects.filter(resource_type="Organization").delete()
+        url = reverse("fhir-organization-detail", args=[self.organization.id])
+        self.assertEqual(self.get_json(url)["id"], str(self.organization.id))
+
+    def test_documents_of_deleted_rows_are_not_served(self):
+        location = create_location(name="Deleted Store Location")
+        bump_dataset_version(["Location"])
+        call_command("buildfhirstore", "--resource-type", "Location", stdout=StringIO())
+        url = reverse("fhir-location-detail", args=[location.id])
+        etag = self.client.get(url)["ETag"]
+
+        Location.objects.filter(pk=location.pk).delete()
+        self.assertTrue(
+            FhirResource.objects.filter(resource_type="Location", resource_id=location.id).exists()
+        )
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
@@ -0,0 +1,120 @@
+import json
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .api_test_case import APITestCase
+from .fixtures.practitioner import create_full_practitionerrole
+from .helpers import assert_fhir_response
+
+
+@override_settings(FHIR_RESOURCE_STORE=True)
+class IncludesTestCase(APITestCase):
+    build_resource_store = True
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.roles = [
+            create_full_practitionerrole(
+                first_name="Include",
+                last_name=f"Practitioner{i}",
+                org_name=f"Include Test Org {i}",
+            )
+            for i in range(3)
+        ]
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.role_url = reverse("fhir-practitionerrole-list")
+        self.practitioner_url = reverse("fhir-practitioner-list")
+
+    def get_bundle(self, url, params):
+        response = self.client.get(url, params)
+        assert_fhir_response(self, response)
+        return json.loads(response.content)["results"]
+
+    def role_params(self, **params):
+        return {"practitioner_name": "Include", **params}
+
+    def split_entries(self, bundle):
+        matches = [entry for entry in bundle["entry"] if entry["search"]["mode"] == "match"]
+        included = [entry for entry in bundle["entry"] if entry["search"]["mode"] == "include"]
+        return matches, included
+
+    def test_include_adds_referenced_resources(self):
+        bundle = self.get_bundle(
+            self.role_url,
+            self.role_params(
+                _include=[
+                    "PractitionerRole:practitioner",
+                    "PractitionerRole:organization",
+                    "PractitionerRole:location",
+                ]
+            ),
+        )
+        matches, included = self.split_entries(bundle)
+        self.assertEqual(bundle["total"], len(matches))
+        self.assertEqual(len(matches), 3)
+
+        included_urls = {entry["fullUrl"] for entry in included}
+        for entry in matches:
+            role = entry["resource"]
+            self.assertIn(role["practitioner"]["reference"], included_urls)
+            self.assertIn(role["organization"]["reference"], included_urls)
+            self.assertIn(role["location"][0]["reference"], included_urls)
+        self.assertEqual(len(included), 9)
+
+    def test_included_resources_match_reads(self):
+        bundle = self.get_bundle(
+            self.role_url, self.role_params(_include="PractitionerRole:practitioner")
+        )
+        _, included = self.split_entries(bundle)
+        for entry in included:
+            self.assertEqual(
+                entry["resource"], json.loads(self.client.get(entry["fullUrl"]).content)
+            )
+
+    def test_revinclude_adds_referencing_roles(self):
+        bundle = self.get_bundle(
+            self.practitioner_url,
+            {"name": "Include", "_revinclude": "PractitionerRole:practitioner"},
+        )
+        matches, included = self.split_entries(bundle)
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(
+            sorted(entry["resource"]["id"] for entry in included),
+            sorted(str(role.id) for role in self.roles),
+        )
+
+    def test_includes_are_batched(self):
+        params = self.role_params(page_size=1)
+        with CaptureQueriesContext(connection) as one:
+            self.client.get(self.role_url, {**params, "_include": "PractitionerRole:organization"})
+        params = self.role_params(page_size=3)
+        with CaptureQueriesContext(connection) as three:
+            self.client.get(self.role_url, {**params, "_include": "PractitionerRole:organization"})
+        self.assertEqual(len(one), len(three))
+
+    @override_settings(FHIR_RESOURCE_STORE=False)
+    def test_include_without_store(self):
+        bundle = self.get_bundle(
+            self.role_url, self.role_params(_include="PractitionerRole:location")
+        )
+        _, included = self.split_entries(bundle)
+        self.assertEqual({entry["resource"]["resourceType"] for entry in included}, {"Location"})
+        self.assertEqual(len(included), 3)
+
+    def test_no_search_mode_without_includes(self):
+        bundle = self.get_bundle(self.role_url, self.role_params())
+        self.assertTrue(all("search" not in entry for entry in bundle["entry"]))
+
+    def test_unsupported_include_returns_400(self):
+        for url, params in [
+            (self.role_url, {"_include": "PractitionerRole:endpoint"}),
+            (self.practitioner_url, {"_include": "PractitionerRole:practitioner"}),
+            (reverse("fhir-organization-list"), {"_revinclude": "Location:organization"}),
+        ]:
+            self.assertEqual(self.client.get(url, params).status_code, 400)
@@ -36,8 +36,8 @@ class LocationViewSetTestCase(APITestCase):
                 state="CA",
                 zipcode="55555",
                 addr_line_1="404 Great Amazing Avenue",
-                x=32.824056,
-                y=-117.437397,
+                x=-117.437397,
+                y=32.824056,
             ),
             create_location(
                 id="7c7a433b-fca7-4fb2-9283-dc764fb0ed5c",
@@ -48,8 +48,8 @@ class LocationViewSetTestCase(APITestCase):
                 zipcode="77777",
                 addr_line_1="333 Grunge Blvd.",
                 address_use="home",
-                x=47.608597,
-                y=-122.5046021,
+                x=-122.5046021,
+                y=47.608597,
             ),
             create_location(
                 id="6df24407-ebe0-4f0b-9a75-bdfee486f0df",
@@ -59,8 +59,8 @@ class LocationViewSetTestCase(APITestCase):
                 state="MO",
                 zipcode="89898",
                 addr_line_1="66 Arch Lane",
-                x=38.6219297,
-                y=-90.182935,
+                x=-90.182935,
+                y=38.6219297,
             ),
             create_location(
                 id="c1fc1ada-841a-4b92-9e8e-37f4d17b65d4",
@@ -70,8 +70,8 @@ class LocationViewSetTestCase(APITestCase):
                 state="MO",
                 zipcode="65313",
                 addr_line_1="City Museum Rd.",
-                x=38.6336745,
-                y=-90.2032725,
+                x=-90.2032725,
+                y=38.6336745,
             ),
             create_location(
                 id="b7517cc7-b406-4932-9856-6983ac4ec308",
@@ -81,8 +81,8 @@ class LocationViewSetTestCase(APITestCase):
                 state="FL",
                 zipcode="43433",
                 addr_line_1="789 Palmetto Road",
-                x=26.1412097,
-                y=-80.191004,
+                x=-80.191004,
+                y=26.1412097,
             ),
             create_location(
                 name="A & B HEALTH CARE, INC.", organization=cls.orgs[0], x=None, y=None
@@ -431,9 +431,9 @@ class LocationViewSetTestCase(APITestCase):
             self.assertIn(use_search, location_entry["address"]["use"])
 
     def test_filter_by_distance_with_km(self):
-        lat = -90.194315
-        lon = 38.629267
-        location = (lon, lat)
+        lat = 38.629267
+        lon = -90.194315
+        location = (lat, lon)
         distance = 3
         units = "km"
         near_query = f"{lat}|{lon}|{distance}|{units}"
@@ -446,15 +446,15 @@ class LocationViewSetTestCase(APITestCase):
 
         for entry in bundle["entry"]:
             position = (
-                entry["resource"]["position"]["longitude"],
                 entry["resource"]["position"]["latitude"],
+                entry["resource"]["position"]["longitude"],
             )
             self.assertLessEqual(geodesic(location, position).km, distance)
 
     def test_filter_by_distance_with_mi(self):
-        lat = -90.194315
-        lon = 38.629267
-        location = (lon, lat)
+        lat = 38.629267
+        lon = -90.194315
+        location = (lat, lon)
         distance = 1
         units = "mi"
         near_query = f"{lat}|{lon}|{distance}|{units}"
@@ -467,15 +467,15 @@ class LocationViewSetTestCase(APITestCase):
 
         for entry in bundle["entry"]:
             position = (
-                entry["resource"]["position"]["longitude"],
                 entry["resource"]["position"]["latitude"],
+                entry["resource"]["position"]["longitude"],
             )
             self.assertLessEqual(geodesic(location, position).miles, distance)
 
     def test_filter_by_distance_with_ft(self):
-        lat = -90.194315
-        lon = 38.629267
-        location = (lon, lat)
+        lat = 38.629267
+        lon = -90.194315
+        location = (lat, lon)
         distance = 5000
         units = "ft"
         near_query = f"{lat}|{lon}|{distance}|{units}"
@@ -488,15 +488,15 @@ class LocationViewSetTestCase(APITestCase):
 
         for entry in bundle["entry"]:
             position = (
-                entry["resource"]["position"]["longitude"],
                 entry["resource"]["position"]["latitude"],
+                entry["resource"]["position"]["longitude"],
             )
             self.assertLessEqual(geodesic(location, position).feet, distance)
 
     def test_filter_by_distance_witout_units(self):
-        lat = -90.194315
-        lon = 38.629267
-        location = (lon, lat)
+        lat = 38.629267
+        lon = -90.194315
+        location = (lat, lon)
         distance = 3
         near_query = f"{lat}|{lon}|{distance}"
         url = reverse("fhir-location-list")
@@ -508,8 +508,8 @@ class LocationViewSetTestCase(APITestCase):
 
         for entry in bundle["entry"]:
             position = (
-                entry["resource"]["position"]["longitude"],
                 entry["resource"]["position"]["latitude"],
+                entry["resource"]["position"]["longitude"],
             )
             self.assertLessEqual(geodesic(location, position).km, distance)
 
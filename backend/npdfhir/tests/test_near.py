@@ -0,0 +1,106 @@
+from django.urls import reverse
+from rest_framework import status
+
+from .api_test_case import APITestCase
+from .fixtures.location import create_location
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+from .helpers import extract_resource_ids
+
+# the Gateway Arch, St. Louis, as [latitude]|[longitude]
+POINT = "38.624691|-90.184776"
+DISTANCE_URL = "http://hl7.org/fhir/StructureDefinition/location-distance"
+
+
+class NearSearchTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.near_organization = create_organization(name="Near Search Org")
+        cls.far_organization = create_organization(name="Far Search Org")
+        # about 1 km and 5 km west of the point, and Kansas City
+        cls.near_location = create_location(
+            name="Near Search Clinic",
+            organization=cls.near_organization,
+            city="St. Louis",
+            state="MO",
+            zipcode="63103",
+            x=-90.196,
+            y=38.6247,
+        )
+        cls.farther_location = create_location(
+            name="Farther Search Clinic", organization=cls.near_organization, x=-90.242, y=38.6247
+        )
+        cls.far_location = create_location(
+            name="Far Search Clinic", organization=cls.far_organization, x=-94.578, y=39.0997
+        )
+        cls.practitioner = create_practitioner(last_name="Nearsearch", location=cls.near_location)
+        create_practitioner(last_name="Farsearch", location=cls.far_location)
+        return super().setUpTestData()
+
+    def search(self, resource, params):
+        return self.client.get(reverse(f"fhir-{resource}-list"), params)
+
+    def test_location_sort_by_distance(self):
+        response = self.search("location", {"near": f"{POINT}|10", "_sort": "near"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            extract_resource_ids(response),
+            [str(self.near_location.id), str(self.farther_location.id)],
+        )
+
+        response = self.search("location", {"near": f"{POINT}|10", "_sort": "-near"})
+        self.assertEqual(
+            extract_resource_ids(response),
+            [str(self.farther_location.id), str(self.near_location.id)],
+        )
+
+    def test_distance_search_extension(self):
+        response = self.search("location", {"near": f"{POINT}|10|mi", "_sort": "near"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        entry = response.data["results"]["entry"][0]
+        (extension,) = entry["search"]["extension"]
+        self.assertEqual(extension["url"], DISTANCE_URL)
+        distance = extension["valueDistance"]
+        self.assertEqual(distance["code"], "km")
+        self.assertAlmostEqual(distance["value"], 1.0, delta=0.1)
+
+    def test_no_distance_without_near(self):
+        response = self.search("location", {"name": "Search Clinic"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for entry in response.data["results"]["entry"]:
+            self.assertNotIn("search", entry)
+
+    def test_sort_by_near_requires_near(self):
+        response = self.search("location", {"_sort": "near"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_practitioner_near(self):
+        response = self.search("practitioner", {"near": f"{POINT}|5", "_sort": "near"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(extract_resource_ids(response), [str(self.practitioner.individual_id)])
+
+    def test_organization_near(self):
+        response = self.search("organization", {"near": f"{POINT}|10"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(extract_resource_ids(response), [str(self.near_organization.id)])
+
+        entry = response.data["results"]["entry"][0]
+        # the distance of the organization's closest address
+        (extension,) = entry["search"]["extension"]
+        self.assertAlmostEqual(extension["valueDistance"]["value"], 1.0, delta=0.1)
+
+    def test_near_zip(self):
+        response = self.search("location", {"near": "63103|2|mi", "_sort": "near"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(extract_resource_ids(response), [str(self.near_location.id)])
+
+    def test_near_city(self):
+        response = self.search("location", {"near": "st. louis,mo|10"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(extract_resource_ids(response), [str(self.near_location.id)])
+
+    def test_near_unknown_zip(self):
+        response = self.search("location", {"near": "00000|10|mi"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(extract_resource_ids(response), [])
@@ -0,0 +1,92 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .api_test_case import APITestCase
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_full_practitionerrole, create_practitioner
+from .helpers import extract_resource_ids
+
+
+class OrValuesTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.practitioners = [
+            create_practitioner(
+                first_name="Either",
+                last_name=f"Practitioner{i}",
+                gender=gender,
+                npi_value=1555555550 + i,
+                other_id=f"OR-VALUES-{i}",
+            )
+            for i, gender in enumerate(["F", "M", "O"])
+        ]
+        cls.organizations = [
+            create_organization(name=f"Either Org {i}", npi_value=1666666660 + i) for i in range(3)
+        ]
+        cls.roles = [
+            create_full_practitionerrole(
+                first_name="Eitherrole",
+                last_name=f"Role{i}",
+                role_code=code,
+                org_name="Either Role Org",
+            )
+            for i, code in enumerate(["ORA", "ORB", "ORC"])
+        ]
+        return super().setUpTestData()
+
+    def get_ids(self, url_name, params):
+        response = self.client.get(reverse(url_name), {"page_size": 100, **params})
+        self.assertEqual(response.status_code, 200)
+        return sorted(extract_resource_ids(response))
+
+    def test_id_lists(self):
+        practitioners = self.practitioners[:2]
+        ids = [str(practitioner.individual_id) for practitioner in practitioners]
+        self.assertEqual(
+            self.get_ids("fhir-practitioner-list", {"_id": ",".join(ids)}), sorted(ids)
+        )
+
+        ids = [str(organization.id) for organization in self.organizations]
+        self.assertEqual(
+            self.get_ids("fhir-organization-list", {"_id": ",".join(ids)}), sorted(ids)
+        )
+
+        ids = [str(role.id) for role in self.roles[1:]]
+        self.assertEqual(
+            self.get_ids("fhir-practitionerrole-list", {"_id": ",".join(ids)}), sorted(ids)
+        )
+
+    def test_id_list_is_one_query(self):
+        ids = ",".join(str(practitioner.individual_id) for practitioner in self.practitioners)
+        with CaptureQueriesContext(connection) as queries:
+            self.get_ids("fhir-practitioner-list", {"_id": ids, "_total": "none"})
+        (search,) = [query["sql"] for query in queries if "keyset_0" in query["sql"]]
+        self.assertEqual(search.count('"provider"."individual_id" IN ('), 1)
+
+    def test_invalid_id_returns_400(self):
+        response = self.client.get(reverse("fhir-practitioner-list"), {"_id": "abc,def"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_identifier_lists(self):
+        ids = self.get_ids("fhir-practitioner-list", {"identifier": "NPI|1555555550,OR-VALUES-2"})
+        self.assertEqual(
+            ids,
+            sorted(str(self.practitioners[i].individual_id) for i in [0, 2]),
+        )
+
+        ids = self.get_ids("fhir-organization-list", {"identifier": "1666666661,NPI|1666666662"})
+        self.assertEqual(ids, sorted(str(self.organizations[i].id) for i in [1, 2]))
+
+    def test_token_lists(self):
+        ids = self.get_ids("fhir-practitioner-list", {"name": "Either", "gender": "Female,Other"})
+        self.assertEqual(ids, sorted(str(self.practitioners[i].individual_id) for i in [0, 2]))
+
+        ids = self.get_ids(
+            "fhir-practitionerrole-list", {"practitioner_name": "Eitherrole", "role": "ora,ORC"}
+        )
+        self.assertEqual(ids, sorted(str(self.roles[i].id) for i in [0, 2]))
+
+    def test_invalid_choice_in_list_returns_400(self):
+        response = self.client.get(reverse("fhir-practitioner-list"), {"gender": "Female,Unknown"})
+        self.assertEqual(response.status_code, 400)
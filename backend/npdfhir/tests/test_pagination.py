@@ -0,0 +1,128 @@
+import json
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .api_test_case import APITestCase
+from .fixtures.endpoint import create_endpoint
+from .fixtures.practitioner import create_practitioner
+from .helpers import assert_fhir_response
+
+
+class CursorPaginationTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # repeated names make the primary key the tie-breaker
+        for first_name in ["Ann", "Ann", "Ann", "Bob", "Cy", "Cy", "Dee"]:
+            create_practitioner(first_name=first_name, last_name="Cursor")
+        for name in ["Alpha", None, "Beta", "Beta", None, "Gamma"]:
+            create_endpoint(name=name)
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        self.practitioner_url = reverse("fhir-practitioner-list")
+        self.endpoint_url = reverse("fhir-endpoint-list")
+
+    def get_page(self, url, params=None):
+        response = self.client.get(url, params)
+        assert_fhir_response(self, response)
+        if response.streaming:
+            return json.loads(b"".join(response.streaming_content))
+        return json.loads(response.content)
+
+    def get_ids(self, page):
+        return [entry["resource"]["id"] for entry in page["results"]["entry"]]
+
+    def walk(self, url, params, link="next"):
+        """
+        Follow the next (or previous) links from the first page, returning the
+        ids on each page.
+        """
+        pages = []
+        page = self.get_page(url, params)
+        while True:
+            pages.append(self.get_ids(page))
+            if page[link] is None:
+                return pages, page
+            page = self.get_page(page[link])
+
+    def all_ids(self, url, params):
+        return self.get_ids(self.get_page(url, {**params, "page_size": 1000}))
+
+    def test_cursor_pages_match_page_number_order(self):
+        for url, params in [
+            (self.practitioner_url, {"name": "Cursor"}),
+            (
+                self.practitioner_url,
+                {"name": "Cursor", "_sort": "-individual__individualtoname__first_name"},
+            ),
+            (self.endpoint_url, {}),
+            (self.endpoint_url, {"_sort": "-name"}),
+        ]:
+            pages, _ = self.walk(url, {**params, "page_size": 2})
+            ids = [id for page in pages for id in page]
+            self.assertEqual(ids, self.all_ids(url, params))
+            page_numbered = self.get_page(url, {**params, "page": 1, "page_size": 1000})
+            self.assertEqual(sorted(ids), sorted(self.get_ids(page_numbered)))
+            self.assertTrue(all(len(page) == 2 for page in pages[:-1]))
+
+    def test_previous_links_walk_back(self):
+        params = {"name": "Cursor", "page_size": 2}
+        forward, last_page = self.walk(self.practitioner_url, params)
+        backward, first_page = self.walk(last_page["previous"], None, link="previous")
+        self.assertEqual(backward[::-1], forward[:-1])
+        self.assertIsNotNone(first_page["next"])
+
+    def test_bundle_links(self):
+        page = self.get_page(self.practitioner_url, {"name": "Cursor", "page_size": 2})
+        links = {link["relation"]: link["url"] for link in page["results"]["link"]}
+        self.assertEqual(set(links), {"self", "next"})
+        self.assertEqual(links["next"], page["next"])
+        self.assertNotIn("count", page)
+
+        page = self.get_page(page["next"])
+        links = {link["relation"]: link["url"] for link in page["results"]["link"]}
+        self.assertEqual(set(links), {"self", "next", "previous"})
+
+    def test_page_numbers_are_still_supported(self):
+        page = self.get_page(self.practitioner_url, {"name": "Cursor", "page_size": 2, "page": 2})
+        self.assertEqual(page["count"], 7)
+        self.assertIn("page=3", page["next"])
+        relations = [link["relation"] for link in page["results"]["link"]]
+        self.assertEqual(relations, ["self", "next", "previous"])
+
+    def test_deep_pages_do_not_count_or_offset(self):
+        pages, _ = self.walk(self.practitioner_url, {"name": "Cursor", "page_size": 2})
+        page = self.get_page(self.practitioner_url, {"name": "Cursor", "page_size": 2})
+        for _ in range(len(pages) - 1):
+            with CaptureQueriesContext(connection) as queries:
+                page = self.get_page(page["next"])
+            for query in queries:
+                self.assertNotIn("COUNT(", query["sql"].upper())
+                self.assertNotIn("OFFSET", query["sql"].upper())
+
+    def test_invalid_cursor_returns_404(self):
+        page = self.get_page(self.practitioner_url, {"name": "Cursor", "page_size": 2})
+        cursor = page["next"].split("cursor=")[1].split("&")[0]
+        for params in [
+            {"cursor": "not-a-cursor"},
+            # a cursor only works with the ordering it was made for
+            {"cursor": cursor, "_sort": "-individual__individualtoname__first_name"},
+        ]:
+            response = self.client.get(self.practitioner_url, {"name": "Cursor", **params})
+            self.assertEqual(response.status_code, 404)
+
+    @override_settings(FHIR_STREAMING_PAGE_SIZE=2, FHIR_STREAMING_CHUNK_SIZE=1)
+    def test_streamed_cursor_pages_match_buffered_pages(self):
+        url = self.practitioner_url
+        page = self.get_page(url, {"name": "Cursor", "page_size": 2})
+        second_page = self.get_page(page["next"])
+        for page_url in [page["next"], second_page["next"], second_page["previous"]]:
+            streamed = self.client.get(page_url)
+            self.assertTrue(streamed.streaming)
+            with override_settings(FHIR_STREAMING_PAGE_SIZE=0):
+                buffered = self.client.get(page_url)
+            self.assertEqual(b"".join(streamed.streaming_content), buffered.content)
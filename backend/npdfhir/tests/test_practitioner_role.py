@@ -62,8 +62,8 @@ class PractitionerRoleViewSetTestCase(APITestCase):
                 state="CA",
                 zipcode="55555",
                 addr_line_1="404 Great Amazing Avenue",
-                x=32.824056,
-                y=-117.437397,
+                x=-117.437397,
+                y=32.824056,
             ),
             create_location(
                 id="7c7a433b-fca7-4fb2-9283-dc764fb0ed5c",
@@ -74,8 +74,8 @@ class PractitionerRoleViewSetTestCase(APITestCase):
                 zipcode="77777",
                 addr_line_1="333 Grunge Blvd.",
                 address_use="home",
-                x=47.608597,
-                y=-122.5046021,
+                x=-122.5046021,
+                y=47.608597,
             ),
             create_location(
                 id="6df24407-ebe0-4f0b-9a75-bdfee486f0df",
@@ -85,8 +85,8 @@ class PractitionerRoleViewSetTestCase(APITestCase):
                 state="MO",
                 zipcode="89898",
                 addr_line_1="66 Arch Lane",
-                x=38.6219297,
-                y=-90.182935,
+                x=-90.182935,
+                y=38.6219297,
             ),
             create_location(
                 id="c1fc1ada-841a-4b92-9e8e-37f4d17b65d4",
@@ -96,8 +96,8 @@ class PractitionerRoleViewSetTestCase(APITestCase):
                 state="MO",
                 zipcode="65313",
                 addr_line_1="City Museum Rd.",
-                x=38.6336745,
-                y=-90.2032725,
+                x=-90.2032725,
+                y=38.6336745,
             ),
             create_location(
                 id="b7517cc7-b406-4932-9856-6983ac4ec308",
@@ -107,8 +107,8 @@ class PractitionerRoleViewSetTestCase(APITestCase):
                 state="FL",
                 zipcode="43433",
                 addr_line_1="789 Palmetto Road",
-                x=26.1412097,
-                y=-80.1910040,
+                x=-80.1910040,
+                y=26.1412097,
             ),
         ]
 
@@ -284,9 +284,9 @@ class PractitionerRoleViewSetTestCase(APITestCase):
         assert_has_results(self, response)
 
     def test_filter_by_distance_with_km(self):
-        lat = -90.194315
-        lon = 38.629267
-        location = (lon, lat)
+        lat = 38.629267
+        lon = -90.194315
+        location = (lat, lon)
         distance = 3
         units = "km"
         near_query = f"{lat}|{lon}|{distance}|{units}"
@@ -300,15 +300,15 @@ class PractitionerRoleViewSetTestCase(APITestCase):
             location_url = entry["resource"]["location"][0]["reference"]
             returned_location = self.client.get(location_url).data
             position = (
-                returned_location["position"]["longitude"],
                 returned_location["position"]["latitude"],
+                returned_location["position"]["longitude"],
             )
             self.assertLessEqual(geodesic(location, position).km, distance)
 
     def test_filter_by_distance_with_mi(self):
-        lat = -90.194315
-        lon = 38.629267
-        location = (lon, lat)
+        lat = 38.629267
+        lon = -90.194315
+        location = (lat, lon)
         distance = 1
         units = "mi"
         near_query = f"{lat}|{lon}|{distance}|{units}"
@@ -323,15 +323,15 @@ class PractitionerRoleViewSetTestCase(APITestCase):
             location_url = entry["resource"]["location"][0]["reference"]
             returned_location = self.client.get(location_url).data
             position = (
-                returned_location["position"]["longitude"],
                 returned_location["position"]["latitude"],
+                returned_location["position"]["longitude"],
             )
             self.assertLessEqual(geodesic(location, position).miles, distance)
 
     def test_filter_by_distance_with_ft(self):
-        lat = -90.194315
-        lon = 38.629267
-        location = (lon, lat)
+        lat = 38.629267
+        lon = -90.194315
+        location = (lat, lon)
         distance = 5000
         units = "ft"
         near_query = f"{lat}|{lon}|{distance}|{units}"
@@ -346,15 +346,15 @@ class PractitionerRoleViewSetTestCase(APITestCase):
             location_url = entry["resource"]["location"][0]["reference"]
             returned_location = self.client.get(location_url).data
             position = (
-                returned_location["position"]["longitude"],
                 returned_location["position"]["latitude"],
+                returned_location["position"]["longitude"],
             )
             self.assertLessEqual(geodesic(location, position).feet, distance)
 
     def test_filter_by_distance_witout_units(self):
-        lat = -90.194315
-        lon = 38.629267
-        location = (lon, lat)
+        lat = 38.629267
+        lon = -90.194315
+        location = (lat, lon)
         distance = 3
         near_query = f"{lat}|{lon}|{distance}"
         url = reverse("fhir-practitionerrole-list")
@@ -368,8 +368,8 @@ class PractitionerRoleViewSetTestCase(APITestCase):
             location_url = entry["resource"]["location"][0]["reference"]
             returned_location = self.client.get(location_url).data
             position = (
-                returned_location["position"]["longitude"],
                 returned_location["position"]["latitude"],
+                returned_location["position"]["longitude"],
             )
             self.assertLessEqual(geodesic(location, position).km, distance)
 
@@ -572,7 +572,7 @@ class PractitionerRoleViewSetTestCase(APITestCase):
 
         bundle = response.data["results"]
 
-        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(len(bundle["entry"]), 1)
         for entry in bundle["entry"]:
             self.assertIn("resource", entry)
             location_entry = entry["resource"]
@@ -0,0 +1,134 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import (
+    EndpointInstance,
+    FipsState,
+    IndividualToName,
+    LocationToEndpointInstance,
+    OrganizationToName,
+    OtherIdType,
+    ProviderToLocation,
+    ProviderToOtherId,
+)
+from .api_test_case import APITestCase
+from .fixtures.endpoint import create_endpoint
+from .fixtures.practitioner import create_full_practitionerrole
+from .helpers import extract_resource_ids
+
+PAYLOAD_TYPE = "urn:hl7-org:sdwg:ccda-structuredBody:1.1"
+
+
+class PractitionerRoleSearchTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.role = create_full_practitionerrole(
+            first_name="Flatwell", last_name="Searcher", org_name="Flatwell Search Org"
+        )
+        cls.other_role = create_full_practitionerrole(
+            first_name="Flatwell", last_name="Aardvark", org_name="Flatwell Other Org"
+        )
+
+        # a second organization name and two endpoints, which joining the
+        # source tables would repeat the role for
+        organization = cls.role.provider_to_organization.organization
+        OrganizationToName.objects.create(
+            organization=organization, name="Flatwell Search Group", is_primary=False
+        )
+        for i in range(2):
+            endpoint = create_endpoint(organization=organization, name=f"Flatwell Endpoint {i}")
+            LocationToEndpointInstance.objects.create(
+                location=cls.role.location, endpoint_instance=endpoint.endpoint_instance
+            )
+            EndpointInstance.objects.filter(pk=endpoint.endpoint_instance_id).update(
+                status="active"
+            )
+        ProviderToLocation.objects.filter(pk=cls.role.pk).update(other_endpoint=endpoint)
+        ProviderToOtherId.objects.create(
+            npi=cls.role.provider_to_organization.individual,
+            other_id="FLAT-44017-NY",
+            other_id_type=OtherIdType.objects.get(value="OTHER"),
+            state_code=FipsState.objects.get(abbreviation="NY"),
+            issuer="TEST",
+        )
+        return super().setUpTestData()
+
+    def get_ids(self, params):
+        response = self.client.get(
+            reverse("fhir-practitionerrole-list"), {"page_size": 100, **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return extract_resource_ids(response)
+
+    def test_combined_filters_do_not_repeat_roles(self):
+        ids = self.get_ids(
+            {
+                "practitioner_name": "Flatwell",
+                "organization_name": "Flatwell Search",
+                "endpoint_payload_type": PAYLOAD_TYPE,
+            }
+        )
+        self.assertEqual(ids, [str(self.role.id)])
+
+    def test_search_reads_only_the_search_table(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_ids(
+                {
+                    "practitioner_name": "Flatwell",
+                    "organization_name": "Flatwell",
+                    "endpoint_payload_type": PAYLOAD_TYPE,
+                    "_total": "none",
+                }
+            )
+        (search,) = [query["sql"] for query in queries if "keyset_0" in query["sql"]]
+        self.assertIn('"practitioner_role_search"', search)
+        self.assertNotIn('"endpoint_instance_to_payload"', search)
+        # names are matched in EXISTS subqueries, which cannot repeat roles
+        for table in ["individual_to_name", "organization_to_name"]:
+            self.assertIn(f'EXISTS(SELECT 1 AS "a" FROM "{table}"', search)
+        self.assertNotIn("DISTINCT", search)
+
+    def test_names_are_matched_separately(self):
+        practitioner = self.role.provider_to_organization.individual.individual
+        IndividualToName.objects.create(
+            individual=practitioner,
+            first_name="Marigold",
+            last_name="Quist",
+            name_use=practitioner.individualtoname_set.first().name_use,
+        )
+        call_command("refreshsearch", stdout=StringIO())
+
+        self.assertEqual(self.get_ids({"practitioner_name": "Marigold Quist"}), [str(self.role.id)])
+        self.assertEqual(self.get_ids({"practitioner_name": "Marigold Searcher"}), [])
+        self.assertEqual(
+            self.get_ids({"organization_name": "Flatwell Search Group"}), [str(self.role.id)]
+        )
+        self.assertEqual(self.get_ids({"organization_name": "Org Group"}), [])
+
+    def test_other_ids_match_by_substring(self):
+        self.assertEqual(self.get_ids({"practitioner_identifier": "44017-ny"}), [str(self.role.id)])
+        self.assertEqual(self.get_ids({"practitioner_identifier": "OTHER|44017-ny"}), [])
+
+    def test_endpoint_filters_ignore_case(self):
+        self.assertEqual(
+            self.get_ids({"practitioner_name": "Flatwell", "endpoint_status": "Active"}),
+            [str(self.role.id)],
+        )
+        self.assertEqual(
+            self.get_ids({"endpoint_connection_type": "HL7-FHIR-REST,other"}), [str(self.role.id)]
+        )
+
+    def test_sort_by_practitioner_name(self):
+        ids = self.get_ids({"practitioner_name": "Flatwell", "_sort": "practitioner_last_name"})
+        self.assertEqual(ids, [str(self.other_role.id), str(self.role.id)])
+
+    def test_new_roles_are_found_after_refresh(self):
+        role = create_full_practitionerrole(first_name="Flatwell", last_name="Latecomer")
+        self.assertNotIn(str(role.id), self.get_ids({"practitioner_name": "Latecomer"}))
+
+        call_command("refreshsearch", stdout=StringIO())
+        self.assertEqual(self.get_ids({"practitioner_name": "Latecomer"}), [str(role.id)])
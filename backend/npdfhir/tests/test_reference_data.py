@@ -0,0 +1,52 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..cache import ReferenceData, fhir_phone_use
+from ..dataset import bump_dataset_version, dataset_versions, get_dataset_version
+from ..models import FhirPhoneUse
+
+
+@override_settings(DATASET_VERSION_CHECK_INTERVAL=60)
+class ReferenceDataTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        dataset_versions.clear()
+
+    def phone_uses(self):
+        return ReferenceData(FhirPhoneUse, "id", "value", "Practitioner")
+
+    def test_loaded_on_first_lookup(self):
+        use = FhirPhoneUse.objects.first()
+        phone_uses = self.phone_uses()
+        self.assertIsNone(phone_uses.snapshot)
+        self.assertEqual(phone_uses[use.id], use.value)
+        with self.assertNumQueries(0):
+            self.assertEqual(phone_uses[use.id], use.value)
+
+    def test_workers_share_loaded_tables(self):
+        expected = dict(self.phone_uses())
+        # another worker's copy of the table
+        with self.assertNumQueries(0):
+            self.assertEqual(dict(self.phone_uses()), expected)
+
+    def test_waits_for_the_worker_loading_a_table(self):
+        key = f"reference-data:FhirPhoneUse:{get_dataset_version('Practitioner').generation}"
+        # another worker holds the load lock and has loaded the table
+        cache.add(f"{key}:lock", True)
+        cache.set(key, {1: "loaded elsewhere"})
+        with self.assertNumQueries(0):
+            self.assertEqual(self.phone_uses()[1], "loaded elsewhere")
+
+    def test_reloaded_after_a_load(self):
+        phone_uses = self.phone_uses()
+        self.assertNotIn(1000, phone_uses)
+        FhirPhoneUse.objects.create(id=1000, value="satellite")
+        self.assertNotIn(1000, phone_uses)
+
+        # as each load does, in SQL or with refreshsearch
+        bump_dataset_version(["Practitioner"])
+        self.assertEqual(phone_uses[1000], "satellite")
+
+    def test_module_tables(self):
+        use = FhirPhoneUse.objects.first()
+        self.assertEqual(fhir_phone_use[use.id], use.value)
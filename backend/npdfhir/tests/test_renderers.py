@@ -0,0 +1,49 @@
+import datetime
+import decimal
+import json
+import uuid
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from ..renderers import FHIRRenderer, RenderedJSON
+
+
+class FHIRRendererTestCase(SimpleTestCase):
+    def setUp(self):
+        self.renderer = FHIRRenderer()
+        self.data = {
+            "resourceType": "Practitioner",
+            "id": uuid.UUID("c591bfc5-b4ed-49af-926f-569056b5b1aa"),
+            "identifier": [
+                {
+                    "value": "1234567893",
+                    "period": {
+                        "start": datetime.datetime(2020, 1, 1),
+                        "end": datetime.datetime(2024, 5, 6, 7, 8, 9, tzinfo=datetime.UTC),
+                    },
+                }
+            ],
+            "birthDate": datetime.date(1980, 1, 1),
+            "position": {"latitude": decimal.Decimal("42.6680771"), "longitude": -73.8518804},
+            "name": [{"text": "Zoë O Brien", "given": ["Zoë", None]}],
+            "active": True,
+        }
+
+    def test_matches_json_renderer(self):
+        self.assertEqual(self.renderer.render(self.data), JSONRenderer().render(self.data))
+
+    def test_none_renders_empty_body(self):
+        self.assertEqual(self.renderer.render(None), b"")
+
+    def test_indent(self):
+        rendered = self.renderer.render(
+            self.data, accepted_media_type="application/fhir+json; indent=4"
+        )
+        self.assertIn(b"\n", rendered)
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(self.data)))
+
+    def test_rendered_json_is_passed_through(self):
+        resource = RenderedJSON('{"resourceType":"Location","id":"1"}')
+        rendered = self.renderer.render({"entry": [{"resource": resource}]})
+        self.assertEqual(rendered, b'{"entry":[{"resource":{"resourceType":"Location","id":"1"}}]}')
@@ -0,0 +1,44 @@
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from ..utils import genReference, get_resource_urls
+
+
+class ResourceURLsTestCase(SimpleTestCase):
+    def setUp(self):
+        self.request = APIRequestFactory().get("/fhir/")
+
+    def test_urls_match_reverse(self):
+        id = uuid.uuid4()
+        for url_name in [
+            "fhir-practitioner-detail",
+            "fhir-organization-detail",
+            "fhir-location-detail",
+            "fhir-practitionerrole-detail",
+            "fhir-endpoint-detail",
+        ]:
+            self.assertEqual(
+                get_resource_urls(self.request).url(url_name, id),
+                self.request.build_absolute_uri(reverse(url_name, kwargs={"id": id})),
+            )
+
+    def test_gen_reference(self):
+        id = uuid.uuid4()
+        self.assertEqual(
+            genReference("fhir-location-detail", id, self.request),
+            {"reference": f"http://testserver/fhir/Location/{id}"},
+        )
+
+    def test_routes_are_reversed_once_per_request(self):
+        with mock.patch("npdfhir.utils.reverse", wraps=reverse) as reverse_mock:
+            for _ in range(3):
+                genReference("fhir-organization-detail", uuid.uuid4(), self.request)
+            self.assertEqual(reverse_mock.call_count, 1)
+
+            other_request = APIRequestFactory().get("/fhir/")
+            genReference("fhir-organization-detail", uuid.uuid4(), other_request)
+            self.assertEqual(reverse_mock.call_count, 2)
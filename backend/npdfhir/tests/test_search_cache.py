@@ -0,0 +1,81 @@
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from .. import search_cache
+from .api_test_case import APITestCase
+from .fixtures.practitioner import create_full_practitionerrole, create_practitioner
+
+# the shared tier, with local memory standing in for Redis
+CACHES = {
+    **settings.CACHES,
+    "search": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+}
+
+
+@override_settings(FHIR_RESOURCE_STORE=True, FHIR_SEARCH_CACHE_TIMEOUT=300, CACHES=CACHES)
+class SearchCacheTestCase(APITestCase):
+    build_resource_store = True
+
+    @classmethod
+    def setUpTestData(cls):
+        for first_name in ["Ann", "Bob"]:
+            create_practitioner(first_name=first_name, last_name="Cached")
+        create_full_practitionerrole(last_name="Uncached")
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        search_cache.local_pages.clear()
+        search_cache.stats.clear()
+        caches["search"].clear()
+
+    def search(self, resource="practitioner", **params):
+        response = self.client.get(reverse(f"fhir-{resource}-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def get_entries(self, **params):
+        return json.loads(self.search(**params).content)["results"]["entry"]
+
+    def test_repeated_search_is_served_from_the_worker(self):
+        response = self.search(name="Cached")
+        # just the dataset version's
+        with self.assertNumQueries(1):
+            cached = self.search(name="Cached")
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached["Content-Type"], response["Content-Type"])
+        self.assertEqual(search_cache.stats, {"miss": 1, "local": 1})
+
+    def test_search_is_shared_by_workers(self):
+        response = self.search(name="Cached")
+        # another worker, with the page in the shared cache only
+        search_cache.local_pages.clear()
+        self.assertEqual(self.search(name="Cached").content, response.content)
+        self.assertEqual(search_cache.stats, {"miss": 1, "shared": 1})
+
+        self.search(name="Cached")
+        self.assertEqual(search_cache.stats["local"], 1)
+
+    def test_keyed_by_canonical_query(self):
+        self.search(name="Cached", page_size=1)
+        self.search(page_size=1, name="Cached")
+        self.search(name="Cached", page_size=2)
+        self.assertEqual(search_cache.stats, {"miss": 2, "local": 1})
+
+    def test_keyed_by_dataset_version(self):
+        self.assertEqual(len(self.get_entries(name="Cached")), 2)
+        create_practitioner(first_name="Cy", last_name="Cached")
+        call_command("refreshsearch", stdout=StringIO())
+        self.assertEqual(len(self.get_entries(name="Cached")), 3)
+        self.assertEqual(search_cache.stats, {"miss": 2})
+
+    def test_only_cached_resource_types(self):
+        self.search("practitionerrole")
+        self.search("practitionerrole")
+        self.assertEqual(search_cache.stats, {})
@@ -0,0 +1,80 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import AddressUs, IndividualToName
+from .api_test_case import APITestCase
+from .fixtures.location import create_location
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+from .helpers import extract_resource_ids
+
+
+class SearchVectorTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.organization = create_organization(name="Vectorville Clínica", npi_value=1777777770)
+        cls.in_city = create_location(
+            organization=cls.organization,
+            name="Quillhaven City Location",
+            city="Quillhaven",
+            state="VT",
+            zipcode="05491",
+            addr_line_1="1 Harbor Rd",
+        )
+        cls.on_street = create_location(
+            organization=cls.organization,
+            name="Quillhaven Street Location",
+            city="Albany",
+            state="NY",
+            zipcode="12207",
+            addr_line_1="2 Quillhaven St",
+        )
+        cls.practitioner = create_practitioner(
+            first_name="Zoë", last_name="Vectorson", location=cls.in_city
+        )
+        return super().setUpTestData()
+
+    def get_ids(self, url_name, params):
+        response = self.client.get(reverse(url_name), {"page_size": 100, **params})
+        self.assertEqual(response.status_code, 200)
+        return sorted(extract_resource_ids(response))
+
+    def test_vectors_are_maintained(self):
+        name = IndividualToName.objects.get(individual=self.practitioner.individual)
+        self.assertIsNotNone(name.search_vector)
+        address = AddressUs.objects.get(pk=self.in_city.address.address_us_id)
+        self.assertIsNotNone(address.search_vector)
+
+    def test_names_match_without_accents(self):
+        expected = [str(self.practitioner.individual_id)]
+        for value in ["Zoe Vectorson", "zoë", "VECTORSON"]:
+            self.assertEqual(self.get_ids("fhir-practitioner-list", {"name": value}), expected)
+
+        ids = self.get_ids("fhir-organization-list", {"name": "vectorville clinica"})
+        self.assertEqual(ids, [str(self.organization.id)])
+
+    def test_address_parts(self):
+        both = sorted([str(self.in_city.id), str(self.on_street.id)])
+        self.assertEqual(self.get_ids("fhir-location-list", {"address": "Quillhaven"}), both)
+
+        in_city = [str(self.in_city.id)]
+        for param, value in [
+            ("address_city", "quillhaven"),
+            ("address_state", "VT"),
+            ("address_postalcode", "05491"),
+        ]:
+            ids = self.get_ids("fhir-location-list", {"name": "Quillhaven", param: value})
+            self.assertEqual(ids, in_city)
+
+        ids = self.get_ids(
+            "fhir-practitioner-list", {"name": "Vectorson", "address_city": "Quillhaven"}
+        )
+        self.assertEqual(ids, [str(self.practitioner.individual_id)])
+
+    def test_searches_use_stored_vectors(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_ids("fhir-practitioner-list", {"name": "Vectorson", "_total": "none"})
+        sql = "\n".join(query["sql"] for query in queries)
+        self.assertIn('"individual_to_name"."search_vector" @@ (search_query(', sql)
+        self.assertNotIn("to_tsvector", sql)
@@ -0,0 +1,57 @@
+from django.test import override_settings
+from django.urls import reverse
+
+from .api_test_case import APITestCase
+from .fixtures.location import create_location
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_practitioner
+from .helpers import assert_fhir_response
+
+
+@override_settings(FHIR_STREAMING_PAGE_SIZE=5, FHIR_STREAMING_CHUNK_SIZE=2)
+class StreamingBundleTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(7):
+            organization = create_organization(name=f"Streaming Org {i}")
+            create_location(organization=organization, name=f"Streaming Location {i}")
+            create_practitioner(first_name=f"Stream{i}", last_name="Practitioner")
+        return super().setUpTestData()
+
+    def assert_streams_buffered_body(self, url, params):
+        response = self.client.get(url, params)
+        assert_fhir_response(self, response)
+        self.assertTrue(response.streaming)
+        streamed = b"".join(response.streaming_content)
+
+        with override_settings(FHIR_STREAMING_PAGE_SIZE=0):
+            buffered = self.client.get(url, params)
+        self.assertFalse(buffered.streaming)
+        self.assertEqual(streamed, buffered.content)
+
+    def test_small_pages_are_not_streamed(self):
+        response = self.client.get(reverse("fhir-organization-list"), {"page_size": 2})
+        self.assertFalse(response.streaming)
+
+    def test_streamed_organizations_match_buffered_response(self):
+        self.assert_streams_buffered_body(reverse("fhir-organization-list"), {"page_size": 5})
+
+    def test_streamed_last_page_matches_buffered_response(self):
+        self.assert_streams_buffered_body(
+            reverse("fhir-organization-list"), {"page_size": 5, "page": 2}
+        )
+
+    def test_streamed_practitioners_match_buffered_response(self):
+        self.assert_streams_buffered_body(reverse("fhir-practitioner-list"), {"page_size": 6})
+
+    def test_streamed_locations_match_buffered_response(self):
+        self.assert_streams_buffered_body(reverse("fhir-location-list"), {"page_size": 6})
+
+    def test_streamed_empty_result_matches_buffered_response(self):
+        self.assert_streams_buffered_body(
+            reverse("fhir-organization-list"), {"page_size": 5, "name": "no such organization"}
+        )
+
+    def test_invalid_page_returns_404(self):
+        response = self.client.get(reverse("fhir-organization-list"), {"page_size": 5, "page": 99})
+        self.assertEqual(response.status_code, 404)
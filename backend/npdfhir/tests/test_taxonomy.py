@@ -0,0 +1,108 @@
+from django.urls import reverse
+from rest_framework import status
+
+from ..taxonomy import get_taxonomy_tree
+from .api_test_case import APITestCase
+from .fixtures.organization import create_organization
+from .fixtures.practitioner import create_full_practitionerrole, create_practitioner
+from .helpers import extract_resource_ids
+
+ALLERGY_AND_IMMUNOLOGY = "207K00000X"  # a classification
+ALLERGY = "207KA0200X"  # one of its specializations
+CARDIOVASCULAR_DISEASE = "207RC0000X"  # an Internal Medicine specialization
+DENTIST = "122300000X"
+ART_THERAPIST = "221700000X"  # in a grouping whose name contains commas
+REHABILITATION_PROVIDERS = (
+    "Respiratory, Developmental, Rehabilitative and Restorative Service Providers"
+)
+
+
+class TaxonomyHierarchyTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.immunologist = create_practitioner(
+            last_name="Taxonomy", practitioner_types=[ALLERGY_AND_IMMUNOLOGY]
+        )
+        cls.allergist = create_practitioner(last_name="Taxonomy", practitioner_types=[ALLERGY])
+        cls.cardiologist = create_practitioner(
+            last_name="Taxonomy", practitioner_types=[CARDIOVASCULAR_DISEASE]
+        )
+        cls.dentist = create_practitioner(last_name="Taxonomy", practitioner_types=[DENTIST])
+        cls.art_therapist = create_practitioner(
+            last_name="Taxonomy", practitioner_types=[ART_THERAPIST]
+        )
+        cls.role = create_full_practitionerrole(last_name="Hierarchy", nucc_types=[ALLERGY])
+        cls.organization = create_organization(
+            name="Taxonomy Dental Org", organization_type=DENTIST
+        )
+        return super().setUpTestData()
+
+    def get_ids(self, resource, params):
+        response = self.client.get(reverse(f"fhir-{resource}-list"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return set(extract_resource_ids(response))
+
+    def get_practitioner_ids(self, params):
+        return self.get_ids("practitioner", {"name": "Taxonomy", **params})
+
+    def test_below_classification(self):
+        self.assertEqual(
+            self.get_practitioner_ids({"practitioner_type:below": ALLERGY_AND_IMMUNOLOGY}),
+            {str(self.immunologist.individual_id), str(self.allergist.individual_id)},
+        )
+
+    def test_below_grouping(self):
+        ids = self.get_practitioner_ids(
+            {"practitioner_type:below": "Allopathic & Osteopathic Physicians"}
+        )
+        self.assertIn(str(self.cardiologist.individual_id), ids)
+        self.assertIn(str(self.allergist.individual_id), ids)
+        self.assertNotIn(str(self.dentist.individual_id), ids)
+
+    def test_below_any_of_several_values(self):
+        self.assertEqual(
+            self.get_practitioner_ids({"practitioner_type:below": f"{ALLERGY},{DENTIST}"}),
+            {str(self.allergist.individual_id), str(self.dentist.individual_id)},
+        )
+
+    def test_below_name_containing_commas(self):
+        self.assertEqual(
+            self.get_practitioner_ids({"practitioner_type:below": REHABILITATION_PROVIDERS}),
+            {str(self.art_therapist.individual_id)},
+        )
+        self.assertEqual(
+            self.get_practitioner_ids(
+                {"practitioner_type:below": f"{DENTIST},{REHABILITATION_PROVIDERS}"}
+            ),
+            {str(self.dentist.individual_id), str(self.art_therapist.individual_id)},
+        )
+
+    def test_above_specialization(self):
+        self.assertEqual(
+            self.get_practitioner_ids({"practitioner_type:above": ALLERGY}),
+            {str(self.immunologist.individual_id), str(self.allergist.individual_id)},
+        )
+
+    def test_codes_are_matched_in_any_case(self):
+        tree = get_taxonomy_tree()
+        self.assertEqual(tree.above(ALLERGY.lower()), tree.above(ALLERGY))
+        self.assertEqual(
+            tree.below(ALLERGY_AND_IMMUNOLOGY.lower()), tree.below(ALLERGY_AND_IMMUNOLOGY)
+        )
+        self.assertEqual(
+            self.get_practitioner_ids({"practitioner_type:above": ALLERGY.lower()}),
+            {str(self.immunologist.individual_id), str(self.allergist.individual_id)},
+        )
+
+    def test_practitioner_role_below(self):
+        ids = self.get_ids("practitionerrole", {"practitioner_type:below": ALLERGY_AND_IMMUNOLOGY})
+        self.assertEqual(ids, {str(self.role.id)})
+
+    def test_organization_below(self):
+        ids = self.get_ids("organization", {"organization_type:below": "Dental Providers"})
+        self.assertEqual(ids, {str(self.organization.id)})
+
+    def test_tree_is_built_once(self):
+        get_taxonomy_tree()
+        with self.assertNumQueries(0):
+            get_taxonomy_tree().below(ALLERGY_AND_IMMUNOLOGY)
@@ -0,0 +1,105 @@
+import json
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .api_test_case import APITestCase
+from .fixtures.practitioner import create_practitioner
+from .helpers import assert_fhir_response
+
+
+class TotalTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for first_name in ["Ann", "Bob", "Cy", "Dee", "Eve"]:
+            create_practitioner(first_name=first_name, last_name="Totalled")
+        return super().setUpTestData()
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.url = reverse("fhir-practitioner-list")
+
+    def get_page(self, params, url=None):
+        response = self.client.get(url or self.url, params)
+        assert_fhir_response(self, response)
+        if response.streaming:
+            return json.loads(b"".join(response.streaming_content))
+        return json.loads(response.content)
+
+    def search(self, **params):
+        return {"name": "Totalled", "page_size": 2, **params}
+
+    def count_queries(self, queries):
+        return [query for query in queries if "COUNT(" in query["sql"].upper()]
+
+    def test_first_page_is_counted(self):
+        page = self.get_page(self.search())
+        self.assertEqual(page["results"]["total"], 5)
+        self.assertEqual(len(page["results"]["entry"]), 2)
+
+        # the total is not recounted on the pages after it
+        next_page = self.get_page(None, url=page["next"])
+        self.assertNotIn("total", next_page["results"])
+
+    def test_total_none_skips_the_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            page = self.get_page(self.search(_total="none"))
+        self.assertNotIn("total", page["results"])
+        self.assertEqual(self.count_queries(queries), [])
+
+    def test_total_accurate_counts_cursor_pages(self):
+        page = self.get_page(self.search(_total="accurate"))
+        next_page = self.get_page(None, url=page["next"])
+        self.assertEqual(next_page["results"]["total"], 5)
+
+    def test_accurate_count_ignores_ordering(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.get_page(self.search(_total="accurate"))
+        (count,) = self.count_queries(queries)
+        self.assertNotIn("ORDER BY", count["sql"].upper())
+
+    def test_total_estimate(self):
+        with CaptureQueriesContext(connection) as queries:
+            page = self.get_page(self.search(_total="estimate"))
+        self.assertEqual(self.count_queries(queries), [])
+        self.assertIsInstance(page["results"]["total"], int)
+
+        # an accurate count is reused by later estimates of the same search
+        self.get_page(self.search(_total="accurate", page_size=3))
+        with CaptureQueriesContext(connection) as queries:
+            page = self.get_page(
+                self.search(_total="estimate", _sort="-individual__individualtoname__first_name")
+            )
+        self.assertEqual(page["results"]["total"], 5)
+        self.assertEqual(self.count_queries(queries), [])
+
+    def test_page_numbers_report_the_paginator_count(self):
+        page = self.get_page(self.search(page=2))
+        self.assertEqual(page["results"]["total"], page["count"])
+        page = self.get_page(self.search(page=2, _total="none"))
+        self.assertNotIn("total", page["results"])
+
+    @override_settings(FHIR_STREAMING_PAGE_SIZE=2)
+    def test_streamed_pages_report_the_total(self):
+        response = self.client.get(self.url, self.search())
+        self.assertTrue(response.streaming)
+        page = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(page["results"]["total"], 5)
+
+    def test_summary_count(self):
+        page = self.get_page(self.search(_summary="count"))
+        bundle = page["results"]
+        self.assertEqual(bundle["total"], 5)
+        self.assertNotIn("entry", bundle)
+        self.assertEqual([link["relation"] for link in bundle["link"]], ["self"])
+
+        page = self.get_page(self.search(_summary="count", _total="estimate"))
+        self.assertIsInstance(page["results"]["total"], int)
+
+    def test_invalid_total_returns_400(self):
+        response = self.client.get(self.url, self.search(_total="exact"))
+        self.assertEqual(response.status_code, 400)
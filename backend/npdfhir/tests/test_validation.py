@@ -0,0 +1,50 @@
+from django.test import SimpleTestCase, override_settings
+from fhir.resources.R4B.location import Location
+
+from ..validation import (
+    VALIDATE_CONTEXT_KEY,
+    FHIRValidationMismatch,
+    should_validate,
+    validate_resource,
+)
+
+
+class ValidateResourceTestCase(SimpleTestCase):
+    def setUp(self):
+        self.location = {
+            "resourceType": "Location",
+            "id": "12345",
+            "status": "active",
+            "name": "Test Location",
+        }
+
+    def test_matching_resource_is_returned_unchanged(self):
+        data = validate_resource(Location, self.location, {})
+        self.assertIs(data, self.location)
+
+    def test_key_order_mismatch_raises_in_strict_mode(self):
+        reordered = {"resourceType": "Location", "name": "Test Location", "id": "12345"}
+        with self.assertRaises(FHIRValidationMismatch):
+            validate_resource(Location, reordered, {})
+
+    def test_invalid_resource_raises_in_strict_mode(self):
+        with self.assertRaises(FHIRValidationMismatch):
+            validate_resource(Location, {**self.location, "status": "  invalid"}, {})
+
+    @override_settings(FHIR_VALIDATION_STRICT=False)
+    def test_mismatch_is_returned_when_not_strict(self):
+        invalid = {**self.location, "status": "  invalid"}
+        self.assertIs(validate_resource(Location, invalid, {}), invalid)
+
+    @override_settings(FHIR_VALIDATION_SAMPLE_RATE=0)
+    def test_unsampled_response_is_not_validated(self):
+        invalid = {**self.location, "status": "  invalid"}
+        self.assertIs(validate_resource(Location, invalid, {}), invalid)
+
+    def test_sampling_decision_is_shared_through_context(self):
+        context = {VALIDATE_CONTEXT_KEY: False}
+        self.assertFalse(should_validate(context))
+
+        context = {}
+        self.assertTrue(should_validate(context))
+        self.assertTrue(context[VALIDATE_CONTEXT_KEY])
@@ -15,6 +15,24 @@ urlpatterns = [
     re_path("docs/?", SpectacularSwaggerView.as_view(url_name="schema"), name="schema-swagger-ui"),
     path("healthCheck", views.health, name="healthCheck"),
     re_path("metadata/?", views.FHIRCapabilityStatementView.as_view(), name="fhir-metadata"),
+    # Bulk Data export; these must come before the router, whose detail routes
+    # would otherwise take "$export" for a resource id
+    re_path(r"^\$export/?$", views.FHIRBulkExportView.as_view(), name="fhir-export"),
+    re_path(
+        rf"^(?P<resource_type>{'|'.join(views.RESOURCE_VIEWSETS)})/\$export/?$",
+        views.FHIRBulkExportView.as_view(),
+        name="fhir-type-export",
+    ),
+    path(
+        "$export-status/<uuid:job_id>",
+        views.FHIRBulkExportStatusView.as_view(),
+        name="fhir-export-status",
+    ),
+    path(
+        "$export-file/<uuid:job_id>/<str:file_name>",
+        views.FHIRBulkExportFileView.as_view(),
+        name="fhir-export-file",
+    ),
     # Router URLs
     # everything else is passed to the rest_framework router to manage
     path("", include(router.urls), name="index"),
@@ -1,6 +1,5 @@
 from django.urls import reverse
 from fhir.resources.R4B.address import Address
-from fhir.resources.R4B.reference import Reference
 from drf_spectacular.views import SpectacularJSONAPIView
 
 
@@ -26,10 +25,48 @@ def get_schema_data(request):
     return schema_data
 
 
+class ResourceURLs:
+    """
+    Builds absolute URLs for resource detail routes. Each route is reversed and
+    made absolute once per request; after that an id is formatted into the
+    cached prefix and suffix.
+    """
+
+    placeholder = "00000000-0000-0000-0000-000000000000"
+
+    def __init__(self, request):
+        self.request = request
+        self.templates = {}
+
+    def template(self, url_name):
+        """
+        Returns the (prefix, suffix) surrounding the id in url_name's URL.
+        """
+        if url_name not in self.templates:
+            url = self.request.build_absolute_uri(
+                reverse(url_name, kwargs={"id": self.placeholder})
+            )
+            prefix, suffix = url.split(self.placeholder)
+            self.templates[url_name] = (prefix, suffix)
+        return self.templates[url_name]
+
+    def url(self, url_name, id):
+        prefix, suffix = self.template(url_name)
+        return f"{prefix}{id}{suffix}"
+
+
+def get_resource_urls(request) -> ResourceURLs:
+    """
+    Returns the ResourceURLs for a request, creating it on first use.
+    """
+    resource_urls = getattr(request, "_resource_urls", None)
+    if resource_urls is None:
+        resource_urls = request._resource_urls = ResourceURLs(request)
+    return resource_urls
+
+
 def genReference(url_name, identifier, request):
-    reference = request.build_absolute_uri(reverse(url_name, kwargs={"id": identifier}))
-    reference = Reference(reference=reference)
-    return reference
+    return {"reference": get_resource_urls(request).url(url_name, identifier)}
 
 
 def parse_identifier_query(identifier_value):
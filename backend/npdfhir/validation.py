@@ -0,0 +1,71 @@
+import random
+
+import structlog
+from django.conf import settings
+
+from .renderers import dumps
+
+logger = structlog.get_logger(__name__)
+
+# serializer context key holding the per-response sampling decision
+VALIDATE_CONTEXT_KEY = "validate_fhir"
+
+
+class FHIRValidationMismatch(Exception):
+    pass
+
+
+def should_validate(context: dict) -> bool:
+    """
+    Decide, once per response, whether the FHIR dicts built by the serializers
+    should also be validated against the fhir.resources models.
+
+    The decision is stored in the serializer context so every resource in a
+    bundle shares it.
+    """
+    if VALIDATE_CONTEXT_KEY not in context:
+        rate = settings.FHIR_VALIDATION_SAMPLE_RATE
+        context[VALIDATE_CONTEXT_KEY] = rate >= 1 or (rate > 0 and random.random() < rate)
+    return context[VALIDATE_CONTEXT_KEY]
+
+
+def validate_resource(model_class, data: dict, context: dict) -> dict:
+    """
+    Round-trip a trusted FHIR dict through its fhir.resources model when this
+    response has been sampled for validation. Mismatches are logged (and raised
+    when FHIR_VALIDATION_STRICT is set, as it is in the test suite). The
+    trusted dict is always returned unchanged.
+    """
+    if not should_validate(context):
+        return data
+
+    try:
+        expected = dumps(model_class.model_validate(data).model_dump())
+    except ValueError as ex:
+        logger.error(
+            "fhir validation failed",
+            resource_type=model_class.__name__,
+            resource_id=data.get("id"),
+            error=str(ex),
+        )
+        if settings.FHIR_VALIDATION_STRICT:
+            raise FHIRValidationMismatch(str(ex)) from ex
+        return data
+
+    # compare the rendered forms; key order matters, the response must match the
+    # pydantic output
+    rendered = dumps(data)
+    if expected != rendered:
+        logger.error(
+            "fhir validation mismatch",
+            resource_type=model_class.__name__,
+            resource_id=data.get("id"),
+            expected=expected.decode(),
+            actual=rendered.decode(),
+        )
+        if settings.FHIR_VALIDATION_STRICT:
+            raise FHIRValidationMismatch(
+                f"{model_class.__name__} {data.get('id')} does not match its validated form"
+            )
+
+    return data
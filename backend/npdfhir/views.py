@@ -1,30 +1,47 @@
-from uuid import UUID
+import hashlib
+import re
+from uuid import UUID, uuid4
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import CharField, F, Value, Prefetch
 from django.db.models.functions import Concat
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
 from django.utils.html import escape
+from django.utils.http import http_date, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, OpenApiResponse
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.views import APIView
-from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.filters import OrderingFilter
-
-from .pagination import CustomPaginator
-from .renderers import FHIRRenderer
+from rest_framework.parsers import JSONParser
+from rest_framework.routers import APIRootView
+
+from . import batch, bulk_export, database_engine, search_cache
+from .bulk_export import NDJSON_MEDIA_TYPE, OUTPUT_FORMATS
+from .pagination import CursorPaginator, count_matches, estimate_matches
+from .elements import ELEMENTS_CONTEXT_KEY, get_requested_elements, subset_resource
+from .parsers import FHIRParser
+from .renderers import FHIRJSONRenderer, FHIRRenderer, RenderedResource, dumps
+from .dataset import get_dataset_version
+from .store import add_version_meta, fetch_documents, is_store_current
 
 from .filters.endpoint_filter_set import EndpointFilterSet
 from .filters.location_filter_set import LocationFilterSet
+from .filters.near import NEAR
 from .filters.organization_filter_set import OrganizationFilterSet
 from .filters.practitioner_filter_set import PractitionerFilterSet
 from .filters.practitioner_role_filter_set import PractitionerRoleFilterSet
 
 from .models import (
     EndpointInstance,
+    ExportJob,
     Location,
     Organization,
     Provider,
@@ -44,6 +61,26 @@ from .serializers import (
 
 DEBUG = settings.DEBUG
 
+CONDITIONAL_HEADERS = ["HTTP_IF_NONE_MATCH", "HTTP_IF_MODIFIED_SINCE"]
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+TOTAL_MODES = ["none", "estimate", "accurate"]
+
+# search parameters that do not change which resources match
+NON_FILTER_PARAMS = {
+    "_elements",
+    "_include",
+    "_revinclude",
+    "_sort",
+    "_summary",
+    "_total",
+    "cursor",
+    "format",
+    "page",
+    "page_size",
+}
+
 
 def index(request):
     return HttpResponse("Connection to npd database: successful")
@@ -56,8 +93,513 @@ def health(request):
 class ParamOrderingFilter(OrderingFilter):
     ordering_param = "_sort"
 
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view) or []
+        # the distance is only known when a near filter was given
+        sorts_by_near = NEAR in [field.lstrip("-") for field in ordering]
+        if sorts_by_near and NEAR not in queryset.query.annotations:
+            raise ValidationError(
+                {self.ordering_param: ["Sorting by near requires a near search parameter."]}
+            )
+        return super().filter_queryset(request, queryset, view)
+
+
+class FHIRResourceMixin:
+    """
+    Looks up the FHIR resources for a page of instances. Resources come from
+    the pre-rendered FHIR resource store (see npdfhir.store and the
+    buildfhirstore command) when FHIR_RESOURCE_STORE is enabled and the store
+    was built since the last load, then from
+    Postgres (see npdfhir.database_engine) for resource types listed in
+    FHIR_DATABASE_ENGINE_RESOURCES, and otherwise from the serializers.
+    """
+
+    resource_type = None
+    resource_serializer_class = None
+    # FHIR element -> prefetch lookups that are only needed for that element
+    element_prefetches = {}
+    # _include value -> (included resource type, lookup of its id on this queryset)
+    search_includes = {}
+    # _revinclude value -> (included resource type, lookup of this resource's id on it)
+    search_revincludes = {}
+    # searches run as entries of a batch read the response data, so are not cached
+    cache_searches = True
+
+    def get_elements(self):
+        """
+        The top-level elements requested with _elements or _summary, or None
+        for whole resources.
+        """
+        if not hasattr(self, "requested_elements"):
+            self.requested_elements = get_requested_elements(
+                self.resource_type, self.request.query_params
+            )
+        return self.requested_elements
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context[ELEMENTS_CONTEXT_KEY] = self.get_elements()
+        return context
+
+    def uses_store(self):
+        return settings.FHIR_RESOURCE_STORE and is_store_current(self.resource_type)
+
+    def uses_database_engine(self):
+        return (
+            self.resource_type in settings.FHIR_DATABASE_ENGINE_RESOURCES
+            and self.resource_type in database_engine.RENDERERS
+        )
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == "list" and (self.uses_store() or self.uses_database_engine()):
+            # searches only need ids to look up the rendered resources
+            return queryset.select_related(None).prefetch_related(None)
+        return self.trim_prefetches(queryset)
+
+    def trim_prefetches(self, queryset):
+        """
+        Drop the prefetches that only serve elements that were not requested.
+        """
+        elements = self.get_elements()
+        if elements is None:
+            return queryset
+
+        needed = set()
+        unneeded = set()
+        for element, lookups in self.element_prefetches.items():
+            (needed if element in elements else unneeded).update(lookups)
+        unneeded -= needed
+
+        def is_needed(lookup):
+            path = lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup
+            return not any(path == prefix or path.startswith(f"{prefix}__") for prefix in unneeded)
+
+        lookups = [lookup for lookup in queryset._prefetch_related_lookups if is_needed(lookup)]
+        return queryset.prefetch_related(None).prefetch_related(*lookups)
+
+    def get_resources(self, instances):
+        ids = [str(instance.pk) for instance in instances]
+        uses_store = self.uses_store()
+        if not uses_store and not self.uses_database_engine():
+            return [self.add_version(resource) for resource in self.serialize_resources(instances)]
+
+        resources = {}
+        if uses_store:
+            resources = fetch_documents(self.resource_type, ids, self.request)
+        missing = [id for id in ids if id not in resources]
+        if missing:
+            resources.update(self.render_resources(missing))
+        return [self.add_version(self.subset_rendered_resource(resources[id])) for id in ids]
+
+    def get_rendered_resource(self, id):
+        """
+        Returns the resource with the given id from the store or the database
+        engine, or None when neither is enabled (or it is not found). Stored
+        documents of rows deleted since the store was built are not served.
+        """
+        resources = {}
+        if self.uses_store():
+            resources = fetch_documents(
+                self.resource_type, [id], self.request, model=self.queryset.model
+            )
+        if not resources and self.uses_database_engine():
+            resources = self.render_resources([id])
+        resource = next(iter(resources.values()), None)
+        if resource is None:
+            return None
+        return self.add_version(self.subset_rendered_resource(resource))
+
+    def subset_rendered_resource(self, resource):
+        """
+        Trim a resource from the store or the database engine, which are always
+        rendered whole, to the requested elements.
+        """
+        elements = self.get_elements()
+        if elements is None or not isinstance(resource, RenderedResource):
+            return resource
+        return RenderedResource(
+            resource.resource_type,
+            resource.id,
+            dumps(subset_resource(resource.to_dict(), elements)),
+            resource.version_id,
+            resource.last_updated,
+        )
+
+    def get_read_version(self):
+        """
+        The (versionId, lastUpdated) of this resource type's resources, or None
+        if it has no dataset version. Every resource of a type is at the
+        generation of the type's dataset version (see npdfhir.dataset), which
+        each load bumps, so reads are versioned alike whether they are served
+        from the store, the database engine or the serializers.
+        """
+        generation = self.get_dataset_generation()
+        if generation is None:
+            return None
+        return str(generation), self.dataset_version.updated_at
+
+    def add_version(self, resource):
+        """
+        Add the read version as meta.versionId and meta.lastUpdated, first in
+        meta, which comes straight after id (or is added there).
+        """
+        version = self.get_read_version()
+        if version is None:
+            return resource
+        version_id, last_updated = version
+        if isinstance(resource, RenderedResource):
+            content = resource.content
+            if isinstance(content, bytes):
+                # rendered by the database engine or trimmed to the requested elements
+                content = content.decode()
+            content = add_version_meta(
+                content, resource.resource_type, resource.id, version_id, last_updated
+            )
+            return RenderedResource(
+                resource.resource_type, resource.id, content, version_id, last_updated
+            )
+
+        meta = {"versionId": version_id, "lastUpdated": last_updated}
+        versioned = {}
+        for key, value in resource.items():
+            if key == "meta":
+                continue
+            versioned[key] = value
+            if key == "id":
+                versioned["meta"] = {**meta, **resource.get("meta", {})}
+        return versioned
+
+    def render_resources(self, ids):
+        if self.uses_database_engine():
+            return database_engine.RENDERERS[self.resource_type](ids, self.request)
+        return {
+            resource["id"]: resource
+            for resource in self.serialize_resources(
+                self.trim_prefetches(self.queryset).filter(pk__in=ids)
+            )
+        }
+
+    def serialize_resources(self, instances):
+        return self.resource_serializer_class(
+            instances, many=True, context=self.get_serializer_context()
+        ).data
+
+    def get_includes(self):
+        """
+        The requested _include and _revinclude values, each as a list. Values
+        this resource type does not support are a 400.
+        """
+        requested = {}
+        for param, supported in [
+            ("_include", self.search_includes),
+            ("_revinclude", self.search_revincludes),
+        ]:
+            values = list(dict.fromkeys(self.request.query_params.getlist(param)))
+            unsupported = [value for value in values if value not in supported]
+            if unsupported:
+                raise ValidationError(
+                    {param: [f"Unsupported {param} value {value}." for value in unsupported]}
+                )
+            requested[param] = values
+        return requested["_include"], requested["_revinclude"]
+
+    def get_included_resources(self, instances):
+        """
+        Look up the resources requested with _include and _revinclude for a page
+        of instances, with one batch per included resource type.
+        """
+        includes, revincludes = self.get_includes()
+        ids = [instance.pk for instance in instances]
+        if not ids:
+            return []
+
+        included = []
+        for value in includes:
+            resource_type, lookup = self.search_includes[value]
+            target_ids = self.queryset.model.objects.filter(pk__in=ids).values(lookup)
+            included += self.get_related_resources(resource_type, pk__in=target_ids)
+        for value in revincludes:
+            resource_type, lookup = self.search_revincludes[value]
+            included += self.get_related_resources(resource_type, **{f"{lookup}__in": ids})
+        return included
+
+    def get_related_resources(self, resource_type, **filters):
+        view = RESOURCE_VIEWSETS[resource_type](
+            request=self.request, format_kwarg=self.format_kwarg, action="list", kwargs={}
+        )
+        # _elements and _summary apply to the matched resources only
+        view.requested_elements = None
+        instances = view.get_queryset().filter(**filters).order_by("pk")
+        # annotations joining one-to-many tables can repeat rows
+        return view.get_resources(list({instance.pk: instance for instance in instances}.values()))
+
+    def is_count_only(self):
+        return self.request.query_params.get("_summary") == "count"
+
+    def get_total(self, queryset):
+        """
+        The Bundle total for a search, as requested with _total:
+
+        - none: no total
+        - estimate: the count from an earlier accurate search, or the
+          planner's estimate
+        - accurate: a count of the matching resources
+
+        By default searches are counted on their first page; pages reached
+        through a cursor link leave the total out.
+        """
+        mode = self.request.query_params.get("_total")
+        if mode is None:
+            first_page = self.paginator.cursor_query_param not in self.request.query_params
+            mode = "accurate" if first_page or self.is_count_only() else "none"
+        if mode not in TOTAL_MODES:
+            raise ValidationError(
+                {"_total": [f"Select a valid choice. {mode} is not one of the available choices."]}
+            )
+        if mode == "none":
+            return None
+
+        page = getattr(self.paginator, "page", None)
+        if page is not None:
+            # paginating by page number has counted the results already
+            return page.paginator.count
+
+        key = self.get_count_cache_key()
+        if mode == "estimate":
+            total = cache.get(key)
+            return estimate_matches(queryset) if total is None else total
+        total = count_matches(queryset)
+        cache.set(key, total, settings.FHIR_COUNT_CACHE_TIMEOUT)
+        return total
+
+    def get_count_cache_key(self):
+        """
+        Counts are cached by the search's filters and the dataset version.
+        """
+        query = [
+            self.resource_type,
+            self.get_dataset_generation(),
+            sorted(
+                (param, values)
+                for param, values in self.request.query_params.lists()
+                if param not in NON_FILTER_PARAMS
+            ),
+        ]
+        return "fhir-count:" + hashlib.sha256(dumps(query)).hexdigest()
+
+    def get_bundle_context(self, queryset, instances):
+        return {
+            "request": self.request,
+            "included": self.get_included_resources(instances),
+            "total": self.get_total(queryset),
+            "distances": self.get_distances(instances),
+        }
+
+    def get_distances(self, instances):
+        """
+        The distance in meters of each instance from the point of a near search
+        (see npdfhir.filters.near), by id, for the Bundle entries' search
+        extension. Empty when the search had no near parameter.
+        """
+        return {
+            str(instance.pk): getattr(instance, NEAR)
+            for instance in instances
+            if getattr(instance, NEAR, None) is not None
+        }
 
-class FHIREndpointViewSet(viewsets.GenericViewSet):
+    def get_count_response(self, queryset):
+        """
+        The response to _summary=count: a Bundle with the total and no entries.
+        """
+        bundle = BundleSerializer(context={"request": self.request})
+        links = [{"relation": "self", "url": self.request.build_absolute_uri()}]
+        results = {**bundle.to_bundle(None, self.get_total(queryset)), "link": links}
+        return Response({"next": None, "previous": None, "results": results})
+
+    def check_not_modified(self):
+        """
+        Looks up the version of this read or search response and returns a
+        304 if the client's copy is current. The version is sent back as the
+        ETag and Last-Modified headers.
+
+        A read's ETag is the resource's versionId (see get_read_version). A
+        search's ETag is a hash of the dataset version (see npdfhir.dataset)
+        and the canonical query. Both are Last-Modified when the dataset
+        version last changed.
+        """
+        self.version = None
+        if self.action == "list":
+            self.version = self.get_search_version()
+        else:
+            version = self.get_read_version()
+            if version is not None:
+                version_id, last_updated = version
+                self.version = (self.get_etag(version_id), last_updated)
+
+        if self.version is None:
+            return None
+        if self.action != "list" and any(
+            header in self.request.META for header in CONDITIONAL_HEADERS
+        ):
+            # a resource deleted since the client read it is a 404, not a 304
+            id = self.kwargs[self.lookup_url_kwarg]
+            if not self.queryset.model.objects.filter(pk=id).exists():
+                return None
+        etag, last_modified = self.version
+        return get_conditional_response(
+            self.request, etag=etag, last_modified=int(last_modified.timestamp())
+        )
+
+    def get_etag(self, version_id):
+        elements = self.get_elements()
+        if elements is not None:
+            # a subset is a different representation of the same version
+            version_id += "." + hashlib.sha256(dumps(sorted(elements))).hexdigest()[:16]
+        return quote_etag(version_id)
+
+    def get_dataset_generation(self):
+        """
+        The generation of the resource type's dataset version, looked up once
+        per request, or None if it has none.
+        """
+        if not hasattr(self, "dataset_version"):
+            self.dataset_version = get_dataset_version(self.resource_type)
+        return self.dataset_version.generation if self.dataset_version is not None else None
+
+    def get_search_version(self):
+        generation = self.get_dataset_generation()
+        if generation is None:
+            return None
+        query = self.get_canonical_query()
+        return (
+            quote_etag(hashlib.sha256(dumps(query)).hexdigest()),
+            self.dataset_version.updated_at,
+        )
+
+    def get_canonical_query(self):
+        """
+        What a search response depends on: the resource type, the dataset
+        version, the base URL its links are built on, the media type it is
+        rendered as and the query parameters, in order.
+        """
+        return [
+            self.resource_type,
+            self.get_dataset_generation(),
+            self.request.build_absolute_uri("/"),
+            self.request.accepted_media_type,
+            sorted(self.request.query_params.lists()),
+        ]
+
+    def get_cached_search(self):
+        """
+        The response to this search from the search cache (see
+        npdfhir.search_cache), or None, in which case the response is cached
+        once rendered. Pages are cached by the canonical query, which includes
+        the dataset version.
+        """
+        self.search_cache_key = None
+        if not (
+            self.cache_searches
+            and settings.FHIR_SEARCH_CACHE_TIMEOUT > 0
+            and self.resource_type in settings.FHIR_SEARCH_CACHE_RESOURCES
+            and isinstance(self.request.accepted_renderer, FHIRRenderer)
+        ):
+            return None
+
+        query = self.get_canonical_query()
+        key = "fhir-search:" + hashlib.sha256(dumps(query)).hexdigest()
+        page = search_cache.get_page(key)
+        if page is not None:
+            content, content_type = page
+            return HttpResponse(content, content_type=content_type)
+        self.search_cache_key = key
+        return None
+
+    def cache_search(self, response):
+        search_cache.set_page(self.search_cache_key, response.content, response["Content-Type"])
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if (
+            getattr(self, "search_cache_key", None) is not None
+            and isinstance(response, Response)
+            and response.status_code == 200
+        ):
+            response.add_post_render_callback(self.cache_search)
+        version = getattr(self, "version", None)
+        if version is not None and response.status_code in (200, 304):
+            etag, last_modified = version
+            response.headers["ETag"] = etag
+            response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+        return response
+
+
+class StreamingBundleMixin:
+    """
+    Streams search Bundles entry by entry once the requested page size reaches
+    FHIR_STREAMING_PAGE_SIZE. The page is read in chunks of
+    FHIR_STREAMING_CHUNK_SIZE (prefetches run per chunk), so memory stays flat
+    regardless of page size. The body is identical to the buffered response.
+    """
+
+    # searches run as entries of a batch are always buffered
+    stream_bundles = True
+
+    def should_stream(self):
+        threshold = settings.FHIR_STREAMING_PAGE_SIZE
+        renderer = self.request.accepted_renderer
+        return (
+            self.stream_bundles
+            and threshold > 0
+            and not any(self.get_includes())
+            and self.paginator.get_page_size(self.request) >= threshold
+            and isinstance(renderer, FHIRRenderer)
+            and renderer.get_indent(self.request.accepted_media_type, {}) is None
+        )
+
+    def get_streaming_response(self, queryset):
+        object_list = self.paginator.paginate_queryset_lazily(queryset, self.request, view=self)
+        total = self.get_total(queryset)
+        # filled in chunk by chunk as the page is read
+        self.distances = {}
+        bundle = BundleSerializer(context={"request": self.request, "distances": self.distances})
+        renderer = self.request.accepted_renderer
+        media_type = self.request.accepted_media_type
+
+        # render the envelope around an empty entry list, then stream the entries
+        # into it
+        envelope = self.get_paginated_response(bundle.to_bundle([], total)).data
+        rendered = renderer.render(envelope, media_type, {})
+        split = rendered.rindex(b"[]") + 1
+
+        def stream():
+            yield rendered[:split]
+            separator = b""
+            for resource in self.iter_page_resources(object_list):
+                yield separator + renderer.render(bundle.to_entry(resource), media_type, {})
+                separator = b","
+            yield rendered[split:]
+
+        return StreamingHttpResponse(stream(), content_type=renderer.media_type)
+
+    def iter_page_resources(self, object_list):
+        chunk_size = settings.FHIR_STREAMING_CHUNK_SIZE
+        chunk = []
+        for instance in object_list.iterator(chunk_size=chunk_size):
+            chunk.append(instance)
+            if len(chunk) == chunk_size:
+                yield from self.get_chunk_resources(chunk)
+                chunk = []
+        if chunk:
+            yield from self.get_chunk_resources(chunk)
+
+    def get_chunk_resources(self, chunk):
+        self.distances.update(self.get_distances(chunk))
+        return self.get_resources(chunk)
+
+
+class FHIREndpointViewSet(FHIRResourceMixin, StreamingBundleMixin, viewsets.GenericViewSet):
     """
     ViewSet for FHIR Endpoint Resources
     """
@@ -82,9 +624,14 @@ class FHIREndpointViewSet(viewsets.GenericViewSet):
     filterset_class = EndpointFilterSet
     ordering = ["name"]
     ordering_fields = ["name", "address", "ehr_vendor_name"]
-    pagination_class = CustomPaginator
-    pagination_class = CustomPaginator
+    pagination_class = CursorPaginator
     lookup_url_kwarg = "id"
+    resource_type = "Endpoint"
+    resource_serializer_class = EndpointSerializer
+    element_prefetches = {
+        "identifier": ["endpointinstancetootherid_set"],
+        "payloadType": ["endpointinstancetopayload_set"],
+    }
 
     @extend_schema(
         responses={
@@ -100,13 +647,26 @@ class FHIREndpointViewSet(viewsets.GenericViewSet):
         Default sort order: ascending endpoint instance name
         """
 
-        endpoints = self.filter_queryset(self.queryset)
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        cached = self.get_cached_search()
+        if cached is not None:
+            return cached
+
+        endpoints = self.filter_queryset(self.get_queryset())
+        if self.is_count_only():
+            return self.get_count_response(endpoints)
+        if self.should_stream():
+            return self.get_streaming_response(endpoints)
+
         paginated_endpoints = self.paginate_queryset(endpoints)
 
-        serialized_endpoints = EndpointSerializer(
-            paginated_endpoints, many=True, context={"request": request}
+        serialized_endpoints = self.get_resources(paginated_endpoints)
+        bundle = BundleSerializer(
+            serialized_endpoints, context=self.get_bundle_context(endpoints, paginated_endpoints)
         )
-        bundle = BundleSerializer(serialized_endpoints, context={"request": request})
 
         response = self.get_paginated_response(bundle.data)
         return response
@@ -126,20 +686,28 @@ class FHIREndpointViewSet(viewsets.GenericViewSet):
         except (ValueError, TypeError):
             return HttpResponse(f"Endpoint {escape(id)} not found", status=404)
 
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        rendered_endpoint = self.get_rendered_resource(id)
+        if rendered_endpoint is not None:
+            return Response(rendered_endpoint)
+
         endpoint = get_object_or_404(
-            self.queryset,
+            self.get_queryset(),
             id=id,
         )
 
-        serialized_endpoint = EndpointSerializer(endpoint, context={"request": request})
+        serialized_endpoint = EndpointSerializer(endpoint, context=self.get_serializer_context())
 
         # Set appropriate content type for FHIR responses
-        response = Response(serialized_endpoint.data)
+        response = Response(self.add_version(serialized_endpoint.data))
 
         return response
 
 
-class FHIRPractitionerViewSet(viewsets.GenericViewSet):
+class FHIRPractitionerViewSet(FHIRResourceMixin, StreamingBundleMixin, viewsets.GenericViewSet):
     """
     ViewSet for FHIR Practitioner resources
     """
@@ -163,8 +731,23 @@ class FHIRPractitionerViewSet(viewsets.GenericViewSet):
         renderer_classes = [FHIRRenderer]
     filter_backends = [DjangoFilterBackend, ParamOrderingFilter]
     filterset_class = PractitionerFilterSet
-    pagination_class = CustomPaginator
+    pagination_class = CursorPaginator
     lookup_url_kwarg = "id"
+    resource_type = "Practitioner"
+    resource_serializer_class = PractitionerSerializer
+    element_prefetches = {
+        "identifier": ["npi", "providertootherid_set"],
+        "name": ["individual__individualtoname_set"],
+        "telecom": ["individual__individualtophone_set", "individual__individualtoemail_set"],
+        "address": ["individual__individualtoaddress_set"],
+        "qualification": ["providertotaxonomy_set"],
+    }
+    search_revincludes = {
+        "PractitionerRole:practitioner": (
+            "PractitionerRole",
+            "provider_to_organization__individual_id",
+        ),
+    }
 
     ordering = [
         "individual__individualtoname__last_name",
@@ -175,6 +758,7 @@ class FHIRPractitionerViewSet(viewsets.GenericViewSet):
         "individual__individualtoname__last_name",
         "individual__individualtoname__first_name",
         "npi_value",
+        NEAR,
     ]
 
     # permission_classes = [permissions.IsAuthenticated]
@@ -193,11 +777,26 @@ class FHIRPractitionerViewSet(viewsets.GenericViewSet):
         """
         # Subqueries for last_name and first_name of the individual
 
-        providers = self.filter_queryset(self.queryset)
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        cached = self.get_cached_search()
+        if cached is not None:
+            return cached
+
+        providers = self.filter_queryset(self.get_queryset())
+        if self.is_count_only():
+            return self.get_count_response(providers)
+        if self.should_stream():
+            return self.get_streaming_response(providers)
+
         paginated_providers = self.paginate_queryset(providers)
 
-        serialized_providers = PractitionerSerializer(paginated_providers, many=True)
-        bundle = BundleSerializer(serialized_providers, context={"request": request})
+        serialized_providers = self.get_resources(paginated_providers)
+        bundle = BundleSerializer(
+            serialized_providers, context=self.get_bundle_context(providers, paginated_providers)
+        )
 
         response = self.get_paginated_response(bundle.data)
         return response
@@ -216,20 +815,30 @@ class FHIRPractitionerViewSet(viewsets.GenericViewSet):
         except (ValueError, TypeError):
             return HttpResponse(f"Practitioner {escape(id)} not found", status=404)
 
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        rendered_practitioner = self.get_rendered_resource(id)
+        if rendered_practitioner is not None:
+            return Response(rendered_practitioner)
+
         provider = get_object_or_404(
-            self.queryset,
+            self.get_queryset(),
             individual_id=id,
         )
 
-        serialized_practitioner = PractitionerSerializer(provider)
+        serialized_practitioner = PractitionerSerializer(
+            provider, context=self.get_serializer_context()
+        )
 
         # Set appropriate content type for FHIR responses
-        response = Response(serialized_practitioner.data)
+        response = Response(self.add_version(serialized_practitioner.data))
 
         return response
 
 
-class FHIRPractitionerRoleViewSet(viewsets.GenericViewSet):
+class FHIRPractitionerRoleViewSet(FHIRResourceMixin, StreamingBundleMixin, viewsets.GenericViewSet):
     """
     ViewSet for FHIR PractitionerRole resources
 
@@ -239,7 +848,12 @@ class FHIRPractitionerRoleViewSet(viewsets.GenericViewSet):
         ProviderToLocation.objects.all()
         .select_related("location")
         .prefetch_related("provider_to_organization")
-        .annotate(location_name=F("location__name"))
+        # sort keys, read from the search table the filters use
+        .annotate(
+            location_name=F("search__location_name"),
+            practitioner_first_name=F("search__practitioner_first_name"),
+            practitioner_last_name=F("search__practitioner_last_name"),
+        )
     )
     if DEBUG:
         renderer_classes = [FHIRRenderer, BrowsableAPIRenderer]
@@ -247,11 +861,34 @@ class FHIRPractitionerRoleViewSet(viewsets.GenericViewSet):
         renderer_classes = [FHIRRenderer]
     filter_backends = [DjangoFilterBackend, ParamOrderingFilter]
     filterset_class = PractitionerRoleFilterSet
-    pagination_class = CustomPaginator
+    pagination_class = CursorPaginator
     lookup_url_kwarg = "id"
-
-    ordering = ["location__name"]
-    ordering_fields = ["location__name", "practitioner_first_name", "practitioner_last_name"]
+    resource_type = "PractitionerRole"
+    resource_serializer_class = PractitionerRoleSerializer
+    element_prefetches = {
+        "practitioner": ["provider_to_organization"],
+        "organization": ["provider_to_organization"],
+    }
+    search_includes = {
+        "PractitionerRole:practitioner": (
+            "Practitioner",
+            "provider_to_organization__individual_id",
+        ),
+        "PractitionerRole:organization": (
+            "Organization",
+            "provider_to_organization__organization_id",
+        ),
+        "PractitionerRole:location": ("Location", "location_id"),
+    }
+
+    ordering = ["location_name"]
+    ordering_fields = [
+        "location_name",
+        "location__name",
+        "practitioner_first_name",
+        "practitioner_last_name",
+        NEAR,
+    ]
 
     # permission_classes = [permissions.IsAuthenticated]
     @extend_schema(
@@ -269,13 +906,27 @@ class FHIRPractitionerRoleViewSet(viewsets.GenericViewSet):
         """
         # all_params = request.query_params
 
-        practitionerroles = self.filter_queryset(self.queryset)
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        cached = self.get_cached_search()
+        if cached is not None:
+            return cached
+
+        practitionerroles = self.filter_queryset(self.get_queryset())
+        if self.is_count_only():
+            return self.get_count_response(practitionerroles)
+        if self.should_stream():
+            return self.get_streaming_response(practitionerroles)
+
         paginated_practitionerroles = self.paginate_queryset(practitionerroles)
 
-        serialized_practitionerroles = PractitionerRoleSerializer(
-            paginated_practitionerroles, many=True, context={"request": request}
+        serialized_practitionerroles = self.get_resources(paginated_practitionerroles)
+        bundle = BundleSerializer(
+            serialized_practitionerroles,
+            context=self.get_bundle_context(practitionerroles, paginated_practitionerroles),
         )
-        bundle = BundleSerializer(serialized_practitionerroles, context={"request": request})
 
         response = self.get_paginated_response(bundle.data)
         return response
@@ -296,19 +947,27 @@ class FHIRPractitionerRoleViewSet(viewsets.GenericViewSet):
         except (ValueError, TypeError):
             return HttpResponse(f"PractitionerRole {escape(id)} not found", status=404)
 
-        practitionerrole = get_object_or_404(self.queryset, id=id)
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        rendered_practitionerrole = self.get_rendered_resource(id)
+        if rendered_practitionerrole is not None:
+            return Response(rendered_practitionerrole)
+
+        practitionerrole = get_object_or_404(self.get_queryset(), id=id)
 
         serialized_practitionerrole = PractitionerRoleSerializer(
-            practitionerrole, context={"request": request}
+            practitionerrole, context=self.get_serializer_context()
         )
 
         # Set appropriate content type for FHIR responses
-        response = Response(serialized_practitionerrole.data)
+        response = Response(self.add_version(serialized_practitionerrole.data))
 
         return response
 
 
-class FHIROrganizationViewSet(viewsets.GenericViewSet):
+class FHIROrganizationViewSet(FHIRResourceMixin, StreamingBundleMixin, viewsets.GenericViewSet):
     """
     ViewSet for FHIR Organization resources
     """
@@ -341,10 +1000,18 @@ class FHIROrganizationViewSet(viewsets.GenericViewSet):
         renderer_classes = [FHIRRenderer]
     filter_backends = [DjangoFilterBackend, ParamOrderingFilter]
     filterset_class = OrganizationFilterSet
-    pagination_class = CustomPaginator
+    pagination_class = CursorPaginator
     lookup_url_kwarg = "id"
+    resource_type = "Organization"
+    resource_serializer_class = OrganizationSerializer
+    element_prefetches = {
+        "identifier": ["clinicalorganization"],
+        "name": ["organizationtoname_set"],
+        "alias": ["organizationtoname_set"],
+        "contact": ["authorized_official", "organizationtoaddress_set"],
+    }
     ordering = ["organizationtoname__name"]
-    ordering_fields = ["organizationtoname__name"]
+    ordering_fields = ["organizationtoname__name", NEAR]
 
     # permission_classes = [permissions.IsAuthenticated]
     @extend_schema(
@@ -361,13 +1028,27 @@ class FHIROrganizationViewSet(viewsets.GenericViewSet):
         Default sort order: ascending by organization name
         """
 
-        organizations = self.filter_queryset(self.queryset)
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        cached = self.get_cached_search()
+        if cached is not None:
+            return cached
+
+        organizations = self.filter_queryset(self.get_queryset())
+        if self.is_count_only():
+            return self.get_count_response(organizations)
+        if self.should_stream():
+            return self.get_streaming_response(organizations)
+
         paginated_organizations = self.paginate_queryset(organizations)
 
-        serialized_organizations = OrganizationSerializer(
-            paginated_organizations, many=True, context={"request": request}
+        serialized_organizations = self.get_resources(paginated_organizations)
+        bundle = BundleSerializer(
+            serialized_organizations,
+            context=self.get_bundle_context(organizations, paginated_organizations),
         )
-        bundle = BundleSerializer(serialized_organizations, context={"request": request})
 
         response = self.get_paginated_response(bundle.data)
         return response
@@ -386,20 +1067,30 @@ class FHIROrganizationViewSet(viewsets.GenericViewSet):
         except (ValueError, TypeError):
             return HttpResponse(f"Organization {escape(id)} not found", status=404)
 
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        rendered_organization = self.get_rendered_resource(id)
+        if rendered_organization is not None:
+            return Response(rendered_organization)
+
         organization = get_object_or_404(
-            self.queryset,
+            self.get_queryset(),
             id=id,
         )
 
-        serialized_organization = OrganizationSerializer(organization, context={"request": request})
+        serialized_organization = OrganizationSerializer(
+            organization, context=self.get_serializer_context()
+        )
 
         # Set appropriate content type for FHIR responses
-        response = Response(serialized_organization.data)
+        response = Response(self.add_version(serialized_organization.data))
 
         return response
 
 
-class FHIRLocationViewSet(viewsets.GenericViewSet):
+class FHIRLocationViewSet(FHIRResourceMixin, StreamingBundleMixin, viewsets.GenericViewSet):
     """
     ViewSet for FHIR Location resources
     """
@@ -440,10 +1131,13 @@ class FHIRLocationViewSet(viewsets.GenericViewSet):
         renderer_classes = [FHIRRenderer]
     filter_backends = [DjangoFilterBackend, ParamOrderingFilter]
     filterset_class = LocationFilterSet
-    pagination_class = CustomPaginator
+    pagination_class = CursorPaginator
     lookup_url_kwarg = "id"
+    resource_type = "Location"
+    resource_serializer_class = LocationSerializer
+    element_prefetches = {"address": ["organization__organizationtoaddress_set"]}
     ordering = ["name"]
-    ordering_fields = ["organization_name", "address_full", "name"]
+    ordering_fields = ["organization_name", "address_full", "name", NEAR]
 
     # permission_classes = [permissions.IsAuthenticated]
     @extend_schema(
@@ -459,14 +1153,27 @@ class FHIRLocationViewSet(viewsets.GenericViewSet):
 
         Default sort order: ascending by location name
         """
-        locations = self.filter_queryset(self.queryset)
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        cached = self.get_cached_search()
+        if cached is not None:
+            return cached
+
+        locations = self.filter_queryset(self.get_queryset())
+        if self.is_count_only():
+            return self.get_count_response(locations)
+        if self.should_stream():
+            return self.get_streaming_response(locations)
+
         paginated_locations = self.paginate_queryset(locations)
 
         # Serialize the bundle
-        serialized_locations = LocationSerializer(
-            paginated_locations, many=True, context={"request": request}
+        serialized_locations = self.get_resources(paginated_locations)
+        bundle = BundleSerializer(
+            serialized_locations, context=self.get_bundle_context(locations, paginated_locations)
         )
-        bundle = BundleSerializer(serialized_locations, context={"request": request})
 
         response = self.get_paginated_response(bundle.data)
         return response
@@ -485,12 +1192,20 @@ class FHIRLocationViewSet(viewsets.GenericViewSet):
         except (ValueError, TypeError):
             return HttpResponse(f"Location {escape(id)} not found", status=404)
 
-        location = get_object_or_404(self.queryset, id=id)
+        not_modified = self.check_not_modified()
+        if not_modified is not None:
+            return not_modified
+
+        rendered_location = self.get_rendered_resource(id)
+        if rendered_location is not None:
+            return Response(rendered_location)
 
-        serialized_location = LocationSerializer(location, context={"request": request})
+        location = get_object_or_404(self.get_queryset(), id=id)
+
+        serialized_location = LocationSerializer(location, context=self.get_serializer_context())
 
         # Set appropriate content type for FHIR responses
-        response = Response(serialized_location.data)
+        response = Response(self.add_version(serialized_location.data))
 
         return response
 
@@ -523,3 +1238,238 @@ class FHIRCapabilityStatementView(APIView):
         response = Response(serialized_capability_statement.to_representation())
 
         return response
+
+
+class FHIRRootView(APIRootView):
+    """
+    The FHIR base URL. GET lists the resource endpoints; POST runs a batch
+    Bundle of reads and searches (see npdfhir.batch).
+    """
+
+    parser_classes = [FHIRParser, JSONParser]
+
+    def get_renderers(self):
+        if self.request.method == "POST":
+            return [FHIRRenderer(), FHIRJSONRenderer()]
+        return super().get_renderers()
+
+    def post(self, request, *args, **kwargs):
+        bundle = request.data
+        if not isinstance(bundle, dict) or bundle.get("resourceType") != "Bundle":
+            raise ValidationError({"resourceType": ["Expected a Bundle."]})
+        if bundle.get("type") != batch.BATCH:
+            raise ValidationError({"type": ["Only batch Bundles are supported."]})
+        entries = bundle.get("entry", [])
+        if not isinstance(entries, list):
+            raise ValidationError({"entry": ["Expected a list of entries."]})
+        if len(entries) > settings.FHIR_BATCH_MAX_ENTRIES:
+            raise ValidationError(
+                {"entry": [f"Batches are limited to {settings.FHIR_BATCH_MAX_ENTRIES} entries."]}
+            )
+        return Response(batch.run_batch(request, entries, RESOURCE_VIEWSETS))
+
+
+RESOURCE_VIEWSETS = {
+    viewset.resource_type: viewset
+    for viewset in [
+        FHIRPractitionerViewSet,
+        FHIROrganizationViewSet,
+        FHIRLocationViewSet,
+        FHIRPractitionerRoleViewSet,
+        FHIREndpointViewSet,
+    ]
+}
+
+
+class FHIRBulkExportView(APIView):
+    """
+    Kick off a FHIR Bulk Data export of every resource type (/$export) or of a
+    single type (/<type>/$export)
+    """
+
+    renderer_classes = [FHIRRenderer]
+
+    @extend_schema(
+        responses={
+            202: OpenApiResponse(
+                description="Export accepted; poll the URL in the Content-Location header"
+            )
+        }
+    )
+    def get(self, request, resource_type=None):
+        """
+        Start an asynchronous export to gzipped NDJSON files, one per resource type.
+        Requires the `Prefer: respond-async` header. `_type` limits the export to a
+        comma-separated list of resource types.
+        """
+        preferences = [value.strip() for value in request.headers.get("Prefer", "").split(",")]
+        if "respond-async" not in preferences:
+            raise ValidationError(
+                {"Prefer": ["Bulk data export requires 'Prefer: respond-async'."]}
+            )
+
+        output_format = request.query_params.get("_outputFormat", NDJSON_MEDIA_TYPE)
+        if output_format not in OUTPUT_FORMATS:
+            raise ValidationError(
+                {"_outputFormat": [f"Unsupported output format {output_format}."]}
+            )
+        if "_since" in request.query_params:
+            raise ValidationError({"_since": ["_since is not supported."]})
+
+        resource_types = [resource_type] if resource_type else list(RESOURCE_VIEWSETS)
+        requested = [
+            value.strip()
+            for values in request.query_params.getlist("_type")
+            for value in values.split(",")
+            if value.strip()
+        ]
+        if requested:
+            unsupported = [value for value in requested if value not in resource_types]
+            if unsupported:
+                raise ValidationError(
+                    {"_type": [f"Unsupported resource type {value}." for value in unsupported]}
+                )
+            resource_types = [value for value in resource_types if value in requested]
+
+        job = ExportJob.objects.create(
+            id=uuid4(),
+            status=bulk_export.ACCEPTED,
+            request_url=request.build_absolute_uri(),
+            base_url=request.build_absolute_uri("/"),
+            resource_types=resource_types,
+        )
+        status_url = request.build_absolute_uri(reverse("fhir-export-status", args=[job.id]))
+        return Response(status=202, headers={"Content-Location": status_url})
+
+
+class FHIRBulkExportStatusView(APIView):
+    """
+    Status of a FHIR Bulk Data export, and its manifest once complete
+    """
+
+    renderer_classes = [JSONRenderer, FHIRRenderer]
+
+    def get(self, request, job_id):
+        """
+        Returns 202 while the export is running, then the manifest listing the
+        output files
+        """
+        job = get_object_or_404(ExportJob, id=job_id)
+        if job.status in (bulk_export.ACCEPTED, bulk_export.IN_PROGRESS):
+            return Response(
+                status=202,
+                headers={
+                    "X-Progress": job.progress or job.status,
+                    "Retry-After": str(bulk_export.RETRY_AFTER),
+                },
+            )
+
+        if job.status == bulk_export.FAILED:
+            operation_outcome = {
+                "resourceType": "OperationOutcome",
+                "issue": [{"severity": "error", "code": "exception", "diagnostics": job.error}],
+            }
+            return Response(operation_outcome, status=500)
+
+        manifest = {
+            "transactionTime": job.transaction_time,
+            "request": job.request_url,
+            "requiresAccessToken": settings.REQUIRE_AUTHENTICATION,
+            "output": [
+                {
+                    "type": output["type"],
+                    "url": request.build_absolute_uri(
+                        reverse("fhir-export-file", args=[job.id, output["file"]])
+                    ),
+                    "count": output["count"],
+                }
+                for output in job.output
+            ],
+            "error": [],
+        }
+        expires = http_date(bulk_export.get_expiry(job).timestamp())
+        return Response(manifest, headers={"Expires": expires})
+
+    def delete(self, request, job_id):
+        """
+        Cancel an export, or delete a finished one and its files
+        """
+        job = get_object_or_404(ExportJob, id=job_id)
+        bulk_export.delete_job(job)
+        return Response(status=202)
+
+
+class FHIRBulkExportFileView(APIView):
+    """
+    A file of a completed FHIR Bulk Data export
+    """
+
+    renderer_classes = [JSONRenderer, FHIRRenderer]
+
+    def perform_content_negotiation(self, request, force=False):
+        # the file is NDJSON whatever the Accept header asks for; the
+        # renderers only render errors
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, job_id, file_name):
+        """
+        Download a file of a completed export. Files are gzipped NDJSON, sent
+        with Content-Encoding: gzip; single byte ranges are supported so
+        interrupted downloads can resume.
+        """
+        job = get_object_or_404(ExportJob, id=job_id, status=bulk_export.COMPLETED)
+        if file_name not in {output["file"] for output in job.output}:
+            raise Http404(f"Export file {file_name} not found")
+        return ranged_file_response(
+            request, bulk_export.get_export_dir(job.id) / file_name, bulk_export.NDJSON_MEDIA_TYPE
+        )
+
+
+def ranged_file_response(request, path, content_type, block_size=64 * 1024):
+    """
+    Stream a gzipped file, honouring a single-range Range header (and
+    If-Range). Other Range headers are ignored and the whole file is sent.
+    """
+    stat = path.stat()
+    size = stat.st_size
+    etag = quote_etag(f"{int(stat.st_mtime)}-{size}")
+    last_modified = http_date(stat.st_mtime)
+
+    start, end = 0, size - 1
+    status = 200
+    range_match = RANGE_RE.match(request.headers.get("Range", "").strip())
+    if_range = request.headers.get("If-Range")
+    if (
+        range_match
+        and (range_match[1] or range_match[2])
+        and if_range in (None, etag, last_modified)
+    ):
+        if range_match[1]:
+            start = int(range_match[1])
+            end = min(int(range_match[2]), size - 1) if range_match[2] else size - 1
+        else:
+            start = max(size - int(range_match[2]), 0)
+        if start > end:
+            return HttpResponse(status=416, headers={"Content-Range": f"bytes */{size}"})
+        status = 206
+
+    def read():
+        with path.open("rb") as file:
+            file.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                block = file.read(min(block_size, remaining))
+                if not block:
+                    break
+                remaining -= len(block)
+                yield block
+
+    response = StreamingHttpResponse(read(), status=status, content_type=content_type)
+    response.headers["Content-Encoding"] = "gzip"
+    response.headers["Content-Length"] = str(end - start + 1)
+    response.headers["Accept-Ranges"] = "bytes"
+    response.headers["ETag"] = etag
+    response.headers["Last-Modified"] = last_modified
+    if status == 206:
+        response.headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return response
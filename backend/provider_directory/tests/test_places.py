@@ -0,0 +1,57 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from npdfhir.places import get_place_index
+from npdfhir.tests.fixtures.location import create_address
+
+
+class TestPlaces(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="testuser", password="nothing")
+        create_address(city="Zyzzyva Springs", state="MO", zipcode="00901", x=-90.2, y=38.6)
+        create_address(city="Zyzzyva Springs", state="MO", zipcode="00902", x=-90.4, y=38.8)
+        create_address(city="Zyzzyva Falls", state="MO", zipcode="00902", x=-90.6, y=38.4)
+        # the centroids are read from the place_centroid table, refreshed after each load
+        call_command("refreshsearch", stdout=StringIO())
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_results(self, params):
+        response = self.client.get(reverse("provider_directory:places"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_city_prefix(self):
+        results = self.get_results({"q": "zyzzyva"})
+        self.assertEqual(
+            [result["name"] for result in results], ["Zyzzyva Falls, MO", "Zyzzyva Springs, MO"]
+        )
+        springs = results[1]
+        self.assertEqual(springs["kind"], "city")
+        self.assertAlmostEqual(springs["latitude"], 38.7)
+        self.assertAlmostEqual(springs["longitude"], -90.3)
+
+    def test_zip_prefix(self):
+        results = self.get_results({"q": "0090"})
+        self.assertEqual([result["name"] for result in results], ["00901", "00902"])
+        self.assertEqual(results[1]["kind"], "zip")
+        self.assertAlmostEqual(results[1]["latitude"], 38.6)
+        self.assertAlmostEqual(results[1]["longitude"], -90.5)
+
+    def test_limit(self):
+        self.assertEqual(len(self.get_results({"q": "zyzzyva", "limit": 1})), 1)
+
+    def test_empty_prefix(self):
+        self.assertEqual(self.get_results({"q": " "}), [])
+
+    def test_resolve(self):
+        index = get_place_index()
+        self.assertEqual(index.resolve("zyzzyva  springs,mo").name, "Zyzzyva Springs, MO")
+        self.assertEqual(index.resolve("00901").latitude, 38.6)
+        self.assertIsNone(index.resolve("Zyzzyva, MO"))
@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from npdfhir.models import IndividualToName
+from npdfhir.tests.fixtures.location import create_location
+from npdfhir.tests.fixtures.organization import create_organization
+from npdfhir.tests.fixtures.practitioner import create_practitioner
+
+from ..typeahead import results_cache, suggest
+
+
+class TestTypeahead(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="testuser", password="nothing")
+        location = create_location(city="Springfield", state="IL")
+        cls.practitioner = create_practitioner(
+            first_name="Typeahead", last_name="Zyzzyva", location=location
+        )
+        cls.accented = create_practitioner(first_name="Typeahead", last_name="Zyzzëx")
+        cls.organization = create_organization(name="Zyzzyva Typeahead Clinic")
+        # four keys starting with "qwxy", then a second practitioner's
+        cls.renamed = create_practitioner(first_name="Qwxy", last_name="Qwxya")
+        name = IndividualToName.objects.get(individual_id=cls.renamed.individual_id)
+        IndividualToName.objects.create(
+            individual_id=cls.renamed.individual_id,
+            first_name="Qwxyb",
+            last_name="Qwxyc",
+            name_use=name.name_use,
+        )
+        cls.other = create_practitioner(first_name="Qwxyz", last_name="Other")
+        # suggestions read the typeahead table, refreshed after each load
+        call_command("refreshsearch", stdout=StringIO())
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        results_cache.clear()
+
+    def get_results(self, resource, params):
+        response = self.client.get(
+            reverse("provider_directory:typeahead", kwargs={"resource": resource}), params
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_practitioner_by_last_name_prefix(self):
+        (result,) = self.get_results("practitioners", {"q": "zyzzy"})
+        self.assertEqual(result["id"], str(self.practitioner.individual_id))
+        self.assertEqual(result["name"], "Typeahead Zyzzyva")
+        self.assertEqual(result["npi"], self.practitioner.npi_id)
+        self.assertEqual((result["city"], result["state"]), ("Springfield", "IL"))
+
+    def test_practitioner_by_full_name_prefix(self):
+        results = self.get_results("practitioners", {"q": "  typeahead   ZYZ"})
+        self.assertEqual(
+            [result["name"] for result in results], ["Typeahead Zyzzëx", "Typeahead Zyzzyva"]
+        )
+
+    def test_prefix_ignores_accents(self):
+        results = self.get_results("practitioners", {"q": "zyzzex"})
+        self.assertEqual([result["id"] for result in results], [str(self.accented.individual_id)])
+
+    def test_limit(self):
+        self.assertEqual(len(self.get_results("practitioners", {"q": "typeahead", "limit": 1})), 1)
+
+    def test_limit_counts_resources_not_names(self):
+        results = self.get_results("practitioners", {"q": "qwxy", "limit": 2})
+        self.assertEqual(
+            [result["id"] for result in results],
+            [str(self.renamed.individual_id), str(self.other.individual_id)],
+        )
+
+    def test_organizations(self):
+        (result,) = self.get_results("organizations", {"q": "zyzzyva t"})
+        self.assertEqual(result["id"], str(self.organization.id))
+        self.assertEqual(result["name"], "Zyzzyva Typeahead Clinic")
+
+    def test_empty_prefix(self):
+        self.assertEqual(self.get_results("practitioners", {"q": " "}), [])
+
+    def test_unknown_resource(self):
+        response = self.client.get(
+            reverse("provider_directory:typeahead", kwargs={"resource": "locations"}), {"q": "a"}
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_results_are_cached(self):
+        suggestions = suggest("Practitioner", "zyzzy")
+        with self.assertNumQueries(0):
+            self.assertEqual(suggest("Practitioner", "ZYZZY"), suggestions)
@@ -0,0 +1,76 @@
+"""
+Name typeahead for the provider directory search UI: the first few
+practitioners or organizations whose name starts with a prefix. Suggestions
+are read from the typeahead table (see npdfhir.models.Typeahead) with an
+index range scan, and kept in a small per-worker cache since successive
+keystrokes and users repeat the same prefixes.
+"""
+
+from uuid import UUID
+
+from django.conf import settings
+from django.db.models import Func, TextField, Value
+from django.db.models.functions import Lower
+from pydantic import BaseModel
+
+from npdfhir.models import Typeahead
+from npdfhir.search_cache import ResultCache
+
+# URL segment -> resource type
+RESOURCE_TYPES = {"practitioners": "Practitioner", "organizations": "Organization"}
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 25
+
+
+class Suggestion(BaseModel):
+    id: UUID
+    name: str
+    npi: int | None = None
+    city: str | None = None
+    state: str | None = None
+
+
+results_cache = ResultCache(settings.TYPEAHEAD_CACHE_SIZE, settings.TYPEAHEAD_CACHE_TIMEOUT)
+
+
+def suggest(resource_type, prefix, limit=DEFAULT_LIMIT) -> list[Suggestion]:
+    """
+    The first `limit` resources of the type with a name starting with prefix,
+    in alphabetical order of that name.
+    """
+    prefix = " ".join(prefix.split())
+    if not prefix:
+        return []
+    key = (resource_type, prefix.lower(), limit)
+    suggestions = results_cache.get(key)
+    if suggestions is None:
+        suggestions = find_suggestions(resource_type, prefix, limit)
+        results_cache.set(key, suggestions)
+    return suggestions
+
+
+def find_suggestions(resource_type, prefix, limit):
+    # normalized as the keys are; the expression is constant, so Postgres
+    # folds it and can range scan the index on the key
+    key = Lower(Func(Value(prefix), function="search_text", output_field=TextField()))
+    rows = (
+        Typeahead.objects.filter(resource_type=resource_type, key__startswith=key)
+        .order_by("key", "id")
+        .values_list("id", "display_name", "npi", "city", "state")
+    )
+    # a resource can match on more than one of its names (a practitioner's
+    # are keyed both first name first and last name first), so rows are read
+    # in windows until `limit` resources are found or the matches run out
+    suggestions = {}
+    window = limit * 2
+    start = 0
+    while len(suggestions) < limit:
+        batch = rows[start : start + window]
+        for id, name, npi, city, state in batch:
+            if id not in suggestions and len(suggestions) < limit:
+                suggestions[id] = Suggestion(id=id, name=name, npi=npi, city=city, state=state)
+        if len(batch) < window:
+            break
+        start += window
+    return list(suggestions.values())
@@ -0,0 +1,21 @@
+from django.http import JsonResponse
+
+from npdfhir.places import get_place_index
+
+from ..typeahead import DEFAULT_LIMIT, MAX_LIMIT
+
+
+def places(request):
+    """
+    ZIP code and city suggestions for the proximity search, as
+    `?q=<prefix>&limit=<count>`. A suggestion's name can be sent as is in a
+    near search parameter, e.g. `near=<name>|10|mi`.
+    """
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return JsonResponse({"error": "limit must be a number"}, status=400)
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    suggestions = get_place_index().complete(request.GET.get("q", ""), limit)
+    return JsonResponse({"results": [suggestion._asdict() for suggestion in suggestions]})
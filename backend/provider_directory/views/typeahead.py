@@ -0,0 +1,21 @@
+from django.http import Http404, JsonResponse
+
+from ..typeahead import DEFAULT_LIMIT, MAX_LIMIT, RESOURCE_TYPES, suggest
+
+
+def typeahead(request, resource: str):
+    """
+    Name suggestions for the practitioner and organization lookups, as
+    `?q=<prefix>&limit=<count>`.
+    """
+    if resource not in RESOURCE_TYPES:
+        raise Http404(f"No typeahead for {resource}")
+
+    try:
+        limit = int(request.GET.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        return JsonResponse({"error": "limit must be a number"}, status=400)
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    suggestions = suggest(RESOURCE_TYPES[resource], request.GET.get("q", ""), limit)
+    return JsonResponse({"results": [suggestion.model_dump() for suggestion in suggestions]})
@@ -8,7 +8,7 @@ import sys
 
 from typing import Optional
 from io import StringIO
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 
 logging.basicConfig(level=logging.INFO,
                     format='%(asctime)s - %(levelname)s - %(message)s')
@@ -166,6 +166,10 @@ class FIPSCountyETL:
                     if_row_exists="update",
                     schema = "ndh"
                 )
+                # counties are part of every resource type's addresses, so
+                # refresh the API's search tables, which bumps all of their
+                # dataset versions, in the same transaction
+                con.execute(text("select ndh.refresh_search_views()"))
 
             logger.info("Phase 3 - Loading has finished")
             logger.info(
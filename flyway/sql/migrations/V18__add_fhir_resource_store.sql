@@ -0,0 +1,8 @@
+create table ${apiSchema}.fhir_resource (
+    resource_type varchar(32) not null,
+    resource_id uuid not null,
+    content text not null,
+    content_hash char(64) not null,
+    updated_at timestamp with time zone not null default now(),
+    primary key (resource_type, resource_id)
+);
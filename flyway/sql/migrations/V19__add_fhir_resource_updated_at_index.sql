@@ -0,0 +1,3 @@
+-- backs the per-resource-type dataset version (max updated_at) used for search ETags
+create index ix_fhir_resource_resource_type_updated_at
+on ${apiSchema}.fhir_resource (resource_type, updated_at);
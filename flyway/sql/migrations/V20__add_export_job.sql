@@ -0,0 +1,15 @@
+create table ${apiSchema}.export_job (
+    id uuid primary key,
+    status varchar(16) not null,
+    request_url text not null,
+    base_url text not null,
+    resource_types jsonb not null,
+    progress varchar(32),
+    output jsonb,
+    error text,
+    transaction_time timestamp with time zone,
+    created_at timestamp with time zone not null default now(),
+    updated_at timestamp with time zone not null default now()
+);
+
+create index ix_export_job_status_created_at on ${apiSchema}.export_job (status, created_at);
@@ -0,0 +1,139 @@
+-- stored tsvector columns for name, address and taxonomy search, so the FHIR
+-- search filters match against GIN indexes instead of building tsvectors
+-- for every joined row on every request
+create extension if not exists unaccent with schema public;
+
+-- unaccent() is only stable (its dictionary can change), so wrap it to use
+-- it in the stored columns; search terms go through the same function
+create or replace function ${apiSchema}.search_text(value text) returns text
+language sql immutable parallel safe strict
+as $$ select public.unaccent('public.unaccent'::regdictionary, value) $$;
+
+-- the tsquery for a search value, restricted to lexemes of the given
+-- weights (e.g. 'A' for the city part of an address vector) when given
+create or replace function ${apiSchema}.search_query(value text, weights text default null)
+returns tsquery
+language sql immutable parallel safe
+as $$
+    select case
+        when weights is null or weights = '' then query
+        else regexp_replace(query::text, '''( |$)', '''' || ':' || weights || '\1', 'g')::tsquery
+    end
+    from plainto_tsquery('simple', ${apiSchema}.search_text(value)) as query
+$$;
+
+-- names
+alter table ${apiSchema}.individual_to_name add column search_vector tsvector;
+
+create or replace function ${apiSchema}.individual_to_name_search_vector() returns trigger
+language plpgsql
+as $$
+begin
+    new.search_vector := to_tsvector('simple', ${apiSchema}.search_text(
+        concat_ws(' ', new.first_name, new.middle_name, new.last_name)
+    ));
+    return new;
+end
+$$;
+
+create trigger individual_to_name_search_vector
+before insert or update of first_name, middle_name, last_name
+on ${apiSchema}.individual_to_name
+for each row execute function ${apiSchema}.individual_to_name_search_vector();
+
+update ${apiSchema}.individual_to_name set search_vector = to_tsvector('simple', ${apiSchema}.search_text(
+    concat_ws(' ', first_name, middle_name, last_name)
+));
+
+create index ix_individual_to_name_search_vector
+on ${apiSchema}.individual_to_name using gin (search_vector);
+
+alter table ${apiSchema}.organization_to_name add column search_vector tsvector;
+
+create or replace function ${apiSchema}.organization_to_name_search_vector() returns trigger
+language plpgsql
+as $$
+begin
+    new.search_vector := to_tsvector('simple', ${apiSchema}.search_text(new.name));
+    return new;
+end
+$$;
+
+create trigger organization_to_name_search_vector
+before insert or update of name
+on ${apiSchema}.organization_to_name
+for each row execute function ${apiSchema}.organization_to_name_search_vector();
+
+update ${apiSchema}.organization_to_name
+set search_vector = to_tsvector('simple', ${apiSchema}.search_text(name));
+
+create index ix_organization_to_name_search_vector
+on ${apiSchema}.organization_to_name using gin (search_vector);
+
+-- taxonomy display names
+alter table ${apiSchema}.nucc add column search_vector tsvector;
+
+create or replace function ${apiSchema}.nucc_search_vector() returns trigger
+language plpgsql
+as $$
+begin
+    new.search_vector := to_tsvector('simple', ${apiSchema}.search_text(new.display_name));
+    return new;
+end
+$$;
+
+create trigger nucc_search_vector
+before insert or update of display_name
+on ${apiSchema}.nucc
+for each row execute function ${apiSchema}.nucc_search_vector();
+
+update ${apiSchema}.nucc
+set search_vector = to_tsvector('simple', ${apiSchema}.search_text(display_name));
+
+create index ix_nucc_search_vector on ${apiSchema}.nucc using gin (search_vector);
+
+-- addresses, weighted by part so city (A), state (B) and zip code (C)
+-- searches can use the same column and index as whole-address (D) searches
+alter table ${apiSchema}.address_us add column search_vector tsvector;
+
+create or replace function ${apiSchema}.address_us_search_vector(
+    delivery_line_1 text,
+    delivery_line_2 text,
+    city_name text,
+    state_code text,
+    zipcode text
+) returns tsvector
+language sql stable parallel safe
+as $$
+    select
+        setweight(to_tsvector('simple', coalesce(${apiSchema}.search_text(city_name), '')), 'A')
+        || setweight(to_tsvector('simple', coalesce((
+            select abbreviation from ${apiSchema}.fips_state where id = state_code
+        ), '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(zipcode, '')), 'C')
+        || setweight(to_tsvector('simple', coalesce(${apiSchema}.search_text(
+            concat_ws(' ', delivery_line_1, delivery_line_2)
+        ), '')), 'D')
+$$;
+
+create or replace function ${apiSchema}.address_us_search_vector() returns trigger
+language plpgsql
+as $$
+begin
+    new.search_vector := ${apiSchema}.address_us_search_vector(
+        new.delivery_line_1, new.delivery_line_2, new.city_name, new.state_code, new.zipcode
+    );
+    return new;
+end
+$$;
+
+create trigger address_us_search_vector
+before insert or update of delivery_line_1, delivery_line_2, city_name, state_code, zipcode
+on ${apiSchema}.address_us
+for each row execute function ${apiSchema}.address_us_search_vector();
+
+update ${apiSchema}.address_us set search_vector = ${apiSchema}.address_us_search_vector(
+    delivery_line_1, delivery_line_2, city_name, state_code, zipcode
+);
+
+create index ix_address_us_search_vector on ${apiSchema}.address_us using gin (search_vector);
@@ -0,0 +1,15 @@
+-- trigram indexes for the substring filters (name and other_id LIKE/ILIKE
+-- searches), which a btree cannot serve; gin_trgm_ops also serves equality
+create extension if not exists pg_trgm with schema public;
+
+create index ix_endpoint_instance_name_trgm
+on ${apiSchema}.endpoint_instance using gin (name public.gin_trgm_ops);
+
+create index ix_location_name_trgm
+on ${apiSchema}.location using gin (name public.gin_trgm_ops);
+
+create index ix_organization_to_name_name_trgm
+on ${apiSchema}.organization_to_name using gin (name public.gin_trgm_ops);
+
+create index ix_provider_to_other_id_other_id_trgm
+on ${apiSchema}.provider_to_other_id using gin (other_id public.gin_trgm_ops);
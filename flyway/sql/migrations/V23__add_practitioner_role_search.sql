@@ -0,0 +1,141 @@
+-- flattened search table for the PractitionerRole filters: one row per
+-- provider_to_location, holding everything the filters and the default sort
+-- read, so a search scans one table (through its indexes) instead of joining
+-- four to six tables per filter. Refreshed after each ETL load with
+-- `python manage.py refreshsearch`.
+create aggregate ${apiSchema}.tsvector_agg(tsvector) (
+    sfunc = tsvector_concat,
+    stype = tsvector,
+    initcond = ''
+);
+
+create materialized view ${apiSchema}.practitioner_role_search as
+select
+    provider_to_location.id,
+    provider_to_location.location_id,
+    provider_to_location.active,
+    provider_to_location.provider_role_code,
+    provider_to_location.specialty_id,
+    provider_to_organization.individual_id as practitioner_id,
+    provider_to_organization.organization_id,
+    location.organization_id as endpoint_organization_id,
+    location.name as location_name,
+    practitioner_name.first_name as practitioner_first_name,
+    practitioner_name.last_name as practitioner_last_name,
+    (
+        select ${apiSchema}.tsvector_agg(individual_to_name.search_vector)
+        from ${apiSchema}.individual_to_name
+        where individual_to_name.individual_id = provider_to_organization.individual_id
+    ) as practitioner_name_vector,
+    individual.gender as practitioner_gender,
+    provider.npi as practitioner_npi,
+    array(
+        select provider_to_other_id.other_id::text
+        from ${apiSchema}.provider_to_other_id
+        where provider_to_other_id.npi = provider.npi
+    ) as practitioner_other_ids,
+    array(
+        select provider_to_taxonomy.nucc_code::text
+        from ${apiSchema}.provider_to_taxonomy
+        where provider_to_taxonomy.npi = provider.npi
+    ) as practitioner_types,
+    (
+        select ${apiSchema}.tsvector_agg(organization_to_name.search_vector)
+        from ${apiSchema}.organization_to_name
+        where organization_to_name.organization_id = provider_to_organization.organization_id
+    ) as organization_name_vector,
+    array(
+        select organization_to_taxonomy.nucc_code::text
+        from ${apiSchema}.clinical_organization
+        join ${apiSchema}.organization_to_taxonomy
+            on organization_to_taxonomy.npi = clinical_organization.npi
+        where clinical_organization.organization_id = provider_to_organization.organization_id
+    ) as organization_types,
+    address_us.search_vector as address_vector,
+    address_us.geolocation,
+    array(
+        select endpoint_instance.endpoint_connection_type_id::text
+        from ${apiSchema}.endpoint
+        join ${apiSchema}.endpoint_instance on endpoint_instance.id = endpoint.endpoint_instance_id
+        where endpoint.id = provider_to_location.other_endpoint_id
+            and endpoint_instance.endpoint_connection_type_id is not null
+    ) as endpoint_connection_types,
+    array(
+        select distinct endpoint_instance_to_payload.payload_type_id::text
+        from ${apiSchema}.location_to_endpoint_instance
+        join ${apiSchema}.endpoint_instance_to_payload
+            using (endpoint_instance_id)
+        where location_to_endpoint_instance.location_id = provider_to_location.location_id
+    ) as endpoint_payload_types,
+    array(
+        select distinct endpoint_instance.status::text
+        from ${apiSchema}.location_to_endpoint_instance
+        join ${apiSchema}.endpoint_instance
+            on endpoint_instance.id = location_to_endpoint_instance.endpoint_instance_id
+        where location_to_endpoint_instance.location_id = provider_to_location.location_id
+            and endpoint_instance.status is not null
+    ) as endpoint_statuses,
+    array(
+        select organization_to_name.name::text
+        from ${apiSchema}.organization_to_name
+        where organization_to_name.organization_id = location.organization_id
+    ) as endpoint_organization_names
+from ${apiSchema}.provider_to_location
+left join ${apiSchema}.provider_to_organization
+    on provider_to_organization.id = provider_to_location.provider_to_organization_id
+left join ${apiSchema}.provider
+    on provider.individual_id = provider_to_organization.individual_id
+left join ${apiSchema}.individual
+    on individual.id = provider_to_organization.individual_id
+left join lateral (
+    select individual_to_name.first_name, individual_to_name.last_name
+    from ${apiSchema}.individual_to_name
+    where individual_to_name.individual_id = provider_to_organization.individual_id
+    order by individual_to_name.name_use_id, individual_to_name.last_name, individual_to_name.first_name
+    limit 1
+) as practitioner_name on true
+left join ${apiSchema}.location on location.id = provider_to_location.location_id
+left join ${apiSchema}.address on address.id = location.address_id
+left join ${apiSchema}.address_us on address_us.id = address.address_us_id;
+
+-- unique, so the view can be refreshed concurrently
+create unique index ix_practitioner_role_search_id
+on ${apiSchema}.practitioner_role_search (id);
+
+-- default sort (location name, then id) and the sorts by practitioner name
+create index ix_practitioner_role_search_location_name
+on ${apiSchema}.practitioner_role_search (location_name, id);
+create index ix_practitioner_role_search_practitioner_first_name
+on ${apiSchema}.practitioner_role_search (practitioner_first_name, id);
+create index ix_practitioner_role_search_practitioner_last_name
+on ${apiSchema}.practitioner_role_search (practitioner_last_name, id);
+
+create index ix_practitioner_role_search_practitioner_npi
+on ${apiSchema}.practitioner_role_search (practitioner_npi);
+create index ix_practitioner_role_search_endpoint_organization_id
+on ${apiSchema}.practitioner_role_search (endpoint_organization_id);
+
+create index ix_practitioner_role_search_practitioner_name_vector
+on ${apiSchema}.practitioner_role_search using gin (practitioner_name_vector);
+create index ix_practitioner_role_search_organization_name_vector
+on ${apiSchema}.practitioner_role_search using gin (organization_name_vector);
+create index ix_practitioner_role_search_address_vector
+on ${apiSchema}.practitioner_role_search using gin (address_vector);
+
+create index ix_practitioner_role_search_practitioner_other_ids
+on ${apiSchema}.practitioner_role_search using gin (practitioner_other_ids);
+create index ix_practitioner_role_search_practitioner_types
+on ${apiSchema}.practitioner_role_search using gin (practitioner_types);
+create index ix_practitioner_role_search_organization_types
+on ${apiSchema}.practitioner_role_search using gin (organization_types);
+create index ix_practitioner_role_search_endpoint_connection_types
+on ${apiSchema}.practitioner_role_search using gin (endpoint_connection_types);
+create index ix_practitioner_role_search_endpoint_payload_types
+on ${apiSchema}.practitioner_role_search using gin (endpoint_payload_types);
+create index ix_practitioner_role_search_endpoint_statuses
+on ${apiSchema}.practitioner_role_search using gin (endpoint_statuses);
+create index ix_practitioner_role_search_endpoint_organization_names
+on ${apiSchema}.practitioner_role_search using gin (endpoint_organization_names);
+
+create index ix_practitioner_role_search_geolocation
+on ${apiSchema}.practitioner_role_search using gist (geolocation);
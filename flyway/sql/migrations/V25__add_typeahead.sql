@@ -0,0 +1,62 @@
+-- name typeahead for the provider directory search UI: one row per searchable
+-- name of each practitioner (first last and last first) and organization, with
+-- what a suggestion shows. key is the name unaccented and lowercased, in the C
+-- collation, so one btree index serves both the prefix match (key like 'abc%')
+-- and the alphabetical order of the suggestions. Refreshed after each ETL load
+-- with `python manage.py refreshsearch`.
+create materialized view ${apiSchema}.typeahead as
+select distinct on (provider.individual_id, key)
+    'Practitioner'::text as resource_type,
+    provider.individual_id as id,
+    lower(${apiSchema}.search_text(names.name)) collate "C" as key,
+    concat_ws(' ', individual_to_name.first_name, individual_to_name.last_name) as display_name,
+    provider.npi,
+    address.city_name as city,
+    address.state
+from ${apiSchema}.provider
+join ${apiSchema}.individual_to_name
+    on individual_to_name.individual_id = provider.individual_id
+cross join lateral (
+    values
+        (concat_ws(' ', individual_to_name.first_name, individual_to_name.last_name)),
+        (concat_ws(' ', individual_to_name.last_name, individual_to_name.first_name))
+) as names (name)
+left join lateral (
+    select address_us.city_name, fips_state.abbreviation as state
+    from ${apiSchema}.individual_to_address
+    join ${apiSchema}.address on address.id = individual_to_address.address_id
+    join ${apiSchema}.address_us on address_us.id = address.address_us_id
+    left join ${apiSchema}.fips_state on fips_state.id = address_us.state_code
+    where individual_to_address.individual_id = provider.individual_id
+    order by individual_to_address.address_use_id
+    limit 1
+) as address on true
+union all
+select distinct on (organization_to_name.organization_id, key)
+    'Organization'::text as resource_type,
+    organization_to_name.organization_id as id,
+    lower(${apiSchema}.search_text(organization_to_name.name)) collate "C" as key,
+    organization_to_name.name as display_name,
+    clinical_organization.npi,
+    address.city_name as city,
+    address.state
+from ${apiSchema}.organization_to_name
+left join ${apiSchema}.clinical_organization
+    on clinical_organization.organization_id = organization_to_name.organization_id
+left join lateral (
+    select address_us.city_name, fips_state.abbreviation as state
+    from ${apiSchema}.organization_to_address
+    join ${apiSchema}.address on address.id = organization_to_address.address_id
+    join ${apiSchema}.address_us on address_us.id = address.address_us_id
+    left join ${apiSchema}.fips_state on fips_state.id = address_us.state_code
+    where organization_to_address.organization_id = organization_to_name.organization_id
+    order by organization_to_address.address_use_id
+    limit 1
+) as address on true;
+
+-- unique, so the view can be refreshed concurrently
+create unique index ix_typeahead_resource_type_id_key
+on ${apiSchema}.typeahead (resource_type, id, key);
+
+create index ix_typeahead_resource_type_key
+on ${apiSchema}.typeahead (resource_type, key);
@@ -0,0 +1,32 @@
+-- the centroid of each ZIP code and city (as "City, ST") with a geocoded
+-- address, for resolving a place name to a point in proximity searches
+-- (near=<zip>|<distance>) and for place autocomplete. county is the county
+-- most of the place's addresses are in. Refreshed after each ETL load with
+-- `python manage.py refreshsearch`.
+create materialized view ${apiSchema}.place_centroid as
+select
+    'zip'::text as kind,
+    address_us.zipcode as name,
+    mode() within group (order by fips_county.name) as county,
+    avg(address_us.latitude)::numeric(9, 6) as latitude,
+    avg(address_us.longitude)::numeric(9, 6) as longitude
+from ${apiSchema}.address_us
+left join ${apiSchema}.fips_county on fips_county.id = address_us.county_code
+where address_us.latitude is not null and address_us.longitude is not null
+group by address_us.zipcode
+union all
+select
+    'city'::text as kind,
+    concat(address_us.city_name, ', ', fips_state.abbreviation) as name,
+    mode() within group (order by fips_county.name) as county,
+    avg(address_us.latitude)::numeric(9, 6) as latitude,
+    avg(address_us.longitude)::numeric(9, 6) as longitude
+from ${apiSchema}.address_us
+join ${apiSchema}.fips_state on fips_state.id = address_us.state_code
+left join ${apiSchema}.fips_county on fips_county.id = address_us.county_code
+where address_us.latitude is not null and address_us.longitude is not null
+group by address_us.city_name, fips_state.abbreviation;
+
+-- unique, so the view can be refreshed concurrently
+create unique index ix_place_centroid_kind_name
+on ${apiSchema}.place_centroid (kind, name);
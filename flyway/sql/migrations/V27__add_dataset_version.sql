@@ -0,0 +1,28 @@
+-- a generation counter per FHIR resource type, bumped in the transaction of
+-- every load that changes the resource type's data:
+--     select ${apiSchema}.bump_dataset_version(array['Practitioner', 'Location']);
+-- or, for a load that may change any of them:
+--     select ${apiSchema}.bump_dataset_version();
+-- Search ETags and the search and count cache keys derive from it (see
+-- npdfhir.dataset), so caches never serve data from before a load.
+-- Generations are drawn from a sequence, which is not rolled back with a
+-- failed load, so no generation is ever reused.
+create sequence ${apiSchema}.dataset_generation;
+
+create table ${apiSchema}.dataset_version (
+    resource_type varchar(32) primary key,
+    generation bigint not null default 0,
+    updated_at timestamp with time zone not null default now()
+);
+
+insert into ${apiSchema}.dataset_version (resource_type)
+values ('Endpoint'), ('Location'), ('Organization'), ('Practitioner'), ('PractitionerRole');
+
+create or replace function ${apiSchema}.bump_dataset_version(resource_types text[] default null)
+returns void
+language sql
+as $$
+    update ${apiSchema}.dataset_version
+    set generation = nextval('${apiSchema}.dataset_generation'), updated_at = clock_timestamp()
+    where resource_types is null or resource_type = any(resource_types);
+$$;
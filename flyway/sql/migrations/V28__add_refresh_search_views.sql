@@ -0,0 +1,19 @@
+-- refreshes the materialized views the FHIR search filters, the name typeahead
+-- and the place autocomplete read, and bumps every resource type's dataset
+-- version, so searches see a load's rows and caches drop their old pages.
+-- Every load calls it once its data is written:
+--     select ${apiSchema}.refresh_search_views();
+-- (the ETLs directly, the backend through `python manage.py refreshsearch`).
+-- The views are refreshed concurrently, so searches keep reading the old rows
+-- meanwhile.
+create or replace function ${apiSchema}.refresh_search_views()
+returns void
+language plpgsql
+as $$
+begin
+    refresh materialized view concurrently ${apiSchema}.practitioner_role_search;
+    refresh materialized view concurrently ${apiSchema}.typeahead;
+    refresh materialized view concurrently ${apiSchema}.place_centroid;
+    perform ${apiSchema}.bump_dataset_version();
+end;
+$$;
@@ -0,0 +1,6 @@
+-- the dataset generation (see V27) each resource type's documents in
+-- fhir_resource were built at, set by `python manage.py buildfhirstore`. Stored
+-- documents are only served while it is the resource type's current
+-- generation, so a load, which bumps the generation, sends reads back to the
+-- serializers until the store is rebuilt.
+alter table ${apiSchema}.dataset_version add column store_generation bigint;